@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Bookmark, Folder, Tag
+from .models import Bookmark, Folder, ImportJob, Tag, UserTagStat
 
 
 @admin.register(Folder)
@@ -13,7 +13,9 @@ class FolderAdmin(admin.ModelAdmin):
     list_display = [
         "title",
         "user",
+        "bookmarks_qty",
     ]
+    readonly_fields = ["bookmarks_qty"]
     ordering = ["user", "title"]
 
 
@@ -30,6 +32,22 @@ class TagAdmin(admin.ModelAdmin):
     ordering = ["title"]
 
 
+@admin.register(UserTagStat)
+class UserTagStatAdmin(admin.ModelAdmin):
+    """
+    Configures admin panel views for UserTagStats.
+    """
+
+    model = UserTagStat
+    list_display = [
+        "tag",
+        "user",
+        "bookmarks_qty",
+    ]
+    readonly_fields = ["user", "tag", "bookmarks_qty"]
+    ordering = ["user", "-bookmarks_qty"]
+
+
 @admin.register(Bookmark)
 class BookmarkAdmin(admin.ModelAdmin):
     """
@@ -46,6 +64,25 @@ class BookmarkAdmin(admin.ModelAdmin):
         "is_archived",
         "created",
     ]
-    list_filter = ["is_archived", "is_favorite", "is_read"]
+    list_filter = ["is_archived", "is_favorite", "is_read", "metadata_status"]
     search_fields = ["title"]
     ordering = ["user", "is_archived", "-is_favorite", "is_read", "-created"]
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """
+    Configures admin panel views for ImportJobs.
+    """
+
+    model = ImportJob
+    list_display = [
+        "file",
+        "user",
+        "status",
+        "bookmarks_created",
+        "bookmarks_skipped",
+        "created",
+    ]
+    list_filter = ["status"]
+    ordering = ["-created"]
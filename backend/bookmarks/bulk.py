@@ -0,0 +1,133 @@
+"""
+Bulk operations on user's bookmarks - set flags, move to folder, add or remove tags, delete.
+
+Each operation runs as a few set-based queries regardless of the number of bookmarks, in one transaction with
+adjustment of folder counters and tag statistics. Changed bookmarks share one change sequence number for delta sync.
+"""
+from collections import Counter
+from typing import List
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .counters import (
+    adjust_folder_counters,
+    adjust_tag_stats,
+    count_folder_bookmarks,
+    count_tag_links,
+)
+from .models import Bookmark
+from .sync import next_change_seq
+
+BULK_MAX_IDS = 1000
+BULK_FLAGS = ["is_favorite", "is_read", "is_archived"]
+
+
+def apply_bulk_operation(
+    user, bookmarks: QuerySet, operation: str, data: dict
+) -> List[int]:
+    """
+    Apply `operation` with parameters from `data` to `user`'s `bookmarks`. Ownership is enforced in the query:
+    bookmarks of other users are never selected. Return ids of affected bookmarks.
+    Selections of more than `BULK_MAX_IDS` bookmarks (possible with `filter`) are rejected with ValidationError.
+    """
+    with transaction.atomic():
+        ids = list(
+            bookmarks.filter(user_id__exact=user.pk)
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", flat=True)[: BULK_MAX_IDS + 1]
+        )
+        if len(ids) > BULK_MAX_IDS:
+            raise ValidationError(
+                {
+                    "filter": f"More than {BULK_MAX_IDS} bookmarks are selected. "
+                    "Narrow the filter down."
+                }
+            )
+        if ids:
+            BULK_OPERATIONS[operation](
+                user, Bookmark.objects.filter(pk__in=ids), ids, data
+            )
+    return ids
+
+
+def set_flags(user, bookmarks: QuerySet, ids: List[int], data: dict) -> None:
+    """
+    Set flags passed in `data`; (un)archived bookmarks are subtracted from (added to) folder counters.
+    """
+    flags = {flag: data[flag] for flag in BULK_FLAGS if flag in data}
+    if "is_archived" in flags:
+        changed = bookmarks.filter(is_archived=not flags["is_archived"])
+        adjust_folder_counters(
+            count_folder_bookmarks(changed, sign=-1 if flags["is_archived"] else 1)
+        )
+    bookmarks.update(
+        **flags, updated=timezone.now(), change_seq=next_change_seq(user.pk)
+    )
+
+
+def move(user, bookmarks: QuerySet, ids: List[int], data: dict) -> None:
+    """
+    Move bookmarks to `folder` passed in `data`, or out of folders if it's None.
+    """
+    folder = data["folder"]
+    changes = count_folder_bookmarks(bookmarks.filter(is_archived=False), sign=-1)
+    if folder:
+        changes[folder.pk] -= sum(changes.values())
+    adjust_folder_counters(changes)
+    bookmarks.update(
+        folder=folder, updated=timezone.now(), change_seq=next_change_seq(user.pk)
+    )
+
+
+def add_tags(user, bookmarks: QuerySet, ids: List[int], data: dict) -> None:
+    """
+    Add `tags` passed in `data`; only missing links are inserted.
+    """
+    through = Bookmark.tags.through
+    tag_ids = list(data["tags"])
+    existing = set(
+        through.objects.filter(bookmark_id__in=ids, tag_id__in=tag_ids).values_list(
+            "bookmark_id", "tag_id"
+        )
+    )
+    links = [
+        through(bookmark_id=bookmark_id, tag_id=tag_id)
+        for bookmark_id in ids
+        for tag_id in tag_ids
+        if (bookmark_id, tag_id) not in existing
+    ]
+    through.objects.bulk_create(links, batch_size=BULK_MAX_IDS)
+    adjust_tag_stats(Counter((user.pk, link.tag_id) for link in links))
+    bookmarks.update(updated=timezone.now(), change_seq=next_change_seq(user.pk))
+
+
+def remove_tags(user, bookmarks: QuerySet, ids: List[int], data: dict) -> None:
+    """
+    Remove `tags` passed in `data`.
+    """
+    links = Bookmark.tags.through.objects.filter(
+        bookmark_id__in=ids, tag_id__in=list(data["tags"])
+    )
+    adjust_tag_stats(count_tag_links(links, sign=-1))
+    links.delete()
+    bookmarks.update(updated=timezone.now(), change_seq=next_change_seq(user.pk))
+
+
+def delete(user, bookmarks: QuerySet, ids: List[int], data: dict) -> None:
+    """
+    Delete bookmarks; `BookmarkQuerySet.delete()` adjusts counters and statistics.
+    """
+    bookmarks.delete()
+
+
+BULK_OPERATIONS = {
+    "set_flags": set_flags,
+    "move": move,
+    "add_tags": add_tags,
+    "remove_tags": remove_tags,
+    "delete": delete,
+}
@@ -0,0 +1,230 @@
+"""
+Denormalized counters:
+- `Folder.bookmarks_qty` - number of non-archived bookmarks in each folder;
+- `UserTagStat.bookmarks_qty` - number of user's bookmarks marked with each tag.
+
+Counters are adjusted with relative `UPDATE ... SET bookmarks_qty = bookmarks_qty + N` in the same transaction as
+the change of bookmarks, so concurrent changes don't overwrite each other. Single bookmarks are taken care of by
+`Bookmark.save()` and signals; code changing bookmarks in bulk (`bulk_create()`, `QuerySet.update()`) must call
+`adjust_folder_counters()` / `adjust_tag_stats()` itself. `repair_folder_counters` and `rebuild_tag_stats`
+management commands fix any drift.
+"""
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Bookmark, Folder, UserTagStat
+from .sync import bump_change_seqs
+
+# (user id, tag id)
+UserTag = Tuple[int, int]
+
+
+def counted_folder_id(folder_id: Optional[int], is_archived: bool) -> Optional[int]:
+    """
+    Return id of the folder whose counter includes a bookmark in `folder_id` with `is_archived` state, if any.
+    """
+    return folder_id if folder_id and not is_archived else None
+
+
+def count_by_folder(bookmarks: Iterable[Bookmark], sign: int = 1) -> Counter:
+    """
+    Return counter changes caused by adding (or removing, with `sign=-1`) `bookmarks`.
+    """
+    changes = Counter()
+    for bookmark in bookmarks:
+        if folder_id := counted_folder_id(bookmark.folder_id, bookmark.is_archived):
+            changes[folder_id] += sign
+    return changes
+
+
+def count_folder_bookmarks(bookmarks: QuerySet, sign: int = 1) -> Counter:
+    """
+    Return counter changes caused by adding (or removing, with `sign=-1`) `bookmarks` queryset to counters,
+    counted in DB. The caller filters out bookmarks that don't count (archived ones, or those already counted).
+    Bookmarks without folder are counted under `None` key, which is ignored by `adjust_folder_counters()`.
+    """
+    return Counter(
+        {
+            folder_id: qty * sign
+            for folder_id, qty in bookmarks.order_by()
+            .values_list("folder_id")
+            .annotate(qty=Count("pk"))
+        }
+    )
+
+
+def adjust_folder_counters(  # noqa: max-complexity: 4
+    changes: Mapping[Optional[int], int],
+) -> None:
+    """
+    Add `changes` (folder id -> delta) to folder counters, with one UPDATE query per distinct delta.
+    Should be called in the transaction changing the bookmarks.
+    """
+    folder_ids_by_delta = defaultdict(list)
+    for folder_id, delta in changes.items():
+        if folder_id and delta:
+            folder_ids_by_delta[delta].append(folder_id)
+
+    for delta, folder_ids in folder_ids_by_delta.items():
+        Folder.objects.filter(pk__in=folder_ids).update(
+            bookmarks_qty=F("bookmarks_qty") + delta
+        )
+
+
+def get_actual_bookmarks_qty() -> Coalesce:
+    """
+    Return expression computing actual number of non-archived bookmarks in the folder - source of truth
+    for the counter.
+    """
+    bookmarks_qty = (
+        Bookmark.objects.filter(folder_id=OuterRef("pk"), is_archived=False)
+        .order_by()
+        .values("folder_id")
+        .annotate(qty=Count("pk"))
+        .values("qty")
+    )
+    return Coalesce(Subquery(bookmarks_qty, output_field=IntegerField()), 0)
+
+
+def find_stale_folders(folders=None):
+    """
+    Return `folders` (all folders by default) whose counters differ from the actual bookmark counts,
+    annotated with `actual_bookmarks_qty`.
+    """
+    folders = Folder.objects.all() if folders is None else folders
+    return folders.annotate(actual_bookmarks_qty=get_actual_bookmarks_qty()).filter(
+        ~Q(bookmarks_qty=F("actual_bookmarks_qty"))
+    )
+
+
+def repair_folder_counters(folders=None) -> int:
+    """
+    Recompute counters of `folders` (all folders by default) that have drifted, with a single UPDATE query,
+    and bump collection versions of their users. Return number of repaired folders.
+    """
+    stale = dict(find_stale_folders(folders).values_list("pk", "user_id"))
+    if not stale:
+        return 0
+    with transaction.atomic():
+        bump_change_seqs(stale.values())
+        return Folder.objects.filter(pk__in=list(stale)).update(
+            bookmarks_qty=get_actual_bookmarks_qty()
+        )
+
+
+def count_tag_links(links: QuerySet, sign: int = 1) -> Dict[UserTag, int]:
+    """
+    Return statistics changes caused by adding (or removing, with `sign=-1`) bookmark-tag `links`
+    (`Bookmark.tags.through` queryset): number of links per user and tag.
+    """
+    return {
+        (user_id, tag_id): qty * sign
+        for user_id, tag_id, qty in links.order_by()
+        .values_list("bookmark__user_id", "tag_id")
+        .annotate(qty=Count("pk"))
+    }
+
+
+def adjust_tag_stats(changes: Mapping[UserTag, int]) -> None:  # noqa: max-complexity: 6
+    """
+    Add `changes` ((user id, tag id) -> delta) to user tag statistics. Missing rows are created, and rows
+    dropping to zero are deleted, so each user only has rows for tags in use.
+    Should be called in the transaction changing the bookmarks.
+    """
+    changes = {key: delta for key, delta in changes.items() if delta}
+    UserTagStat.objects.bulk_create(
+        [
+            UserTagStat(user_id=user_id, tag_id=tag_id)
+            for (user_id, tag_id), delta in changes.items()
+            if delta > 0
+        ],
+        ignore_conflicts=True,
+    )
+
+    tag_ids_by_user_and_delta = defaultdict(list)
+    for (user_id, tag_id), delta in changes.items():
+        tag_ids_by_user_and_delta[(user_id, delta)].append(tag_id)
+
+    for (user_id, delta), tag_ids in tag_ids_by_user_and_delta.items():
+        stats = UserTagStat.objects.filter(user_id=user_id, tag_id__in=tag_ids)
+        stats.update(bookmarks_qty=F("bookmarks_qty") + delta)
+        if delta < 0:
+            stats.filter(bookmarks_qty=0).delete()
+
+
+def get_actual_tag_stats(
+    user_ids: Optional[Iterable[int]] = None,
+) -> Dict[UserTag, int]:
+    """
+    Return actual number of bookmarks per user and tag - source of truth for the statistics.
+    """
+    links = Bookmark.tags.through.objects.all()
+    if user_ids is not None:
+        links = links.filter(bookmark__user_id__in=user_ids)
+    return count_tag_links(links)
+
+
+def get_stored_tag_stats(
+    user_ids: Optional[Iterable[int]] = None,
+) -> Dict[UserTag, int]:
+    """
+    Return stored number of bookmarks per user and tag.
+    """
+    stats = UserTagStat.objects.all()
+    if user_ids is not None:
+        stats = stats.filter(user_id__in=user_ids)
+    return {
+        (user_id, tag_id): qty
+        for user_id, tag_id, qty in stats.values_list(
+            "user_id", "tag_id", "bookmarks_qty"
+        )
+    }
+
+
+def find_stale_tag_stats(
+    user_ids: Optional[Iterable[int]] = None,
+) -> Dict[UserTag, Tuple[int, int]]:
+    """
+    Return user tag statistics which differ from the actual counts: (user id, tag id) -> (stored, actual).
+    """
+    actual = get_actual_tag_stats(user_ids)
+    stored = get_stored_tag_stats(user_ids)
+    return {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in actual.keys() | stored.keys()
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+
+
+@transaction.atomic
+def rebuild_tag_stats(user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute statistics of `user_ids` (all users by default) from scratch, and bump collection versions of users
+    whose statistics have changed. Return number of rows created.
+    """
+    stats = UserTagStat.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        stats = stats.filter(user_id__in=user_ids)
+    actual = get_actual_tag_stats(user_ids)
+    stored = get_stored_tag_stats(user_ids)
+    bump_change_seqs(
+        user_id
+        for (user_id, tag_id) in actual.keys() | stored.keys()
+        if stored.get((user_id, tag_id)) != actual.get((user_id, tag_id))
+    )
+    stats.delete()
+
+    return len(
+        UserTagStat.objects.bulk_create(
+            [
+                UserTagStat(user_id=user_id, tag_id=tag_id, bookmarks_qty=qty)
+                for (user_id, tag_id), qty in actual.items()
+            ],
+            batch_size=1000,
+        )
+    )
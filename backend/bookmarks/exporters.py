@@ -0,0 +1,184 @@
+"""
+Streaming export of user's bookmarks to JSON Lines, Netscape bookmark file and CSV.
+
+Bookmarks are read from DB with `.iterator()` in chunks and written out one record at a time, so memory use
+stays flat regardless of the number of bookmarks.
+"""
+import csv
+import json
+import zlib
+from html import escape
+from typing import Iterable, Iterator
+
+from django.db.models import F
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Bookmark
+from .pagination import BOOKMARK_KEYSET_ORDERING
+from .serializers import BookmarkListSerializer
+
+EXPORT_CHUNK_SIZE = 500
+CSV_COLUMNS = [
+    "url",
+    "title",
+    "description",
+    "folder",
+    "tags",
+    "is_favorite",
+    "is_read",
+    "is_archived",
+    "created",
+]
+
+
+class Echo:
+    """
+    An object that implements just the write method of the file-like interface - `csv.writer` writes to it,
+    and we yield what was written.
+    Reference: https://docs.djangoproject.com/en/4.1/howto/outputting-csv/#streaming-large-csv-files
+    """
+
+    def write(self, value):
+        """
+        Write the value by returning it, instead of storing in a buffer.
+        """
+        return value
+
+
+def iter_bookmarks(
+    user, ordering: Iterable[str] = BOOKMARK_KEYSET_ORDERING
+) -> Iterator[Bookmark]:
+    """
+    Iterate over all `user`'s bookmarks, fetching them (with folders, tags and downloads) in chunks.
+    """
+    return (
+        Bookmark.objects.filter(user_id__exact=user.pk)
+        .with_related()
+        .order_by(*ordering)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def export_json_lines(user) -> Iterator[str]:
+    """
+    Yield `user`'s bookmarks as JSON Lines: one `BookmarkListSerializer` object per line.
+    """
+    for bookmark in iter_bookmarks(user):
+        data = BookmarkListSerializer(instance=bookmark).data
+        yield json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + "\n"
+
+
+def export_csv(user) -> Iterator[str]:
+    """
+    Yield `user`'s bookmarks as CSV rows, with header. Tags are joined with commas.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+
+    for bookmark in iter_bookmarks(user):
+        yield writer.writerow(
+            [
+                bookmark.url,
+                bookmark.title,
+                bookmark.description or "",
+                bookmark.folder.title if bookmark.folder else "",
+                ",".join(tag.title for tag in bookmark.tags.all()),
+                bookmark.is_favorite,
+                bookmark.is_read,
+                bookmark.is_archived,
+                bookmark.created.isoformat(),
+            ]
+        )
+
+
+def export_netscape_html(user) -> Iterator[str]:  # noqa: max-complexity: 7
+    """
+    Yield `user`'s bookmarks as Netscape bookmark file, which can be imported to browsers.
+    Bookmarks are ordered by folder, so each folder's section is written out in one go. Bookmarks without folder
+    are written at the top level - first, wherever the DB sorts NULLs.
+    """
+    yield (
+        "<!DOCTYPE NETSCAPE-Bookmark-file-1>\n"
+        '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n'
+        "<TITLE>Bookmarks</TITLE>\n"
+        "<H1>Bookmarks</H1>\n"
+        "<DL><p>\n"
+    )
+
+    current_folder_id = None
+    for bookmark in iter_bookmarks(
+        user,
+        ordering=(
+            F("folder__title").asc(nulls_first=True),
+            "folder_id",
+            "-created",
+            "id",
+        ),
+    ):
+        if bookmark.folder_id != current_folder_id:
+            if current_folder_id is not None:
+                yield "    </DL><p>\n"
+            if bookmark.folder_id is not None:
+                yield f"    <DT><H3>{escape(bookmark.folder.title)}</H3>\n    <DL><p>\n"
+            current_folder_id = bookmark.folder_id
+
+        indent = "        " if current_folder_id else "    "
+        yield '{indent}<DT><A HREF="{url}" ADD_DATE="{add_date}" TAGS="{tags}">{title}</A>\n'.format(
+            indent=indent,
+            url=escape(bookmark.url),
+            add_date=int(bookmark.created.timestamp()),
+            tags=escape(",".join(tag.title for tag in bookmark.tags.all())),
+            title=escape(bookmark.title),
+        )
+        if bookmark.description:
+            yield f"{indent}<DD>{escape(bookmark.description)}\n"
+
+    if current_folder_id is not None:
+        yield "    </DL><p>\n"
+    yield "</DL><p>\n"
+
+
+def encode(chunks: Iterable[str]) -> Iterator[bytes]:
+    """
+    Encode text `chunks` to UTF-8.
+    """
+    for chunk in chunks:
+        yield chunk.encode("utf-8")
+
+
+def accepts_gzip(accept_encoding: str) -> bool:  # noqa: max-complexity: 5
+    """
+    Return True if `Accept-Encoding` header value allows gzip: it's listed, or `*` is, with non-zero quality.
+    """
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Compress byte `chunks` on the fly to gzip format, yielding compressed data as soon as the compressor emits it.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+EXPORT_FORMATS = {
+    # format: (generator, content type, file extension)
+    "jsonl": (export_json_lines, "application/x-ndjson; charset=utf-8", "jsonl"),
+    "html": (export_netscape_html, "text/html; charset=utf-8", "html"),
+    "csv": (export_csv, "text/csv; charset=utf-8", "csv"),
+}
@@ -0,0 +1,364 @@
+"""
+Bulk import of bookmarks from Netscape bookmark files (exported by all major browsers) and JSON lists.
+
+Uploaded files are parsed in streaming fashion, so memory use doesn't depend on the file size. Parsed bookmarks are
+inserted in chunks with `bulk_create()`, one transaction per chunk, and page metadata is fetched later in background.
+"""
+import codecs
+import json
+from html.parser import HTMLParser
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+
+from .counters import (
+    adjust_folder_counters,
+    adjust_tag_stats,
+    count_by_folder,
+    count_tag_links,
+)
+from .models import Bookmark, Folder, ImportJob, Tag
+from .sync import next_change_seq
+from .tasks import schedule_metadata_enrichment
+from .utils import placeholder_title
+
+IMPORT_CHUNK_SIZE = 500
+READ_CHUNK_SIZE = 64 * 1024
+JSON_WHITESPACE_AND_DELIMITERS = " \t\r\n[],"
+BOOKMARK_FLAGS = ("is_favorite", "is_read", "is_archived")
+
+url_validator = URLValidator(schemes=["http", "https"])
+
+
+class NetscapeBookmarksParser(HTMLParser):
+    """
+    Incremental parser of Netscape bookmark files.
+
+    Structure of the format:
+        <DT><H3>Folder title</H3>
+        <DL><p>
+            <DT><A HREF="https://..." TAGS="tag1,tag2">Bookmark title</A>
+            <DD>Bookmark description
+        </DL><p>
+
+    Parsed bookmarks are accumulated in `bookmarks` list, which should be drained by the caller after each `feed()`.
+    Nested folders are flattened: bookmark goes to the innermost folder it's in.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.bookmarks = []
+        self.folders = []
+        self.next_folder = None
+        self.text = None
+        self.current = None
+
+    def handle_starttag(self, tag, attrs):  # noqa: max-complexity: 5
+        """
+        Start collecting folder title, bookmark title or description; enter a folder.
+        """
+        self.finish_description()
+        attributes = dict(attrs)
+
+        if tag == "h3":
+            self.current = None
+            self.text = []
+        elif tag == "dl":
+            self.folders.append(self.next_folder)
+            self.next_folder = None
+        elif tag == "a" and attributes.get("href"):
+            self.current = {
+                "url": attributes["href"],
+                "tags": (attributes.get("tags") or "").split(","),
+            }
+            self.text = []
+        elif tag == "dd":
+            self.text = []
+
+    def handle_endtag(self, tag):  # noqa: max-complexity: 5
+        """
+        Finish folder title or bookmark title; leave the folder.
+        """
+        if tag == "h3" and self.text is not None:
+            self.next_folder = self.collect_text()
+        elif tag == "a" and self.current is not None:
+            self.current["title"] = self.collect_text()
+            self.current["folder"] = next(
+                (folder for folder in reversed(self.folders) if folder), None
+            )
+            self.bookmarks.append(self.current)
+        elif tag == "dl":
+            self.finish_description()
+            if self.folders:
+                self.folders.pop()
+
+    def handle_data(self, data):
+        """
+        Collect text of titles and descriptions.
+        """
+        if self.text is not None:
+            self.text.append(data)
+
+    def close(self):
+        """
+        Finish the last description, if any.
+        """
+        super().close()
+        self.finish_description()
+
+    def collect_text(self) -> str:
+        """
+        Return collected text with whitespace collapsed, stop collecting.
+        """
+        text = " ".join("".join(self.text or []).split())
+        self.text = None
+        return text
+
+    def finish_description(self):
+        """
+        Assign text collected after `<DD>` to the last parsed bookmark.
+        """
+        if (
+            self.text is not None
+            and self.current is not None
+            and self.current.get("title") is not None
+        ):
+            self.current["description"] = self.collect_text()
+            self.current = None
+
+
+def iter_text_chunks(file, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Read binary UTF-8 encoded `file` in chunks, yield decoded text.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def iter_netscape_bookmarks(chunks: Iterable[str]) -> Iterator[dict]:
+    """
+    Yield bookmarks parsed from Netscape bookmark file text coming in `chunks`.
+    """
+    parser = NetscapeBookmarksParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.bookmarks
+        parser.bookmarks.clear()
+    parser.close()
+    yield from parser.bookmarks
+
+
+def iter_json_bookmarks(  # noqa: max-complexity: 8
+    chunks: Iterable[str],
+) -> Iterator[dict]:
+    """
+    Yield objects from JSON list (or JSON Lines) text coming in `chunks`, without loading the whole document.
+    Each object is decoded as soon as it's complete.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+
+    for chunk in chunks:
+        buffer += chunk
+        position = 0
+        while True:
+            while (
+                position < len(buffer)
+                and buffer[position] in JSON_WHITESPACE_AND_DELIMITERS
+            ):
+                position += 1
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The rest of the buffer is an incomplete object - wait for the next chunk
+                break
+            if isinstance(item, dict):
+                yield item
+        buffer = buffer[position:]
+
+    if buffer.strip(JSON_WHITESPACE_AND_DELIMITERS):
+        raise ValueError("Malformed JSON: can't decode the end of the file.")
+
+
+def detect_file_format(file) -> str:
+    """
+    Return `ImportJob.FileFormat` of the uploaded `file`, looking at its first meaningful character.
+    """
+    head = file.read(1024).lstrip(codecs.BOM_UTF8).lstrip()
+    file.seek(0)
+    return (
+        ImportJob.FileFormat.JSON
+        if head[:1] in (b"[", b"{")
+        else ImportJob.FileFormat.HTML
+    )
+
+
+def clean_bookmark(item: dict) -> Optional[dict]:  # noqa: max-complexity: 6
+    """
+    Return normalized bookmark data from parsed `item`, or None if it has no valid URL, or its flags are not
+    booleans (missing or null flags are false) - strings like "false" are rejected rather than guessed.
+    Accepts items in the format of `BookmarkListSerializer`, so the output of `/api/v1/bookmarks/` can be imported.
+    """
+    url = str(item.get("url") or "").strip()
+    try:
+        url_validator(url)
+    except ValidationError:
+        return None
+
+    flags = {flag: item.get(flag) for flag in BOOKMARK_FLAGS}
+    if any(
+        value is not None and not isinstance(value, bool) for value in flags.values()
+    ):
+        return None
+
+    folder = get_title(item.get("folder"))[:64]
+    tags = item.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    tags = [get_title(tag)[:32] for tag in tags]
+
+    return {
+        "url": url,
+        "title": get_title(item.get("title"))[:256],
+        "description": get_title(item.get("description")) or None,
+        "folder": folder or None,
+        "tags": list(dict.fromkeys(tag for tag in tags if tag)),
+        **{flag: bool(value) for flag, value in flags.items()},
+    }
+
+
+def get_title(value) -> str:
+    """
+    Return stripped string `value`; for nested objects (i.e. folders and tags in `/api/v1/bookmarks/` output)
+    return their `title`.
+    """
+    if isinstance(value, dict):
+        value = value.get("title")
+    return str(value or "").strip()
+
+
+def run_import(job: ImportJob, chunk_size: int = IMPORT_CHUNK_SIZE) -> None:
+    """
+    Import bookmarks from `job.file` for `job.user`, updating job progress after each chunk.
+    """
+    with job.file.open("rb") as file:
+        chunks = iter_text_chunks(file)
+        if job.file_format == ImportJob.FileFormat.JSON:
+            items = iter_json_bookmarks(chunks)
+        else:
+            items = iter_netscape_bookmarks(chunks)
+
+        while batch := list(islice(items, chunk_size)):
+            bookmarks = [
+                bookmark for bookmark in map(clean_bookmark, batch) if bookmark
+            ]
+            created = import_chunk(job.user, bookmarks)
+
+            job.bookmarks_created += created
+            job.bookmarks_skipped += len(batch) - created
+            job.bytes_processed = min(file.tell(), job.bytes_total)
+            job.save(
+                update_fields=[
+                    "bookmarks_created",
+                    "bookmarks_skipped",
+                    "bytes_processed",
+                    "updated",
+                ]
+            )
+
+
+@transaction.atomic
+def import_chunk(user, items: List[dict]) -> int:  # noqa: max-complexity: 4
+    """
+    Create bookmarks from cleaned `items` for `user` with a fixed number of queries: folders and tags are resolved
+    (and missing ones created) in bulk, bookmarks and their tag relations are inserted with `bulk_create()`.
+    Folder counters and tag statistics are adjusted, and page metadata fetching is scheduled for new bookmarks imported
+    without a title. Return number of created bookmarks.
+    """
+    if not items:
+        return 0
+
+    folders = get_or_create_folders(
+        user, {item["folder"] for item in items if item["folder"]}
+    )
+    tags = get_or_create_tags({title for item in items for title in item["tags"]})
+
+    change_seq = next_change_seq(user.pk)
+    bookmarks = Bookmark.objects.bulk_create(
+        [
+            Bookmark(
+                user=user,
+                url=item["url"],
+                title=item["title"] or placeholder_title(item["url"]),
+                description=item["description"],
+                folder=folders.get(item["folder"]),
+                is_favorite=item["is_favorite"],
+                is_read=item["is_read"],
+                is_archived=item["is_archived"],
+                metadata_status=(
+                    Bookmark.MetadataStatus.COMPLETED
+                    if item["title"]
+                    else Bookmark.MetadataStatus.PENDING
+                ),
+                change_seq=change_seq,
+            )
+            for item in items
+        ]
+    )
+    adjust_folder_counters(count_by_folder(bookmarks))
+    Bookmark.tags.through.objects.bulk_create(
+        [
+            Bookmark.tags.through(bookmark_id=bookmark.pk, tag_id=tags[title].pk)
+            for bookmark, item in zip(bookmarks, items)
+            for title in item["tags"]
+        ]
+    )
+
+    adjust_tag_stats(
+        count_tag_links(
+            Bookmark.tags.through.objects.filter(
+                bookmark_id__in=[bookmark.pk for bookmark in bookmarks]
+            )
+        )
+    )
+
+    for bookmark in bookmarks:
+        if bookmark.metadata_status == Bookmark.MetadataStatus.PENDING:
+            schedule_metadata_enrichment(bookmark)
+
+    return len(bookmarks)
+
+
+def get_or_create_folders(user, titles: set) -> dict:
+    """
+    Return user's folders with `titles`, keyed by title. Missing folders are created.
+    """
+    folders = {}
+    for folder in Folder.objects.filter(user=user, title__in=titles).order_by("pk"):
+        folders.setdefault(folder.title, folder)
+
+    missing = [
+        Folder(user=user, title=title) for title in titles if title not in folders
+    ]
+    folders.update(
+        (folder.title, folder) for folder in Folder.objects.bulk_create(missing)
+    )
+    return folders
+
+
+def get_or_create_tags(titles: set) -> dict:
+    """
+    Return tags with `titles`, keyed by title. Missing tags are created.
+    """
+    tags = {}
+    for tag in Tag.objects.filter(title__in=titles).order_by("pk"):
+        tags.setdefault(tag.title, tag)
+
+    missing = [Tag(title=title) for title in titles if title not in tags]
+    tags.update((tag.title, tag) for tag in Tag.objects.bulk_create(missing))
+    return tags
@@ -0,0 +1,141 @@
+"""
+Lightweight read path of `BookmarkListView`, rendering the same data as `BookmarkListSerializer` without DRF fields.
+
+For big libraries, most of the serializer's time goes to field machinery: every field of every nested serializer
+looks up its attribute and converts the value for every bookmark. Here bookmarks are fetched as `.values()` rows
+with folder and download columns joined in, tags of all bookmarks are fetched with one more query into a lookup
+by bookmark id, and plain dicts are built from those - only datetimes and file URLs need converting.
+Each folder's dict is built once and shared by all its bookmarks.
+
+The output must stay identical to `BookmarkListSerializer(...).data`, `ListingTest` compares rendered responses
+byte by byte - mirror any change of the serializer's fields here.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db.models import QuerySet
+from rest_framework import serializers
+
+from downloads.models import Download
+
+from .models import Bookmark
+
+BOOKMARK_COLUMNS = (
+    "id",
+    "user_id",
+    "url",
+    "title",
+    "description",
+    "image_url",
+    "folder_id",
+    "is_favorite",
+    "is_read",
+    "is_archived",
+    "metadata_status",
+    "created",
+    "updated",
+)
+FOLDER_COLUMNS = ("folder__user_id", "folder__title")
+DOWNLOAD_COLUMNS = (
+    "download__id",
+    "download__title",
+    "download__status",
+    "download__file",
+    "download__file_size",
+    "download__created",
+    "download__updated",
+)
+
+download_file_storage = Download._meta.get_field("file").storage
+
+
+def get_datetime_field() -> serializers.DateTimeField:
+    """
+    Return a field formatting datetimes exactly as serializers do. The current time zone is looked up once here -
+    looking it up for every value takes most of the formatting time.
+    """
+    return serializers.DateTimeField(
+        default_timezone=serializers.DateTimeField().default_timezone()
+    )
+
+
+def get_bookmark_rows(bookmarks: QuerySet) -> QuerySet:
+    """
+    Return `bookmarks` as `.values()` rows with all columns `serialize_bookmarks()` needs.
+    """
+    return bookmarks.values(*BOOKMARK_COLUMNS, *FOLDER_COLUMNS, *DOWNLOAD_COLUMNS)
+
+
+def get_tags_by_bookmark(bookmark_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    """
+    Return lists of tags of bookmarks with `bookmark_ids`, by bookmark id. Tags are ordered by title and id,
+    like in `BookmarkQuerySet.with_related()` prefetch.
+    """
+    tags = defaultdict(list)
+    for bookmark_id, tag_id, title in (
+        Bookmark.tags.through.objects.filter(bookmark_id__in=bookmark_ids)
+        .order_by("tag__title", "tag_id")
+        .values_list("bookmark_id", "tag_id", "tag__title")
+    ):
+        tags[bookmark_id].append({"id": tag_id, "title": title})
+    return tags
+
+
+def serialize_download(
+    row: Dict[str, Any], datetime_field: serializers.DateTimeField
+) -> Optional[dict]:
+    """
+    Return representation of the download joined to bookmark `row`, as `DownloadSerializer` does.
+    """
+    if row["download__id"] is None:
+        return None
+    file = row["download__file"]
+    return {
+        "id": row["download__id"],
+        "title": row["download__title"],
+        "status": row["download__status"],
+        "file": download_file_storage.url(file) if file else None,
+        "file_size": row["download__file_size"],
+        "created": datetime_field.to_representation(row["download__created"]),
+        "updated": datetime_field.to_representation(row["download__updated"]),
+    }
+
+
+def serialize_bookmarks(rows: Iterable[Dict[str, Any]]) -> List[dict]:
+    """
+    Return representation of bookmark `rows` from `get_bookmark_rows()`, as `BookmarkListSerializer` does.
+    """
+    rows = list(rows)
+    tags_by_bookmark = get_tags_by_bookmark([row["id"] for row in rows])
+    folders: Dict[Optional[int], Optional[dict]] = {None: None}
+    datetime_field = get_datetime_field()
+
+    data = []
+    for row in rows:
+        folder_id = row["folder_id"]
+        if folder_id not in folders:
+            folders[folder_id] = {
+                "id": folder_id,
+                "user": row["folder__user_id"],
+                "title": row["folder__title"],
+            }
+        data.append(
+            {
+                "id": row["id"],
+                "user": row["user_id"],
+                "url": row["url"],
+                "title": row["title"],
+                "description": row["description"],
+                "image_url": row["image_url"],
+                "folder": folders[folder_id],
+                "tags": tags_by_bookmark.get(row["id"], []),
+                "download": serialize_download(row, datetime_field),
+                "is_favorite": row["is_favorite"],
+                "is_read": row["is_read"],
+                "is_archived": row["is_archived"],
+                "metadata_status": row["metadata_status"],
+                "created": datetime_field.to_representation(row["created"]),
+                "updated": datetime_field.to_representation(row["updated"]),
+            }
+        )
+    return data
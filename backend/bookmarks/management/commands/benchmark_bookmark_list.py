@@ -0,0 +1,140 @@
+import random
+import time
+from statistics import median
+from typing import Callable, List
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from bookmarks.listing import get_bookmark_rows, serialize_bookmarks
+from bookmarks.models import Bookmark, Folder, Tag
+from bookmarks.renderers import ORJSONRenderer
+from bookmarks.serializers import BookmarkListSerializer
+from downloads.models import Download
+
+SEED_BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    """
+    Compare serializing and rendering the full bookmark list of a user with `BookmarkListSerializer` and DRF's
+    `JSONRenderer` (the slow path) against `listing.serialize_bookmarks()` and `ORJSONRenderer` (the fast path),
+    for libraries of several sizes. Both paths are checked to render the same bytes.
+
+    Each library is seeded in a transaction, which is rolled back: seeded data is not kept.
+
+    Usage: python -m manage benchmark_bookmark_list --sizes 1000 10000 50000 --repeat 5
+    """
+
+    help = "Benchmark serializing and rendering bookmark list with DRF and with the fast path."
+
+    def add_arguments(self, parser):
+        """
+        Add command line arguments.
+        """
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1000, 10000, 50000]
+        )
+        parser.add_argument("--folders", type=int, default=20)
+        parser.add_argument("--tags", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):  # noqa: max-complexity: 5
+        """
+        Seed a library of each size, measure both paths and print the timings.
+        """
+        self.stdout.write(
+            f"{'bookmarks':>10}{'DRF, ms':>12}{'fast, ms':>12}{'speedup':>10}{'size, KB':>10}"
+        )
+        for size in options["sizes"]:
+            with transaction.atomic():
+                user = self.seed(size, options)
+                bookmarks = Bookmark.objects.filter(user_id__exact=user.pk)
+
+                def slow():
+                    return JSONRenderer().render(
+                        BookmarkListSerializer(bookmarks.with_related(), many=True).data
+                    )
+
+                def fast():
+                    return ORJSONRenderer().render(
+                        serialize_bookmarks(get_bookmark_rows(bookmarks))
+                    )
+
+                content = slow()
+                if fast() != content:
+                    raise CommandError("Fast path output differs from DRF one")
+                slow_timing = self.measure(slow, options["repeat"])
+                fast_timing = self.measure(fast, options["repeat"])
+                self.stdout.write(
+                    f"{size:>10}{slow_timing * 1000:>12.1f}{fast_timing * 1000:>12.1f}"
+                    f"{slow_timing / fast_timing:>9.1f}x{len(content) / 1024:>10.0f}"
+                )
+                transaction.set_rollback(True)
+
+    @staticmethod
+    def seed(size: int, options: dict):  # noqa: max-complexity: 5
+        """
+        Create a user with `size` bookmarks, put into random folders, marked with random tags, every tenth with
+        a download.
+        """
+        user = get_user_model().objects.create(username="benchmark_bookmark_list")
+        folders = Folder.objects.bulk_create(
+            Folder(user=user, title=f"Folder {number}")
+            for number in range(options["folders"])
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(title=f"tag{number}") for number in range(options["tags"])
+        )
+        bookmarks = Bookmark.objects.bulk_create(
+            (
+                Bookmark(
+                    user=user,
+                    url=f"https://example.com/{number}/",
+                    title=f"Bookmark {number}",
+                    description="Description of the bookmarked page. " * 3,
+                    image_url=f"https://example.com/{number}.png",
+                    folder=random.choice(folders + [None]),
+                    is_favorite=random.random() < 0.1,
+                    is_read=random.random() < 0.5,
+                )
+                for number in range(size)
+            ),
+            batch_size=SEED_BATCH_SIZE,
+        )
+        Bookmark.tags.through.objects.bulk_create(
+            (
+                Bookmark.tags.through(bookmark_id=bookmark.pk, tag_id=tag.pk)
+                for bookmark in bookmarks
+                for tag in random.sample(tags, random.randint(0, 3))
+            ),
+            batch_size=SEED_BATCH_SIZE,
+        )
+        Download.objects.bulk_create(
+            (
+                Download(
+                    bookmark=bookmark,
+                    title=bookmark.title,
+                    status=Download.Status.COMPLETED,
+                    file=f"downloads/{bookmark.pk}.mp4",
+                    file_size=1024,
+                )
+                for bookmark in bookmarks[::10]
+            ),
+            batch_size=SEED_BATCH_SIZE,
+        )
+        return user
+
+    @staticmethod
+    def measure(function: Callable, repeat: int) -> float:
+        """
+        Return median run time of `function`, seconds.
+        """
+        timings: List[float] = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return median(timings)
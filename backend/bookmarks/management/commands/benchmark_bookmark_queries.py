@@ -0,0 +1,224 @@
+import random
+import time
+from datetime import timedelta
+from statistics import median
+from typing import Callable, Dict, List
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, QuerySet
+from django.utils import timezone
+
+from bookmarks.models import Bookmark, Folder
+from bookmarks.pagination import BOOKMARK_KEYSET_ORDERING
+from downloads.models import Download
+
+SEED_BATCH_SIZE = 10000
+INDEXED_MODELS = [get_user_model(), Bookmark, Download]
+
+
+class Command(BaseCommand):
+    """
+    Seed the database with bookmarks and compare plans and timings of the hot queries without and with indexes
+    declared in `Meta.indexes` of `CustomUser`, `Bookmark` and `Download`.
+
+    Everything runs in one transaction, which is rolled back at the end: seeded data and index changes are not kept.
+    Still, run it against a scratch database - seeding 1M bookmarks takes a while and locks the tables.
+    On SQLite, plans are reported by `EXPLAIN QUERY PLAN`.
+
+    Usage: python -m manage benchmark_bookmark_queries --bookmarks 1000000 --users 1000 --repeat 5
+    """
+
+    help = "Benchmark hot bookmark queries on seeded data without and with indexes."
+
+    def add_arguments(self, parser):
+        """
+        Add command line arguments.
+        """
+        parser.add_argument("--bookmarks", type=int, default=1000000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--folders-per-user", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """
+        Seed data, run queries without indexes, create indexes, run queries again, roll everything back.
+        """
+        with transaction.atomic():
+            started = time.perf_counter()
+            user = self.seed(options)
+            self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f} s")
+
+            queries = self.get_queries(user)
+            self.drop_indexes()
+            before = self.run_queries(queries, options["repeat"])
+            self.create_indexes()
+            after = self.run_queries(queries, options["repeat"])
+            self.report(before, after)
+
+            transaction.set_rollback(True)
+
+    def seed(self, options: dict):  # noqa: max-complexity: 4
+        """
+        Create users with folders, bookmarks with random flags and dates, and downloads. Return a user with
+        an average number of bookmarks to run queries for.
+        """
+        users = get_user_model().objects.bulk_create(
+            [
+                get_user_model()(
+                    username=f"benchmark_{number}", telegram_id=str(10**9 + number)
+                )
+                for number in range(options["users"])
+            ],
+            batch_size=SEED_BATCH_SIZE,
+        )
+        folders = Folder.objects.bulk_create(
+            [
+                Folder(user=user, title=f"Folder {number}")
+                for user in users
+                for number in range(options["folders_per_user"])
+            ],
+            batch_size=SEED_BATCH_SIZE,
+        )
+        folders_by_user = {}
+        for folder in folders:
+            folders_by_user.setdefault(folder.user_id, []).append(folder)
+
+        now = timezone.now()
+        for start in range(0, options["bookmarks"], SEED_BATCH_SIZE):
+            end = min(start + SEED_BATCH_SIZE, options["bookmarks"])
+            bookmarks = []
+            for number in range(start, end):
+                user = random.choice(users)
+                bookmarks.append(
+                    Bookmark(
+                        user=user,
+                        url=f"https://example.com/{number}/",
+                        title=f"Bookmark {number}",
+                        folder=random.choice(folders_by_user.get(user.pk) or [None]),
+                        is_favorite=random.random() < 0.1,
+                        is_read=random.random() < 0.5,
+                        is_archived=random.random() < 0.2,
+                    )
+                )
+            Bookmark.objects.bulk_create(bookmarks)
+            # `created` is set with `auto_now_add`, spread batches over a year:
+            Bookmark.objects.filter(
+                pk__gte=bookmarks[0].pk, pk__lte=bookmarks[-1].pk
+            ).update(created=now - timedelta(days=random.randrange(365)))
+            Download.objects.bulk_create(
+                Download(status=random.choice(Download.Status.values))
+                for _ in range((end - start) // 100)
+            )
+
+        return users[len(users) // 2]
+
+    @staticmethod
+    def get_queries(user) -> Dict[str, QuerySet]:
+        """
+        Return hot queries of the API, run for `user`.
+        """
+        folder = Folder.objects.filter(user=user).first()
+        return {
+            "bookmark list": Bookmark.objects.filter(user_id__exact=user.pk),
+            "bookmark list page": Bookmark.objects.filter(
+                user_id__exact=user.pk
+            ).order_by(*BOOKMARK_KEYSET_ORDERING)[:50],
+            "folder counts of user": Bookmark.objects.filter(
+                user_id=user.pk, is_archived=False
+            )
+            .order_by()
+            .values_list("folder_id")
+            .annotate(qty=Count("pk")),
+            "count of folder": Bookmark.objects.filter(
+                folder_id=folder.pk if folder else None, is_archived=False
+            )
+            .order_by()
+            .values("folder_id")
+            .annotate(qty=Count("pk")),
+            "user by telegram id": get_user_model().objects.filter(
+                telegram_id=user.telegram_id
+            ),
+            "pending downloads": Download.objects.filter(
+                status=Download.Status.PENDING
+            ).order_by()[:100],
+        }
+
+    def run_queries(self, queries: Dict[str, QuerySet], repeat: int) -> dict:
+        """
+        Return plan and median run time (seconds) of each query.
+        """
+        return {
+            name: (
+                queryset.explain(),
+                self.measure(lambda: list(queryset.all()), repeat),
+            )
+            for name, queryset in queries.items()
+        }
+
+    @staticmethod
+    def measure(function: Callable, repeat: int) -> float:
+        """
+        Return median run time of `function`, seconds.
+        """
+        timings: List[float] = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return median(timings)
+
+    @staticmethod
+    def get_indexes():
+        """
+        Yield models and their indexes being benchmarked.
+        """
+        for model in INDEXED_MODELS:
+            for index in model._meta.indexes:
+                yield model, index
+
+    def drop_indexes(self):
+        """
+        Drop benchmarked indexes, so queries run as if they didn't exist. SQL is executed directly, as SQLite
+        schema editor can't be used inside a transaction.
+        """
+        schema_editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model, index in self.get_indexes():
+                cursor.execute(str(index.remove_sql(model, schema_editor)))
+        self.analyze()
+
+    def create_indexes(self):
+        """
+        Create benchmarked indexes again.
+        """
+        schema_editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model, index in self.get_indexes():
+                cursor.execute(str(index.create_sql(model, schema_editor)))
+        self.analyze()
+
+    @staticmethod
+    def analyze():
+        """
+        Update planner statistics.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def report(self, before: dict, after: dict):
+        """
+        Print timings and plans of queries without and with indexes.
+        """
+        self.stdout.write(f"\n{'query':<28}{'before, ms':>12}{'after, ms':>12}")
+        for name, (_, timing) in before.items():
+            self.stdout.write(
+                f"{name:<28}{timing * 1000:>12.2f}{after[name][1] * 1000:>12.2f}"
+            )
+
+        for name in before:
+            self.stdout.write(f"\n{name}\n  before:")
+            self.stdout.write("    " + before[name][0].replace("\n", "\n    "))
+            self.stdout.write("  after:")
+            self.stdout.write("    " + after[name][0].replace("\n", "\n    "))
@@ -0,0 +1,112 @@
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+
+from bookmarks.utils import CHUNK_SIZE, extract_head_metadata
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / "tests" / "fixtures" / "html"
+
+
+def legacy_parse_html_info(content: bytes) -> List[str]:
+    """
+    Previous implementation of `parse_url_info()` parsing: whole page is parsed with BeautifulSoup.
+    """
+    html = BeautifulSoup(content, "html.parser")
+
+    title = html.title.string if html.title else "Unknown Title"
+    description = html.find("meta", property="og:description")
+    image_url = html.find("meta", property="og:image")
+
+    return [
+        title if title else "No title set",
+        description["content"] if description else "",
+        image_url["content"] if image_url else "",
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Compare streaming head-only metadata parser with the previous BeautifulSoup-based one on saved HTML pages.
+
+    Each fixture from `bookmarks/tests/fixtures/html` is padded with `--body-kb` kilobytes of body content
+    to resemble real-world pages. The streaming parser is fed with `CHUNK_SIZE` chunks, as it is when pages
+    are downloaded, and the number of bytes it actually consumed is reported. Results may legitimately differ
+    when the old parser picks up tags from the body (see `no_title.html`).
+
+    Usage: python -m manage benchmark_metadata_parser --body-kb 2048 --repeat 5
+    """
+
+    help = (
+        "Benchmark streaming HTML metadata parser against the BeautifulSoup-based one."
+    )
+
+    def add_arguments(self, parser):
+        """
+        Add command line arguments.
+        """
+        parser.add_argument("--body-kb", type=int, default=1024)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """
+        Run both parsers on every fixture and print timings.
+        """
+        padding = b"<p>" + b"Lorem ipsum dolor sit amet. " * 36 + b"</p>\n"
+        padding *= max(options["body_kb"] * 1024 // len(padding), 1)
+
+        self.stdout.write(
+            f"{'fixture':<28}{'size, KB':>10}{'legacy, ms':>12}{'stream, ms':>12}{'read, KB':>10}  same"
+        )
+        for path in sorted(FIXTURES_DIR.glob("*.html")):
+            content = path.read_bytes()
+            if b"</body>" in content:
+                content = content.replace(b"</body>", padding + b"</body>", 1)
+            else:
+                content += padding
+            consumed = []
+
+            legacy_time = self.measure(
+                lambda: legacy_parse_html_info(content), options["repeat"]
+            )
+            stream_time = self.measure(
+                lambda: extract_head_metadata(self.iter_chunks(content, consumed)),
+                options["repeat"],
+            )
+            same = self.normalize(legacy_parse_html_info(content)) == self.normalize(
+                extract_head_metadata(self.iter_chunks(content, []))
+            )
+
+            self.stdout.write(
+                f"{path.name:<28}{len(content) / 1024:>10.0f}{legacy_time * 1000:>12.2f}"
+                f"{stream_time * 1000:>12.2f}{sum(consumed) / options['repeat'] / 1024:>10.0f}  {same}"
+            )
+
+    @staticmethod
+    def measure(function: Callable, repeat: int) -> float:
+        """
+        Return average run time of `function`, seconds.
+        """
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return (time.perf_counter() - started) / repeat
+
+    @staticmethod
+    def iter_chunks(content: bytes, consumed: list):
+        """
+        Yield `content` in `CHUNK_SIZE` chunks, as `requests.Response.iter_content()` does, recording their sizes.
+        """
+        for start in range(0, len(content), CHUNK_SIZE):
+            end = start + CHUNK_SIZE
+            consumed.append(len(content[start:end]))
+            yield content[start:end]
+
+    @staticmethod
+    def normalize(info: List[str]) -> List[str]:
+        """
+        Collapse whitespace - the streaming parser strips it from titles.
+        """
+        return [" ".join((value or "").split()) for value in info]
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookmarks.search import (
+    install_search_index,
+    is_search_supported,
+    rebuild_search_index,
+)
+
+
+class Command(BaseCommand):
+    """
+    Rebuild full-text search index of bookmarks from scratch.
+    The index is kept in sync by SQL triggers, so rebuild is only needed if they were missing while bookmarks were
+    changed, e.g. after restoring the database from a dump made without them.
+
+    Usage: python -m manage rebuild_search_index
+    """
+
+    help = "Rebuild full-text search index of bookmarks."
+
+    def handle(self, *args, **options):
+        """
+        Make sure the index and triggers exist, and refill the index.
+        """
+        if not is_search_supported():
+            raise CommandError("Search is not supported by the database.")
+
+        install_search_index()
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS("Rebuilt search index."))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookmarks.counters import find_stale_tag_stats, rebuild_tag_stats
+
+
+class Command(BaseCommand):
+    """
+    Check or rebuild per-user tag statistics (`UserTagStat`) used by the tag list.
+    Statistics are maintained on every change of bookmark tags, so rebuild is only needed after changing tag
+    links bypassing `counters` module, e.g. with raw SQL.
+
+    Usage: python -m manage rebuild_tag_stats [--check] [--user ID ...]
+    """
+
+    help = "Check or rebuild per-user tag statistics."
+
+    def add_arguments(self, parser):
+        """
+        Add command line arguments.
+        """
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report stale statistics, exit with error if there are any.",
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            nargs="+",
+            dest="user_ids",
+            help="Limit to users with these ids.",
+        )
+
+    def handle(self, *args, **options):  # noqa: max-complexity: 4
+        """
+        Report stale statistics, or rebuild them.
+        """
+        if options["check"]:
+            stale = find_stale_tag_stats(options["user_ids"])
+            for (user_id, tag_id), (stored, actual) in sorted(stale.items()):
+                self.stdout.write(
+                    f"User #{user_id}, tag #{tag_id}: bookmarks_qty={stored}, actual={actual}"
+                )
+            if stale:
+                raise CommandError(f"{len(stale)} tag statistics row(s) are stale.")
+            self.stdout.write("All tag statistics are correct.")
+            return
+
+        created = rebuild_tag_stats(options["user_ids"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt tag statistics: {created} row(s).")
+        )
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookmarks.counters import find_stale_folders, repair_folder_counters
+
+
+class Command(BaseCommand):
+    """
+    Recompute `Folder.bookmarks_qty` counters which differ from the actual number of non-archived bookmarks.
+    Counters are maintained on every change of bookmarks, so this is only needed after changing bookmarks
+    bypassing `counters` module, e.g. with raw SQL.
+
+    Usage: python -m manage repair_folder_counters [--check]
+    """
+
+    help = "Recompute folder bookmark counters that have drifted."
+
+    def add_arguments(self, parser):
+        """
+        Add command line arguments.
+        """
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report stale counters, exit with error if there are any.",
+        )
+
+    def handle(self, *args, **options):  # noqa: max-complexity: 4
+        """
+        Report or repair stale counters.
+        """
+        if options["check"]:
+            stale = list(
+                find_stale_folders().values_list(
+                    "pk", "bookmarks_qty", "actual_bookmarks_qty"
+                )
+            )
+            for pk, bookmarks_qty, actual_bookmarks_qty in stale:
+                self.stdout.write(
+                    f"Folder #{pk}: bookmarks_qty={bookmarks_qty}, actual={actual_bookmarks_qty}"
+                )
+            if stale:
+                raise CommandError(f"{len(stale)} folder counter(s) are stale.")
+            self.stdout.write("All folder counters are correct.")
+            return
+
+        repaired = repair_folder_counters()
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} folder counter(s)."))
@@ -0,0 +1,195 @@
+"""
+Shared cache of bookmarked pages metadata (title, description, image), stored in Redis and keyed by canonical URL.
+
+Popular URLs are bookmarked by many users, so we fetch and parse each page once and then serve its metadata from
+Redis while it is fresh according to page's `Cache-Control`/`Expires` headers. Stale entries are kept a while longer
+to be revalidated with conditional GET (`If-None-Match`/`If-Modified-Since`), so unchanged pages are not
+downloaded and parsed again.
+"""
+import hashlib
+import json
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from django_project.spawn_redis import redis
+
+from .utils import extract_response_metadata
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_openstat",
+}
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Return canonical form of `url` used as the cache key: lowercase scheme and host, no default port, no fragment,
+    no tracking query params, remaining params sorted, no trailing slash in the path (except the root).
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc += f":{parts.port}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(key)
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def is_tracking_param(name: str) -> bool:
+    """
+    Return True if query param `name` is only used to track visitors and doesn't affect page contents.
+    """
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def get_cache_key(url: str) -> str:
+    """
+    Return Redis key for metadata of the page at `url`.
+    """
+    digest = hashlib.sha1(canonicalize_url(url).encode("utf-8")).hexdigest()
+    return f"url_metadata:{digest}"
+
+
+def get_freshness_lifetime(headers) -> Optional[int]:  # noqa: max-complexity: 7
+    """
+    Return number of seconds the response with `headers` may be served from cache without revalidation,
+    or None if it must not be cached at all (`no-store` or `private`).
+    Reference: https://httpwg.org/specs/rfc9111.html#calculating.freshness.lifetime
+    """
+    directives = {}
+    for directive in headers.get("Cache-Control", "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name] = value.strip('"')
+
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name, "").isdigit():
+            return min(int(directives[name]), settings.URL_METADATA_CACHE_MAX_TTL)
+
+    if "Expires" in headers:
+        try:
+            expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            return 0
+        return min(
+            max(int(expires - time.time()), 0), settings.URL_METADATA_CACHE_MAX_TTL
+        )
+
+    return settings.URL_METADATA_CACHE_TTL
+
+
+def get_url_info(url: str, timeout: float = 10) -> List[str]:  # noqa: max-complexity: 5
+    """
+    Return title, description and image URL of the page at `url`, same as `utils.parse_url_info()`, but
+    served from the shared Redis cache when possible.
+
+    - fresh cache entry: returned without any HTTP requests;
+    - stale entry with validators: page is revalidated with conditional GET, `304 Not Modified` only extends entry's
+      lifetime;
+    - otherwise: page is fetched and parsed, successful responses are cached.
+
+    Cache is best-effort: if Redis is unavailable, the page is simply fetched.
+    Raise `requests.RequestException` if the page can't be fetched within `timeout` seconds.
+    """
+    key = get_cache_key(url)
+    entry = read_entry(key)
+
+    if entry and entry["fresh_until"] > time.time():
+        return entry["info"]
+
+    with requests.get(
+        url, headers=get_conditional_headers(entry), timeout=timeout, stream=True
+    ) as response:
+        if entry and response.status_code == requests.codes.not_modified:
+            write_entry(key, entry["info"], response.headers, entry)
+            return entry["info"]
+
+        info = extract_response_metadata(response)
+
+    if response.status_code == requests.codes.ok:
+        write_entry(key, info, response.headers)
+    return info
+
+
+def get_conditional_headers(entry: Optional[dict]) -> dict:
+    """
+    Return headers to revalidate cached `entry` with conditional GET.
+    """
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def read_entry(key: str) -> Optional[dict]:
+    """
+    Return cache entry stored under `key`, or None.
+    """
+    try:
+        value = redis.get(key)
+    except RedisError as e:
+        logger.warning(f"URL metadata cache is unavailable: {e}")
+        return None
+    return json.loads(value) if value else None
+
+
+def write_entry(  # noqa: max-complexity: 4
+    key: str, info: List[str], headers, previous: Optional[dict] = None
+) -> None:
+    """
+    Store page `info` under `key`, with lifetime and validators taken from response `headers`.
+    Validators of `previous` entry are kept if `304 Not Modified` response didn't repeat them.
+    """
+    lifetime = get_freshness_lifetime(headers)
+    if lifetime is None:
+        return
+
+    previous = previous or {}
+    entry = {
+        "info": info,
+        "etag": headers.get("ETag", previous.get("etag")),
+        "last_modified": headers.get("Last-Modified", previous.get("last_modified")),
+        "fresh_until": time.time() + lifetime,
+    }
+    if not lifetime and not entry["etag"] and not entry["last_modified"]:
+        # Would be stale right away, and can't be revalidated
+        return
+
+    try:
+        # Keep stale entries a while longer, so they can be revalidated:
+        redis.set(
+            key, json.dumps(entry), ex=lifetime + settings.URL_METADATA_CACHE_STALE_TTL
+        )
+    except RedisError as e:
+        logger.warning(f"URL metadata cache is unavailable: {e}")
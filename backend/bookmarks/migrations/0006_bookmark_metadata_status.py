@@ -0,0 +1,22 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0005_alter_bookmark_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookmark",
+            name="metadata_status",
+            field=models.CharField(
+                choices=[("PG", "Pending"), ("CD", "Completed"), ("FD", "Failed")],
+                default="CD",
+                max_length=2,
+                verbose_name="metadata status",
+            ),
+        ),
+    ]
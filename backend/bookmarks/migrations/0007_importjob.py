@@ -0,0 +1,95 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("bookmarks", "0006_bookmark_metadata_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file", models.FileField(upload_to="imports/", verbose_name="file")),
+                (
+                    "file_format",
+                    models.CharField(
+                        choices=[("HT", "Netscape bookmark file"), ("JS", "JSON")],
+                        default="HT",
+                        max_length=2,
+                        verbose_name="file format",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PG", "Pending"),
+                            ("PR", "Processing"),
+                            ("CD", "Completed"),
+                            ("FD", "Failed"),
+                        ],
+                        default="PG",
+                        max_length=2,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "bytes_total",
+                    models.BigIntegerField(default=0, verbose_name="file size, bytes"),
+                ),
+                (
+                    "bytes_processed",
+                    models.BigIntegerField(default=0, verbose_name="processed, bytes"),
+                ),
+                (
+                    "bookmarks_created",
+                    models.IntegerField(default=0, verbose_name="bookmarks created"),
+                ),
+                (
+                    "bookmarks_skipped",
+                    models.IntegerField(default=0, verbose_name="bookmarks skipped"),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, default="", verbose_name="error"),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created"),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="updated"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="import_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "import job",
+                "verbose_name_plural": "import jobs",
+                "ordering": ["-created"],
+            },
+        ),
+    ]
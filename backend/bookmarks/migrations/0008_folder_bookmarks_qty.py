@@ -0,0 +1,41 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:19
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_folder_bookmarks(apps, schema_editor):
+    """
+    Fill `bookmarks_qty` of existing folders with number of their non-archived bookmarks.
+    """
+    Bookmark = apps.get_model("bookmarks", "Bookmark")
+    Folder = apps.get_model("bookmarks", "Folder")
+
+    bookmarks_qty = (
+        Bookmark.objects.filter(folder_id=OuterRef("pk"), is_archived=False)
+        .order_by()
+        .values("folder_id")
+        .annotate(qty=Count("pk"))
+        .values("qty")
+    )
+    Folder.objects.update(
+        bookmarks_qty=Coalesce(Subquery(bookmarks_qty, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0007_importjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="folder",
+            name="bookmarks_qty",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="bookmarks quantity"
+            ),
+        ),
+        migrations.RunPython(count_folder_bookmarks, migrations.RunPython.noop),
+    ]
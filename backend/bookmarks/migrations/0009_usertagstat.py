@@ -0,0 +1,86 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_user_tags(apps, schema_editor):
+    """
+    Fill statistics from existing bookmark-tag links.
+    """
+    Bookmark = apps.get_model("bookmarks", "Bookmark")
+    UserTagStat = apps.get_model("bookmarks", "UserTagStat")
+
+    links = (
+        Bookmark.tags.through.objects.order_by()
+        .values_list("bookmark__user_id", "tag_id")
+        .annotate(qty=Count("pk"))
+    )
+    UserTagStat.objects.bulk_create(
+        [
+            UserTagStat(user_id=user_id, tag_id=tag_id, bookmarks_qty=qty)
+            for user_id, tag_id, qty in links
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("bookmarks", "0008_folder_bookmarks_qty"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserTagStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bookmarks_qty",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="bookmarks quantity"
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="user_stats",
+                        to="bookmarks.tag",
+                        verbose_name="tag",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tag_stats",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "user tag statistics",
+                "verbose_name_plural": "user tag statistics",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="usertagstat",
+            constraint=models.UniqueConstraint(
+                fields=("user", "tag"), name="unique_user_tag_stat"
+            ),
+        ),
+        migrations.RunPython(count_user_tags, migrations.RunPython.noop),
+    ]
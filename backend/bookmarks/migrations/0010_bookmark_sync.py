@@ -0,0 +1,97 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_customuser_disk_quota"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("bookmarks", "0009_usertagstat"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookmarkTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bookmark_id", models.BigIntegerField(verbose_name="bookmark id")),
+                (
+                    "change_seq",
+                    models.BigIntegerField(verbose_name="change sequence number"),
+                ),
+                (
+                    "deleted",
+                    models.DateTimeField(auto_now_add=True, verbose_name="deleted"),
+                ),
+            ],
+            options={
+                "verbose_name": "bookmark tombstone",
+                "verbose_name_plural": "bookmark tombstones",
+            },
+        ),
+        migrations.CreateModel(
+            name="ChangeSequence",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="change_sequence",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0, verbose_name="value")),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="updated"),
+                ),
+            ],
+            options={
+                "verbose_name": "change sequence",
+                "verbose_name_plural": "change sequences",
+            },
+        ),
+        migrations.AddField(
+            model_name="bookmark",
+            name="change_seq",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="change sequence number"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                fields=["user", "change_seq"], name="bookmark_user_change_seq_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="bookmarktombstone",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="bookmark_tombstones",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="user",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookmarktombstone",
+            index=models.Index(
+                fields=["user", "change_seq"], name="tombstone_user_change_seq_idx"
+            ),
+        ),
+    ]
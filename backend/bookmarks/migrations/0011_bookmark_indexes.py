@@ -0,0 +1,32 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0010_bookmark_sync"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                fields=[
+                    "user",
+                    "is_archived",
+                    "-is_favorite",
+                    "is_read",
+                    "-created",
+                    "id",
+                ],
+                name="bookmark_user_list_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                fields=["folder", "is_archived"], name="bookmark_folder_archived_idx"
+            ),
+        ),
+    ]
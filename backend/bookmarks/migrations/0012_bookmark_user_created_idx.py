@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0011_bookmark_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                fields=["user", "created", "id"], name="bookmark_user_created_idx"
+            ),
+        ),
+    ]
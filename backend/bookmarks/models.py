@@ -1,5 +1,7 @@
+from typing import Iterable
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
 
@@ -18,6 +20,12 @@ class Folder(models.Model):
         verbose_name=_("title"),
         max_length=64,
     )
+    # Number of non-archived bookmarks in the folder, maintained by `counters` module
+    bookmarks_qty = models.PositiveIntegerField(
+        verbose_name=_("bookmarks quantity"),
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ["title"]
@@ -27,6 +35,29 @@ class Folder(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Never write `bookmarks_qty` of existing folders: the value in memory may be outdated, while the counter
+        is only changed with relative updates in `counters` module.
+        User's collection version is incremented, and bookmarks in the updated folder are stamped with it for delta
+        sync, as their representation includes the folder.
+        """
+        from .sync import next_change_seq
+
+        adding = self._state.adding
+        if not adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "bookmarks_qty"
+            ]
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            change_seq = next_change_seq(self.user_id)
+            if not adding:
+                self.bookmarks.update(change_seq=change_seq)
+
 
 class Tag(models.Model):
     """
@@ -47,11 +78,93 @@ class Tag(models.Model):
         return self.title
 
 
+class BookmarkQuerySet(models.QuerySet):
+    """
+    Custom QuerySet for Bookmark model.
+    """
+
+    def with_related(self):
+        """
+        Join/prefetch everything `BookmarkListSerializer` and `BookmarkUpdateSerializer` need to render bookmarks,
+        so serializing N bookmarks costs a constant number of queries instead of 1 + 3N.
+        """
+        return self.select_related("folder", "download").prefetch_related(
+            models.Prefetch(
+                "tags", queryset=Tag.objects.only("id", "title").order_by("title", "id")
+            ),
+        )
+
+    def with_fieldset(  # noqa: max-complexity: 6
+        self,
+        fields: Iterable[str],
+        expand: Iterable[str] = (),
+        keep: Iterable[str] = (),
+    ):
+        """
+        Load only what `BookmarkListSerializer` needs to render a sparse fieldset of `fields`, with `expand`ed nested
+        objects and others collapsed to ids (see `SparseFieldsetMixin`): other columns are deferred, unused
+        relations are not joined or prefetched. `keep` fields are loaded anyway, i.e. those used for pagination.
+        """
+        only = {"id", *keep}
+        queryset = self
+        for name in fields:
+            if name == "tags":
+                tags = Tag.objects.only("id", "title" if name in expand else "id")
+                queryset = queryset.prefetch_related(
+                    models.Prefetch("tags", queryset=tags)
+                )
+            elif name == "download":
+                queryset = queryset.select_related("download")
+                only.add("download" if name in expand else "download__id")
+            elif name == "folder" and name in expand:
+                queryset = queryset.select_related("folder")
+                only.add("folder")
+            else:
+                only.add(name)
+        return queryset.only(*only)
+
+    def delete(self):
+        """
+        Delete bookmarks, adjusting folder counters and tag statistics and leaving sync tombstones for all of them
+        at once - signal receivers in `signals` module skip bookmarks deleted with `BookmarkQuerySet`.
+        """
+        from .counters import (
+            adjust_folder_counters,
+            adjust_tag_stats,
+            count_folder_bookmarks,
+            count_tag_links,
+        )
+        from .sync import create_tombstones
+
+        with transaction.atomic():
+            adjust_folder_counters(
+                count_folder_bookmarks(self.filter(is_archived=False), sign=-1)
+            )
+            links = Bookmark.tags.through.objects.filter(
+                bookmark_id__in=self.values("pk")
+            )
+            adjust_tag_stats(count_tag_links(links, sign=-1))
+            create_tombstones(self)
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Bookmark(models.Model):
     """
     Represents user-created site bookmark.
     """
 
+    class MetadataStatus(models.TextChoices):
+        """
+        Status of fetching title, description and image of the bookmarked page in background.
+        """
+
+        PENDING = "PG", _("Pending")
+        COMPLETED = "CD", _("Completed")
+        FAILED = "FD", _("Failed")
+
     user = models.ForeignKey(
         verbose_name=_("user"),
         to=get_user_model(),
@@ -100,13 +213,300 @@ class Bookmark(models.Model):
         verbose_name=_("archived"),
         default=False,
     )
+    metadata_status = models.CharField(
+        verbose_name=_("metadata status"),
+        max_length=2,
+        choices=MetadataStatus.choices,
+        default=MetadataStatus.COMPLETED,
+    )
     created = models.DateTimeField(verbose_name=_("created"), auto_now_add=True)
     updated = models.DateTimeField(verbose_name=_("updated"), auto_now=True)
+    # Value of user's `ChangeSequence` at the last change of the bookmark, see `sync` module
+    change_seq = models.BigIntegerField(
+        verbose_name=_("change sequence number"),
+        default=0,
+        editable=False,
+    )
+
+    objects = BookmarkQuerySet.as_manager()
+
+    # Folder whose `bookmarks_qty` counter includes this bookmark, as saved in DB
+    _counted_folder_id = None
 
     class Meta:
         ordering = ["user", "is_archived", "-is_favorite", "is_read", "-created"]
         verbose_name = _("bookmark")
         verbose_name_plural = _("bookmarks")
+        indexes = [
+            # List of user's bookmarks, in default and keyset pagination ordering:
+            models.Index(
+                fields=[
+                    "user",
+                    "is_archived",
+                    "-is_favorite",
+                    "is_read",
+                    "-created",
+                    "id",
+                ],
+                name="bookmark_user_list_idx",
+            ),
+            # List of user's bookmarks ordered by creation time, both ways:
+            models.Index(
+                fields=["user", "created", "id"], name="bookmark_user_created_idx"
+            ),
+            # Counts of non-archived bookmarks in folders:
+            models.Index(
+                fields=["folder", "is_archived"], name="bookmark_folder_archived_idx"
+            ),
+            models.Index(
+                fields=["user", "change_seq"], name="bookmark_user_change_seq_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember which folder counter includes the loaded bookmark, to adjust counters when it's moved or
+        (un)archived.
+        Reference: https://docs.djangoproject.com/en/4.1/ref/models/instances/#customizing-model-loading
+        """
+        from .counters import counted_folder_id
+
+        instance = super().from_db(db, field_names, values)
+        if "folder_id" in field_names and "is_archived" in field_names:
+            instance._counted_folder_id = counted_folder_id(
+                instance.folder_id, instance.is_archived
+            )
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Save the bookmark with the next change sequence number, and adjust folder counters in the same
+        transaction.
+        """
+        from .sync import next_change_seq
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "change_seq"}
+
+        with transaction.atomic():
+            self.change_seq = next_change_seq(self.user_id)
+            if update_fields is None or {"folder", "folder_id", "is_archived"} & set(
+                update_fields
+            ):
+                self.save_with_folder_counters(*args, **kwargs)
+            else:
+                super().save(*args, **kwargs)
+
+    def save_with_folder_counters(self, *args, **kwargs):
+        """
+        Save the bookmark, moving it between folder counters if its folder or archived state has changed.
+        """
+        from .counters import adjust_folder_counters, counted_folder_id
+
+        old_folder_id = self.get_counted_folder_id()
+        super().save(*args, **kwargs)
+        new_folder_id = counted_folder_id(self.folder_id, self.is_archived)
+        if new_folder_id != old_folder_id:
+            adjust_folder_counters({old_folder_id: -1, new_folder_id: 1})
+        self._counted_folder_id = new_folder_id
+
+    def get_counted_folder_id(self):
+        """
+        Return id of the folder whose counter includes the bookmark as it's saved in DB. The state is remembered
+        on load, and only queried if `folder` or `is_archived` fields were deferred.
+        """
+        from .counters import counted_folder_id
+
+        if self._state.adding or "_counted_folder_id" in self.__dict__:
+            return self._counted_folder_id
+
+        saved = (
+            Bookmark.objects.filter(pk=self.pk)
+            .values_list("folder_id", "is_archived")
+            .first()
+        )
+        return counted_folder_id(*saved) if saved else None
+
+
+class UserTagStat(models.Model):
+    """
+    Number of user's bookmarks marked with the tag - materialized for tag list, maintained by `counters` module.
+    """
+
+    user = models.ForeignKey(
+        verbose_name=_("user"),
+        to=get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="tag_stats",
+    )
+    tag = models.ForeignKey(
+        verbose_name=_("tag"),
+        to=Tag,
+        on_delete=models.CASCADE,
+        related_name="user_stats",
+    )
+    bookmarks_qty = models.PositiveIntegerField(
+        verbose_name=_("bookmarks quantity"),
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = _("user tag statistics")
+        verbose_name_plural = _("user tag statistics")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "tag"], name="unique_user_tag_stat"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.tag}: {self.bookmarks_qty}"
+
+
+class ChangeSequence(models.Model):
+    """
+    Per-user counter of changes of bookmarks, used as the watermark for delta sync - see `sync` module,
+    and as the version of user's collection for conditional requests - see `conditional` module.
+    """
+
+    user = models.OneToOneField(
+        verbose_name=_("user"),
+        to=get_user_model(),
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="change_sequence",
+    )
+    value = models.BigIntegerField(
+        verbose_name=_("value"),
+        default=0,
+    )
+    updated = models.DateTimeField(verbose_name=_("updated"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("change sequence")
+        verbose_name_plural = _("change sequences")
+
+    def __str__(self):
+        return f"{self.user}: {self.value}"
+
+
+class BookmarkTombstone(models.Model):
+    """
+    Record of deleted bookmark, so clients syncing changes can delete it from their local copies.
+    """
+
+    user = models.ForeignKey(
+        verbose_name=_("user"),
+        to=get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="bookmark_tombstones",
+    )
+    bookmark_id = models.BigIntegerField(verbose_name=_("bookmark id"))
+    change_seq = models.BigIntegerField(verbose_name=_("change sequence number"))
+    deleted = models.DateTimeField(verbose_name=_("deleted"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("bookmark tombstone")
+        verbose_name_plural = _("bookmark tombstones")
+        indexes = [
+            models.Index(
+                fields=["user", "change_seq"], name="tombstone_user_change_seq_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user}: #{self.bookmark_id}"
+
+
+class ImportJob(models.Model):
+    """
+    Represents bulk import of bookmarks from uploaded file, processed in background.
+    """
+
+    class Status(models.TextChoices):
+        """
+        Status choices for ImportJobs.
+        """
+
+        PENDING = "PG", _("Pending")
+        PROCESSING = "PR", _("Processing")
+        COMPLETED = "CD", _("Completed")
+        FAILED = "FD", _("Failed")
+
+    class FileFormat(models.TextChoices):
+        """
+        Supported formats of imported files.
+        """
+
+        HTML = "HT", _("Netscape bookmark file")
+        JSON = "JS", _("JSON")
+
+    user = models.ForeignKey(
+        verbose_name=_("user"),
+        to=get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="import_jobs",
+    )
+    file = models.FileField(
+        verbose_name=_("file"),
+        upload_to="imports/",
+    )
+    file_format = models.CharField(
+        verbose_name=_("file format"),
+        max_length=2,
+        choices=FileFormat.choices,
+        default=FileFormat.HTML,
+    )
+    status = models.CharField(
+        verbose_name=_("status"),
+        max_length=2,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    bytes_total = models.BigIntegerField(
+        verbose_name=_("file size, bytes"),
+        default=0,
+    )
+    bytes_processed = models.BigIntegerField(
+        verbose_name=_("processed, bytes"),
+        default=0,
+    )
+    bookmarks_created = models.IntegerField(
+        verbose_name=_("bookmarks created"),
+        default=0,
+    )
+    bookmarks_skipped = models.IntegerField(
+        verbose_name=_("bookmarks skipped"),
+        default=0,
+    )
+    error = models.TextField(
+        verbose_name=_("error"),
+        blank=True,
+        default="",
+    )
+    created = models.DateTimeField(verbose_name=_("created"), auto_now_add=True)
+    updated = models.DateTimeField(verbose_name=_("updated"), auto_now=True)
+
+    class Meta:
+        ordering = ["-created"]
+        verbose_name = _("import job")
+        verbose_name_plural = _("import jobs")
+
+    def __str__(self):
+        return self.file.name
+
+    @property
+    def progress(self) -> float:
+        """
+        Return percentage of the file processed so far.
+        """
+        if self.status == self.Status.COMPLETED:
+            return 100.0
+        if not self.bytes_total:
+            return 0.0
+        return round(self.bytes_processed * 100 / self.bytes_total, 1)
@@ -0,0 +1,274 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.db import models
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Ordering used to build the keyset. Same as `Bookmark.Meta.ordering` (without `user`, which is always filtered by),
+# plus unique `id` as the tie-breaker, so every bookmark has a distinct position.
+BOOKMARK_KEYSET_ORDERING = ("is_archived", "-is_favorite", "is_read", "-created", "id")
+# Orderings of `BookmarkListView` clients can choose from. Each one ends with unique `id` to be used as the keyset,
+# and is backed by an index in `Bookmark.Meta.indexes`.
+BOOKMARK_ORDERINGS = {
+    "default": BOOKMARK_KEYSET_ORDERING,
+    "created": ("created", "id"),
+    "-created": ("-created", "-id"),
+}
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Opt-in keyset (a.k.a. "seek") pagination over a multi-column ordering.
+
+    Unlike `LimitOffsetPagination`, pages are selected with a `WHERE (a, b, ...) > (...)` condition built from the
+    position of the last item on the previous page, so each page costs the same however deep the client scrolls.
+    The row comparison is run as one query per disjunct of its expansion, see `build_keyset_filters()`.
+    Cursors are opaque base64-encoded JSON blobs with the position and the direction.
+
+    Pagination is only applied when the request contains `cursor` or `page_size` query parameters, otherwise
+    `paginate_queryset()` returns None and the view should fall back to the legacy unpaginated response.
+
+    Reference: https://use-the-index-luke.com/no-offset
+    """
+
+    ordering: Sequence[str] = ("id",)
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 50
+    max_page_size = 500
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, ordering: Optional[Sequence[str]] = None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.base_url = None
+        self.has_next = False
+        self.has_previous = False
+        self.next_position = None
+        self.previous_position = None
+
+    def paginate_queryset(  # noqa: max-complexity: 6
+        self, queryset: QuerySet, request: Request, view=None
+    ) -> Optional[List[Any]]:
+        """
+        Return a page of objects, or None if the request didn't ask for pagination.
+        """
+        if not self.is_requested(request):
+            return None
+
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+        self.base_url = request.build_absolute_uri()
+
+        ordering = self.reversed_ordering() if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+
+        # Fetch one extra item to find out if there are more items past this page
+        results = self.fetch_page(queryset, position, ordering, page_size + 1)
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        if results:
+            self.previous_position = self.get_position(results[0])
+            self.next_position = self.get_position(results[-1])
+        elif position is not None:
+            # Empty page: let the client step back from where it was
+            self.previous_position = self.next_position = position
+
+        return results
+
+    def get_paginated_response(self, data) -> Response:
+        """
+        Wrap serialized page `data` with `next` and `previous` links.
+        """
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self) -> Optional[str]:
+        """
+        Return URL of the next page, or None if this is the last page.
+        """
+        if not self.has_next or self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        """
+        Return URL of the previous page, or None if this is the first page.
+        """
+        if not self.has_previous or self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def is_requested(self, request: Request) -> bool:
+        """
+        Return True if client opted in to pagination.
+        """
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_page_size(self, request: Request) -> int:
+        """
+        Return page size requested by the client, clamped to `max_page_size`.
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def reversed_ordering(self) -> Tuple[str, ...]:
+        """
+        Return `ordering` with every field direction flipped - used to walk backwards.
+        """
+        return tuple(
+            field[1:] if field.startswith("-") else "-" + field
+            for field in self.ordering
+        )
+
+    def fetch_page(  # noqa: max-complexity: 4
+        self,
+        queryset: QuerySet,
+        position: Optional[Sequence[Any]],
+        ordering: Sequence[str],
+        limit: int,
+    ) -> List[Any]:
+        """
+        Return up to `limit` items of ordered `queryset` positioned after `position`, or the first ones if it's None.
+        Disjuncts of the keyset condition are queried one by one, until the page is full.
+        """
+        if position is None:
+            return list(queryset[:limit])
+
+        results: List[Any] = []
+        for condition in self.build_keyset_filters(position, ordering):
+            results.extend(queryset.filter(condition)[: limit - len(results)])
+            if len(results) >= limit:
+                break
+        return results
+
+    @staticmethod
+    def build_keyset_filters(
+        position: Sequence[Any], ordering: Sequence[str]
+    ) -> List[Q]:
+        """
+        Build `Q`s selecting rows positioned strictly after `position` in `ordering` - disjuncts of expanded row
+        comparison, in the order of rows they select:
+        (a = a0 AND b = b0 AND c > c0), (a = a0 AND b < b0), (a > a0)
+
+        Each one is an equality prefix and a range on the next column, i.e. a single seek in the ordering's index.
+        OR-ed together they aren't: the index is only searched by `user`, and the condition is checked against every
+        row before the position, so the cost would grow with depth like OFFSET.
+        """
+        filters = []
+        equal_so_far = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            filters.append(equal_so_far & Q(**{f"{name}__{lookup}": value}))
+            # Not `name=value`: Django renders it for booleans as `WHERE NOT is_archived`, which SQLite can't seek by
+            equal_so_far &= Q(**{f"{name}__in": [value]})
+        return filters[::-1]
+
+    def get_position(self, instance) -> List[Any]:
+        """
+        Return values of ordering fields of `instance` - a model instance or a `.values()` row.
+        """
+        if isinstance(instance, dict):
+            return [instance[field.lstrip("-")] for field in self.ordering]
+        return [getattr(instance, field.lstrip("-")) for field in self.ordering]
+
+    def encode_cursor(self, position: Sequence[Any], reverse: bool) -> str:
+        """
+        Return URL with opaque cursor pointing to `position`.
+        """
+        payload = {
+            "p": [
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in position
+            ],
+            "r": int(reverse),
+        }
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode("ascii")
+        ).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(  # noqa: max-complexity: 5
+        self, request: Request, model
+    ) -> Tuple[Optional[List[Any]], bool]:
+        """
+        Return position and direction from the cursor passed by the client, or `(None, False)` for the first page.
+        Values of the position are checked against ordering fields of `model`.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            payload = json.loads(
+                base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            )
+            position = payload["p"]
+            reverse = bool(payload.get("r", 0))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError()
+            position = [
+                self.parse_value(model._meta.get_field(field.lstrip("-")), value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    @staticmethod
+    def parse_value(field: models.Field, value: Any) -> Any:  # noqa: max-complexity: 6
+        """
+        Restore position value of model `field` from JSON: ISO 8601 strings are turned back into datetimes.
+        Raise ValueError if the value has unexpected type, i.e. the cursor was tampered with.
+        """
+        if isinstance(field, models.DateTimeField):
+            parsed = parse_datetime(value) if isinstance(value, str) else None
+            if parsed is None:
+                raise ValueError()
+            return parsed
+        if isinstance(field, models.BooleanField):
+            expected_type = bool
+        elif isinstance(field, models.IntegerField):
+            expected_type = int
+        else:
+            expected_type = str
+        # `bool` is a subclass of `int`, so types are compared exactly
+        if type(value) is not expected_type:
+            raise ValueError()
+        return value
+
+
+class BookmarkCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination for `BookmarkListView`, keyed on `Bookmark.Meta.ordering`.
+    """
+
+    ordering = BOOKMARK_KEYSET_ORDERING
@@ -0,0 +1,60 @@
+import orjson
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.renderers import JSONRenderer
+
+# orjson doesn't escape these, while DRF does to keep JSON embeddable into JavaScript
+JS_ESCAPES = [(b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029")]
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` producing the same bytes several times faster with orjson, for endpoints returning big lists.
+
+    Types orjson doesn't serialize natively, and datetimes which it formats differently, are converted by DRF's
+    `encoder_class`. Falls back to the stdlib renderer for indented output (i.e. in browsable API), if ASCII-only or
+    non-compact JSON is configured in `REST_FRAMEWORK` settings, and for data orjson refuses to serialize -
+    e.g. integers wider than 64 bits or non-string dict keys.
+    """
+
+    def render(  # noqa: max-complexity: 4
+        self, data, accepted_media_type=None, renderer_context=None
+    ):
+        """
+        Render `data` into JSON, returning a bytestring.
+        """
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if data is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for character, escaped in JS_ESCAPES:
+            ret = ret.replace(character, escaped)
+        return ret
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    Content negotiation selecting the first renderer regardless of `Accept` header, for views returning
+    the response body in their own format - i.e. file exports. Errors are still rendered by the first renderer.
+    Reference: https://www.django-rest-framework.org/api-guide/content-negotiation/#example
+    """
+
+    def select_parser(self, request, parsers):
+        """
+        Select the first parser in the `.parser_classes` list.
+        """
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        """
+        Select the first renderer in the `.renderer_classes` list.
+        """
+        return renderers[0], renderers[0].media_type
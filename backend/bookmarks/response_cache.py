@@ -0,0 +1,210 @@
+"""
+Per-user cache of read endpoints' responses (rendered JSON), stored in Redis via Django's cache framework.
+
+Cache keys include the user and the user's generation - the collection version from `ChangeSequence`, which is
+incremented by every write to user's bookmarks, folders, tags, downloads and the user itself (see `sync` module).
+So writes never delete cached responses: they bump the generation, and entries of older generations are simply
+not looked up anymore and expire after `RESPONSE_CACHE_TTL`. The generation is read before the response is computed,
+so an entry never holds data older than its generation.
+
+- responses larger than `RESPONSE_CACHE_MAX_BYTES` are not cached;
+- only one request computes a missing entry (single-flight): concurrent requests for the same key wait for it
+  up to `RESPONSE_CACHE_LOCK_TIMEOUT` seconds, instead of all hitting the DB at once;
+- hits, misses and oversized responses are counted per endpoint, see `get_stats()`.
+
+Cache is best-effort: if Redis is unavailable, responses are simply computed.
+"""
+import hashlib
+import logging
+import time
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from redis.exceptions import RedisError
+
+from .conditional import get_collection_version
+
+logger = logging.getLogger(__name__)
+
+CACHED_FORMAT = "json"
+LOCK_POLL_INTERVAL = 0.05
+STATS = ("hits", "misses", "oversized")
+
+# Names of endpoints using the cache, to collect their stats
+cached_endpoints = set()
+
+
+def get_generation(request) -> int:
+    """
+    Return authenticated user's generation. `conditional_on_collection_version` has already read it, if applied.
+    """
+    generation = getattr(request, "collection_version", None)
+    if generation is None:
+        generation = get_collection_version(request.user.pk)
+    return generation
+
+
+def get_cache_key(request, generation: int) -> str:
+    """
+    Return cache key for the response to `request` of the authenticated user with `generation`.
+    Full URL is included, as paginated responses contain absolute links.
+    """
+    digest = hashlib.sha1(request.build_absolute_uri().encode("utf-8")).hexdigest()
+    return f"response:{request.user.pk}:{generation}:{digest}"
+
+
+def get_stat_key(endpoint: str, stat: str) -> str:
+    """
+    Return cache key of `endpoint`'s `stat` counter.
+    """
+    return f"response_stats:{endpoint}:{stat}"
+
+
+def read_entry(key: str) -> Optional[dict]:
+    """
+    Return cached response stored under `key`, or None.
+    """
+    try:
+        return cache.get(key)
+    except RedisError as e:
+        logger.warning(f"Response cache is unavailable: {e}")
+        return None
+
+
+def write_entry(endpoint: str, key: str, response) -> None:  # noqa: max-complexity: 4
+    """
+    Store rendered `response` under `key`, unless it's larger than `RESPONSE_CACHE_MAX_BYTES`.
+    """
+    if len(response.content) > settings.RESPONSE_CACHE_MAX_BYTES:
+        increment_stat(endpoint, "oversized")
+        return
+
+    entry = {"content": response.content, "content_type": response["Content-Type"]}
+    try:
+        cache.set(key, entry, timeout=settings.RESPONSE_CACHE_TTL)
+    except RedisError as e:
+        logger.warning(f"Response cache is unavailable: {e}")
+
+
+def acquire_lock(key: str) -> bool:
+    """
+    Try to become the only request computing the entry for `key`. If Redis is unavailable, everyone computes.
+    """
+    try:
+        return cache.add(f"{key}:lock", 1, timeout=settings.RESPONSE_CACHE_LOCK_TIMEOUT)
+    except RedisError:
+        return True
+
+
+def release_lock(key: str) -> None:
+    """
+    Release the lock acquired with `acquire_lock()`.
+    """
+    try:
+        cache.delete(f"{key}:lock")
+    except RedisError:
+        pass
+
+
+def wait_for_entry(key: str) -> Optional[dict]:
+    """
+    Wait while another request holds the lock and computes the entry for `key`, then return the entry.
+    Return None if the lock is released without the entry (i.e. the response was not cacheable) or on timeout.
+    """
+    deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = read_entry(key)
+        if entry is not None or read_entry(f"{key}:lock") is None:
+            return entry
+    return None
+
+
+def increment_stat(endpoint: str, stat: str) -> None:
+    """
+    Increment `endpoint`'s `stat` counter.
+    """
+    key = get_stat_key(endpoint, stat)
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except (RedisError, ValueError):
+        # Counters are best-effort; ValueError if the key was evicted right after `add()`
+        pass
+
+
+def get_stats() -> Dict[str, Dict[str, int]]:  # noqa: max-complexity: 4
+    """
+    Return hits, misses and oversized responses counters of each cached endpoint.
+    """
+    keys = {
+        get_stat_key(endpoint, stat): (endpoint, stat)
+        for endpoint in sorted(cached_endpoints)
+        for stat in STATS
+    }
+    stats = {endpoint: dict.fromkeys(STATS, 0) for endpoint in sorted(cached_endpoints)}
+    try:
+        values = cache.get_many(keys.keys())
+    except RedisError as e:
+        logger.warning(f"Response cache is unavailable: {e}")
+        values = {}
+
+    for key, value in values.items():
+        endpoint, stat = keys[key]
+        stats[endpoint][stat] = value
+    return stats
+
+
+def render(request, response):
+    """
+    Render DRF `response` with the renderer negotiated for `request`, so its content can be cached.
+    DRF doesn't render it again.
+    """
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = {"request": request, "response": response}
+    return response.render()
+
+
+def cache_response(endpoint: str) -> Callable:  # noqa: max-complexity: 8
+    """
+    Decorate GET handler of the view returning authenticated user's data: serve its JSON responses from the cache,
+    counting them under `endpoint` name. Other formats (i.e. browsable API) are not cached.
+    Should be applied below `conditional_on_collection_version`, which answers repeated requests by itself.
+    """
+    cached_endpoints.add(endpoint)
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.accepted_renderer.format != CACHED_FORMAT:
+                return view(request, *args, **kwargs)
+
+            key = get_cache_key(request, get_generation(request))
+            entry = read_entry(key)
+            locked = entry is None and acquire_lock(key)
+            if entry is None and not locked:
+                entry = wait_for_entry(key)
+
+            if entry is not None:
+                increment_stat(endpoint, "hits")
+                return HttpResponse(
+                    entry["content"], content_type=entry["content_type"]
+                )
+
+            increment_stat(endpoint, "misses")
+            try:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    write_entry(endpoint, key, render(request, response))
+            finally:
+                if locked:
+                    release_lock(key)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,220 @@
+"""
+Full-text search over user's bookmarks with SQLite FTS5.
+
+`bookmarks_bookmark_fts` virtual table indexes bookmark's title, description, URL and tag titles, with `rowid` equal
+to the bookmark id. It's kept in sync by SQL triggers on bookmarks, bookmark-tag links and tags, so bulk inserts and
+updates bypassing the ORM signals are indexed as well. The table and triggers are (re)created after each `migrate`
+by `install_search_index()` - SQLite drops triggers when Django rebuilds a table to alter it.
+
+Each row also has `owner` column with `u<user id>` token: queries match it along with the search terms, so FTS5
+intersects the user's doclist with the terms' ones instead of filtering out other users' matches row by row.
+Search terms are limited to the content columns, so they never match owner tokens.
+Prefix indexes of 2 and 3 characters make search-as-you-type prefix queries as fast as whole-word ones.
+Results are ranked with bm25, title and tag matches weighing more than description and URL ones.
+"""
+import re
+from html import escape
+from typing import List, Optional
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from .models import Bookmark
+
+SEARCH_MAX_RESULTS = 200
+# Columns searched for the words of the query
+CONTENT_COLUMNS = ("title", "description", "url", "tags")
+# bm25 weights of title, description, url, tags, owner columns
+BM25_WEIGHTS = (10.0, 2.0, 1.0, 5.0, 0.0)
+SNIPPET_TOKENS = 16
+# Highlight markers are control characters, replaced with `<mark>` after HTML-escaping indexed text
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"
+
+TAGS_SQL = """
+    COALESCE(
+        (
+            SELECT GROUP_CONCAT(t.title, ' ')
+            FROM bookmarks_bookmark_tags bt JOIN bookmarks_tag t ON t.id = bt.tag_id
+            WHERE bt.bookmark_id = {bookmark_id}
+        ),
+        ''
+    )
+"""
+
+CREATE_TABLE_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS bookmarks_bookmark_fts USING fts5(
+        title, description, url, tags, owner,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+"""
+
+FILL_TABLE_SQL = f"""
+    INSERT INTO bookmarks_bookmark_fts (rowid, title, description, url, tags, owner)
+    SELECT b.id, b.title, COALESCE(b.description, ''), b.url, {TAGS_SQL.format(bookmark_id="b.id")}, 'u' || b.user_id
+    FROM bookmarks_bookmark b
+"""
+
+CREATE_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS bookmarks_bookmark_fts_insert AFTER INSERT ON bookmarks_bookmark BEGIN
+        INSERT INTO bookmarks_bookmark_fts (rowid, title, description, url, tags, owner)
+        VALUES (new.id, new.title, COALESCE(new.description, ''), new.url, '', 'u' || new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookmarks_bookmark_fts_update
+    AFTER UPDATE OF title, description, url, user_id ON bookmarks_bookmark BEGIN
+        UPDATE bookmarks_bookmark_fts
+        SET title = new.title, description = COALESCE(new.description, ''), url = new.url, owner = 'u' || new.user_id
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookmarks_bookmark_fts_delete AFTER DELETE ON bookmarks_bookmark BEGIN
+        DELETE FROM bookmarks_bookmark_fts WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bookmarks_bookmark_tags_fts_insert AFTER INSERT ON bookmarks_bookmark_tags BEGIN
+        UPDATE bookmarks_bookmark_fts SET tags = {TAGS_SQL.format(bookmark_id="new.bookmark_id")}
+        WHERE rowid = new.bookmark_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bookmarks_bookmark_tags_fts_delete AFTER DELETE ON bookmarks_bookmark_tags BEGIN
+        UPDATE bookmarks_bookmark_fts SET tags = {TAGS_SQL.format(bookmark_id="old.bookmark_id")}
+        WHERE rowid = old.bookmark_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS bookmarks_tag_fts_update AFTER UPDATE OF title ON bookmarks_tag BEGIN
+        UPDATE bookmarks_bookmark_fts SET tags = {TAGS_SQL.format(bookmark_id="bookmarks_bookmark_fts.rowid")}
+        WHERE rowid IN (SELECT bookmark_id FROM bookmarks_bookmark_tags WHERE tag_id = new.id);
+    END
+    """,
+]
+
+# Snippets are taken from description, tags and URL columns, the first one with a match is returned
+SNIPPET_COLUMNS = (1, 3, 2)
+SEARCH_SQL = f"""
+    SELECT
+        rowid,
+        bm25(bookmarks_bookmark_fts, {", ".join(map(str, BM25_WEIGHTS))}) AS score,
+        highlight(bookmarks_bookmark_fts, 0, %s, %s),
+        {", ".join(
+            f"snippet(bookmarks_bookmark_fts, {column}, %s, %s, '…', {SNIPPET_TOKENS})"
+            for column in SNIPPET_COLUMNS
+        )}
+    FROM bookmarks_bookmark_fts
+    WHERE bookmarks_bookmark_fts MATCH %s
+    ORDER BY score
+    LIMIT %s
+"""
+
+
+def is_search_supported() -> bool:
+    """
+    Return True if the database supports full-text search of bookmarks.
+    """
+    return connection.vendor == "sqlite"
+
+
+def install_search_index(  # noqa: max-complexity: 4
+    using: str = DEFAULT_DB_ALIAS,
+) -> None:
+    """
+    Create the full-text index and triggers keeping it in sync in `using` database, if they don't exist.
+    The index is filled when created. Nothing is done if bookmarks table doesn't exist (migrated backwards).
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite" or (
+        Bookmark._meta.db_table not in connection.introspection.table_names()
+    ):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bookmarks_bookmark_fts'"
+        )
+        exists = cursor.fetchone() is not None
+        cursor.execute(CREATE_TABLE_SQL)
+        for sql in CREATE_TRIGGERS_SQL:
+            cursor.execute(sql)
+        if not exists:
+            cursor.execute(FILL_TABLE_SQL)
+
+
+def rebuild_search_index() -> None:
+    """
+    Refill the full-text index from scratch.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM bookmarks_bookmark_fts")
+        cursor.execute(FILL_TABLE_SQL)
+
+
+def build_match_query(user_id: int, query: str) -> Optional[str]:
+    """
+    Return FTS5 query matching all words of user's `query` in content columns of the user's bookmarks, or None if
+    there are no words.
+    Words are quoted, so FTS5 syntax in user input is searched for literally; the last word is a prefix, unless
+    the query ends with a space - for search-as-you-type.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if not query[-1].isspace():
+        terms[-1] += "*"
+    return (
+        f'owner:"u{user_id}" AND {{{" ".join(CONTENT_COLUMNS)}}}: ({" ".join(terms)})'
+    )
+
+
+def render_highlights(text: str) -> str:
+    """
+    HTML-escape indexed `text` with highlight markers, and replace markers with `<mark>` tags.
+    """
+    return (
+        escape(text)
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_END, "</mark>")
+    )
+
+
+def search_bookmarks(  # noqa: max-complexity: 4
+    user, query: str, limit: int = 50
+) -> List[Bookmark]:
+    """
+    Return `user`'s bookmarks matching `query`, best matches first. Bookmarks are annotated with `rank` (bm25 score,
+    lower is better), `title_highlight` and `snippet` - HTML with matched words wrapped in `<mark>` tags.
+    """
+    match_query = build_match_query(user.pk, query)
+    if match_query is None:
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            SEARCH_SQL,
+            [HIGHLIGHT_START, HIGHLIGHT_END] * (1 + len(SNIPPET_COLUMNS))
+            + [match_query, min(limit, SEARCH_MAX_RESULTS)],
+        )
+        matches = cursor.fetchall()
+
+    bookmarks = Bookmark.objects.filter(
+        user_id__exact=user.pk, pk__in=[bookmark_id for bookmark_id, *_ in matches]
+    ).with_related()
+    bookmarks_by_id = {bookmark.pk: bookmark for bookmark in bookmarks}
+
+    results = []
+    for bookmark_id, rank, title_highlight, *snippets in matches:
+        if bookmark := bookmarks_by_id.get(bookmark_id):
+            bookmark.rank = rank
+            bookmark.title_highlight = render_highlights(title_highlight)
+            bookmark.snippet = render_highlights(
+                next(
+                    (snippet for snippet in snippets if HIGHLIGHT_START in snippet),
+                    snippets[0],
+                )
+            )
+            results.append(bookmark)
+    return results
@@ -1,10 +1,97 @@
+from typing import List, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Count
 from rest_framework import serializers
 
 from downloads.serializers import DownloadSerializer
 from users.models import CustomUser
 from users.serializers import CustomUserTelegramIDSerializer
 
-from .models import Bookmark, Folder, Tag
+from .bulk import BULK_FLAGS, BULK_MAX_IDS, BULK_OPERATIONS
+from .counters import adjust_tag_stats
+from .importers import detect_file_format
+from .models import Bookmark, Folder, ImportJob, Tag
+from .pagination import BOOKMARK_ORDERINGS
+from .utils import placeholder_title
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin for serializers supporting sparse fieldsets. Pass `fields` - names of fields to return (`id` is always
+    returned), and/or `expand` - names of `expandable_fields` to return as nested objects. Once any of them is passed,
+    nested objects which are not expanded are collapsed to ids; without them, all fields are returned in full.
+    """
+
+    expandable_fields: Sequence[str] = ()
+
+    def __init__(  # noqa: max-complexity: 6
+        self, *args, fields=None, expand=None, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        if fields is None and expand is None:
+            return
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - {"id"}:
+                self.fields.pop(name)
+        for name in set(self.expandable_fields) - set(expand or []):
+            if name in self.fields:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True,
+                    many=isinstance(self.fields[name], serializers.ListSerializer),
+                )
+
+
+class FieldsetSerializer(serializers.Serializer):
+    """
+    Serializer for `fields` and `expand` query parameters - comma-separated field names of `serializer_class` passed
+    in the context, see `SparseFieldsetMixin`.
+    """
+
+    fields = serializers.CharField(required=False)
+    expand = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_fields(self, value) -> List[str]:
+        """
+        Check that `value` lists fields of the serializer.
+        """
+        return self.parse_names(value, self.context["serializer_class"].Meta.fields)
+
+    def validate_expand(self, value) -> List[str]:
+        """
+        Check that `value` lists expandable fields of the serializer.
+        """
+        return self.parse_names(
+            value, self.context["serializer_class"].expandable_fields
+        )
+
+    @staticmethod
+    def parse_names(value: str, allowed: Sequence[str]) -> List[str]:
+        """
+        Return names from comma-separated `value`, raise `ValidationError` if some of them are not `allowed`.
+        """
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        if unknown := [name for name in names if name not in allowed]:
+            raise serializers.ValidationError(f"Unknown fields: {', '.join(unknown)}.")
+        return names
+
+    def get_field_names(self) -> List[str]:
+        """
+        Return names of fields to return: requested ones, or all fields of the serializer.
+        """
+        return self.validated_data.get(
+            "fields", self.context["serializer_class"].Meta.fields
+        )
+
+    def get_model_field_names(self, model) -> List[str]:
+        """
+        Return names of `model` fields to load from DB for requested fields, for `QuerySet.only()`.
+        """
+        concrete = {field.name for field in model._meta.concrete_fields}
+        return ["id"] + [
+            name for name in self.get_field_names() if name in concrete and name != "id"
+        ]
 
 
 class FolderSerializer(serializers.ModelSerializer):
@@ -24,12 +111,12 @@ class FolderSerializer(serializers.ModelSerializer):
         ]
 
 
-class FolderListSerializer(serializers.ModelSerializer):
+class FolderListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
-    Serializer for Folder model with `bookmarks_qty` field - count of bookmarks in each folder.
+    Serializer for Folder model with `bookmarks_qty` field - count of non-archived bookmarks in each folder.
     """
 
-    bookmarks_qty = serializers.IntegerField()
+    bookmarks_qty = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Folder
@@ -89,7 +176,7 @@ class TagSerializer(serializers.ModelSerializer):
         ]
 
 
-class TagListSerializer(serializers.ModelSerializer):
+class TagListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Tag model with `bookmarks_qty` field - count of bookmarks with each tag.
     """
@@ -105,7 +192,7 @@ class TagListSerializer(serializers.ModelSerializer):
         ]
 
 
-class BookmarkListSerializer(serializers.ModelSerializer):
+class BookmarkListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Bookmark model - for list view.
     """
@@ -114,6 +201,8 @@ class BookmarkListSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True)
     download = DownloadSerializer(many=False)
 
+    expandable_fields = ("folder", "tags", "download")
+
     class Meta:
         model = Bookmark
         fields = [
@@ -129,11 +218,48 @@ class BookmarkListSerializer(serializers.ModelSerializer):
             "is_favorite",
             "is_read",
             "is_archived",
+            "metadata_status",
             "created",
             "updated",
         ]
 
 
+class BookmarkSearchResultSerializer(BookmarkListSerializer):
+    """
+    Serializer for Bookmark model - for search results. Bookmarks are annotated by `search.search_bookmarks()`:
+    `rank` - bm25 score, lower is better; `title_highlight` and `snippet` - HTML with matches wrapped in `<mark>` tags.
+    """
+
+    rank = serializers.FloatField(read_only=True)
+    title_highlight = serializers.CharField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta(BookmarkListSerializer.Meta):
+        fields = BookmarkListSerializer.Meta.fields + [
+            "rank",
+            "title_highlight",
+            "snippet",
+        ]
+
+
+class BookmarkMetadataSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Bookmark model - to poll for results of background metadata fetching.
+    """
+
+    class Meta:
+        model = Bookmark
+        fields = [
+            "id",
+            "url",
+            "title",
+            "description",
+            "image_url",
+            "metadata_status",
+            "updated",
+        ]
+
+
 class BookmarkCreateFromTelegramSerializer(serializers.ModelSerializer):
     """
     Serializer for Bookmark model - for creating new bookmarks via Telegram bot.
@@ -156,7 +282,12 @@ class BookmarkCreateFromTelegramSerializer(serializers.ModelSerializer):
         telegram_id = validated_data.pop("user").get("telegram_id")
         # NB: we checked existence of user with `telegram_id` in `CustomUserTelegramIDSerializer.validate_telegram_id()`
         user = CustomUser.objects.filter(telegram_id=telegram_id).first()
-        bookmark = Bookmark.objects.create(user=user, **validated_data)
+        bookmark = Bookmark.objects.create(
+            user=user,
+            title=placeholder_title(validated_data.get("url")),
+            metadata_status=Bookmark.MetadataStatus.PENDING,
+            **validated_data,
+        )
         return bookmark
 
 
@@ -173,20 +304,24 @@ class BookmarkCreateFromWebSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """
-        Override to create bookmark with random user - we will change it in the view.
+        Create bookmark for `user` passed to `save()` by the view, with placeholder title - actual page
+        metadata is fetched in background.
         """
-        user = CustomUser.objects.all().first()
-        bookmark = Bookmark.objects.create(user=user, **validated_data)
+        bookmark = Bookmark.objects.create(
+            title=placeholder_title(validated_data.get("url")),
+            metadata_status=Bookmark.MetadataStatus.PENDING,
+            **validated_data,
+        )
         return bookmark
 
 
 class BookmarkUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for Bookmark - for updating bookmarks via frontend.
-    Note: we dont mess with tags yet...
+    Folder and tags are only changed when passed; pass `"folder": null` to remove the bookmark from its folder.
     """
 
-    folder = FolderSerializer(many=False)
+    folder = FolderSerializer(many=False, allow_null=True)
     tags = TagSerializer(many=True)
 
     class Meta:
@@ -203,32 +338,287 @@ class BookmarkUpdateSerializer(serializers.ModelSerializer):
             "is_archived",
         ]
 
-    def update(self, instance, validated_data):
+    def validate_folder(self, value):
         """
-        Override `update` to deal with nested objects.
+        Return user's Folder with `id` from the passed folder data, or None.
         """
-        instance.url = validated_data.get("url", instance.url)
-        instance.title = validated_data.get("title", instance.title)
-        instance.description = validated_data.get("description", instance.description)
-        instance.image_url = validated_data.get("image_url", instance.image_url)
-        instance.is_favorite = validated_data.get("is_favorite", instance.is_favorite)
-        instance.is_read = validated_data.get("is_read", instance.is_read)
-        instance.is_archived = validated_data.get("is_archived", instance.is_archived)
+        if value is None:
+            return None
 
-        # Clear folder and all tag relations
-        instance.folder = None
-        instance.tags.clear()
+        user_id = self.instance.user_id if self.instance else None
+        folder = Folder.objects.filter(pk=value.get("id"), user_id=user_id).first()
+        if not folder:
+            raise serializers.ValidationError(
+                f"Folder with id={value.get('id')} does not exist!"
+            )
+        return folder
 
-        # Take care of nested objects
-        if folder_data := validated_data.get("folder"):
-            folder_id = folder_data.get("id")
-            instance.folder = Folder.objects.get(pk=folder_id) if folder_id else None
+    @staticmethod
+    def validate_tags(value):
+        """
+        Return dict of Tags with ids from the passed tag data, fetched in a single query.
+        """
+        tag_ids = {tag_data.get("id") for tag_data in value}
+        tags = Tag.objects.in_bulk(tag_ids)
+        if missing_ids := tag_ids - tags.keys():
+            raise serializers.ValidationError(
+                f"Tags with ids={sorted(missing_ids)} do not exist!"
+            )
+        return tags
 
-        tags = validated_data.get("tags") if validated_data.get("tags") else []
+    @transaction.atomic
+    def update(self, instance, validated_data):  # noqa: max-complexity: 4
+        """
+        Override `update` to deal with nested objects: only tag links that were actually added or removed are
+        written to DB, with one bulk insert and one bulk delete.
+        """
+        for field in self.Meta.fields:
+            if field in validated_data and field != "tags":
+                setattr(instance, field, validated_data[field])
+        instance.save()
 
-        for tag_data in tags:
-            tag = Tag.objects.filter(id=tag_data.get("id")).first()
-            instance.tags.add(tag)
+        if "tags" in validated_data:
+            self.update_tags(instance, validated_data["tags"].keys())
 
-        instance.save()
         return instance
+
+    @staticmethod
+    def update_tags(instance, tag_ids) -> None:
+        """
+        Link `instance` with tags with `tag_ids`, unlinking all other tags, and adjust tag statistics.
+        """
+        through = Bookmark.tags.through
+        current_ids = set(
+            through.objects.filter(bookmark_id=instance.pk).values_list(
+                "tag_id", flat=True
+            )
+        )
+        added_ids = set(tag_ids) - current_ids
+        removed_ids = current_ids - set(tag_ids)
+
+        if removed_ids:
+            through.objects.filter(
+                bookmark_id=instance.pk, tag_id__in=removed_ids
+            ).delete()
+        if added_ids:
+            through.objects.bulk_create(
+                [
+                    through(bookmark_id=instance.pk, tag_id=tag_id)
+                    for tag_id in added_ids
+                ]
+            )
+
+        changes = {(instance.user_id, tag_id): 1 for tag_id in added_ids}
+        changes.update({(instance.user_id, tag_id): -1 for tag_id in removed_ids})
+        adjust_tag_stats(changes)
+
+
+class BookmarkListFilterSerializer(serializers.Serializer):
+    """
+    Serializer for query parameters filtering and ordering `BookmarkListView` results; all passed conditions must match.
+    - `folder`: folder id, or `none` for bookmarks without folder;
+    - `tag`: tag id, may be repeated; `tag_mode`: `any` (default) or `all` of the tags must be applied;
+    - `is_favorite`, `is_read`, `is_archived`: `true` or `false`;
+    - `created_after`, `created_before`: ISO 8601 date or datetime, inclusive;
+    - `ordering`: one of `BOOKMARK_ORDERINGS` names.
+    """
+
+    folder = serializers.RegexField(r"^(\d+|none)$", required=False)
+    tag = serializers.ListField(child=serializers.IntegerField(), required=False)
+    tag_mode = serializers.ChoiceField(choices=["any", "all"], default="any")
+    # NB: missing boolean query parameters would be False without `default=None`
+    is_favorite = serializers.BooleanField(allow_null=True, default=None)
+    is_read = serializers.BooleanField(allow_null=True, default=None)
+    is_archived = serializers.BooleanField(allow_null=True, default=None)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    ordering = serializers.ChoiceField(
+        choices=list(BOOKMARK_ORDERINGS), default="default"
+    )
+
+    def filter_queryset(self, bookmarks):  # noqa: max-complexity: 7
+        """
+        Return `bookmarks` queryset filtered with validated conditions. Tag conditions are subqueries, so bookmarks
+        are not duplicated and the number of queries doesn't change.
+        """
+        conditions = self.validated_data
+        if "folder" in conditions:
+            folder = conditions["folder"]
+            bookmarks = bookmarks.filter(folder_id=None if folder == "none" else folder)
+        for flag in BULK_FLAGS:
+            if conditions.get(flag) is not None:
+                bookmarks = bookmarks.filter(**{flag: conditions[flag]})
+        if "created_after" in conditions:
+            bookmarks = bookmarks.filter(created__gte=conditions["created_after"])
+        if "created_before" in conditions:
+            bookmarks = bookmarks.filter(created__lte=conditions["created_before"])
+
+        if tag_ids := set(conditions.get("tag", [])):
+            links = Bookmark.tags.through.objects.filter(tag_id__in=tag_ids)
+            if conditions["tag_mode"] == "all":
+                links = (
+                    links.values("bookmark_id")
+                    .annotate(tags_qty=Count("tag_id"))
+                    .filter(tags_qty=len(tag_ids))
+                )
+            bookmarks = bookmarks.filter(pk__in=links.values("bookmark_id"))
+
+        return bookmarks
+
+    def get_ordering(self) -> Tuple[str, ...]:
+        """
+        Return ordering chosen by the client.
+        """
+        return BOOKMARK_ORDERINGS[self.validated_data["ordering"]]
+
+
+class BookmarkBulkFilterSerializer(serializers.Serializer):
+    """
+    Serializer for filter expression selecting bookmarks for bulk operation: all passed conditions must match.
+    """
+
+    folder = serializers.IntegerField(required=False, allow_null=True)
+    tag = serializers.IntegerField(required=False)
+    is_favorite = serializers.BooleanField(required=False)
+    is_read = serializers.BooleanField(required=False)
+    is_archived = serializers.BooleanField(required=False)
+
+    @staticmethod
+    def get_bookmarks(conditions: dict):
+        """
+        Return all bookmarks matching validated filter expression `conditions`.
+        """
+        conditions = dict(conditions)
+        if "folder" in conditions:
+            conditions["folder_id"] = conditions.pop("folder")
+        if "tag" in conditions:
+            # Subquery instead of join, so bookmarks are not duplicated and can be locked with `FOR UPDATE`
+            conditions["pk__in"] = Bookmark.tags.through.objects.filter(
+                tag_id=conditions.pop("tag")
+            ).values("bookmark_id")
+        return Bookmark.objects.filter(**conditions)
+
+
+class BookmarkBulkSerializer(serializers.Serializer):
+    """
+    Serializer for bulk operation on bookmarks, selected with the list of `ids` or `filter` expression.
+    Operation parameters:
+    - `set_flags`: `is_favorite`, `is_read`, `is_archived` - at least one of them;
+    - `move`: `folder` - id of user's folder, or null;
+    - `add_tags`, `remove_tags`: `tags` - list of tag ids;
+    - `delete`: none.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=BULK_MAX_IDS,
+    )
+    filter = BookmarkBulkFilterSerializer(required=False)
+    operation = serializers.ChoiceField(choices=list(BULK_OPERATIONS))
+    is_favorite = serializers.BooleanField(required=False)
+    is_read = serializers.BooleanField(required=False)
+    is_archived = serializers.BooleanField(required=False)
+    folder = serializers.IntegerField(required=False, allow_null=True)
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+    )
+
+    def validate_folder(self, value):
+        """
+        Return authenticated user's Folder with `id`, or None.
+        """
+        if value is None:
+            return None
+
+        folder = Folder.objects.filter(
+            pk=value, user_id=self.context["request"].user.pk
+        ).first()
+        if not folder:
+            raise serializers.ValidationError(f"Folder with id={value} does not exist!")
+        return folder
+
+    @staticmethod
+    def validate_tags(value):
+        """
+        Return dict of Tags with ids from the list, fetched in a single query.
+        """
+        tags = Tag.objects.in_bulk(set(value))
+        if missing_ids := set(value) - tags.keys():
+            raise serializers.ValidationError(
+                f"Tags with ids={sorted(missing_ids)} do not exist!"
+            )
+        return tags
+
+    def validate(self, attrs):  # noqa: max-complexity: 6
+        """
+        Check that bookmarks are selected in exactly one way, and parameters of the operation are passed.
+        """
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Pass either `ids` or `filter`.")
+
+        operation = attrs["operation"]
+        if operation == "set_flags" and not set(BULK_FLAGS) & attrs.keys():
+            raise serializers.ValidationError(
+                {"operation": f"Pass at least one of {BULK_FLAGS} to set."}
+            )
+        if operation == "move" and "folder" not in attrs:
+            raise serializers.ValidationError({"folder": "This field is required."})
+        if operation in ("add_tags", "remove_tags") and "tags" not in attrs:
+            raise serializers.ValidationError({"tags": "This field is required."})
+        return attrs
+
+    def get_bookmarks(self):
+        """
+        Return bookmarks selected for the operation - not yet filtered by owner.
+        """
+        if "ids" in self.validated_data:
+            return Bookmark.objects.filter(pk__in=self.validated_data["ids"])
+        return BookmarkBulkFilterSerializer.get_bookmarks(self.validated_data["filter"])
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for ImportJob model - to track import progress.
+    """
+
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            "id",
+            "status",
+            "file_format",
+            "bytes_total",
+            "bytes_processed",
+            "progress",
+            "bookmarks_created",
+            "bookmarks_skipped",
+            "error",
+            "created",
+            "updated",
+        ]
+
+
+class ImportJobCreateSerializer(serializers.Serializer):
+    """
+    Serializer used to upload Netscape bookmark file or JSON list of bookmarks to import.
+    """
+
+    file = serializers.FileField(allow_empty_file=False)
+
+    def create(self, validated_data):
+        """
+        Create ImportJob for `user` passed to `save()` by the view. File format is detected from its contents.
+        """
+        file = validated_data.get("file")
+        return ImportJob.objects.create(
+            user=validated_data.get("user"),
+            file=file,
+            file_format=detect_file_format(file),
+            bytes_total=file.size,
+        )
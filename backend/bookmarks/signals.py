@@ -0,0 +1,146 @@
+from typing import Union
+
+from django.contrib.auth import get_user_model
+from django.db.models import Model, QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from .counters import (
+    adjust_folder_counters,
+    adjust_tag_stats,
+    count_by_folder,
+    count_tag_links,
+)
+from .models import Bookmark, BookmarkQuerySet, BookmarkTombstone, Folder
+from .search import install_search_index
+from .sync import is_user_deletion, next_change_seq, touch_bookmarks
+
+
+def is_folder_deletion(origin: Union[Model, QuerySet, None]) -> bool:
+    """
+    Return True if `origin` of the deletion is a folder (or folders) - bookmarks in it are deleted by cascade.
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model is Folder
+    return isinstance(origin, Folder)
+
+
+@receiver(post_delete, sender=Bookmark)
+def decrement_folder_counter(sender, instance, origin=None, **kwargs):
+    """
+    Decrement counter of the folder the deleted bookmark was in. The signal is sent in the deletion transaction,
+    also for bookmarks deleted by cascade. `BookmarkQuerySet.delete()` adjusts counters by itself; when the user
+    or the folder is deleted, counters are deleted by the same cascade.
+    Reference: https://docs.djangoproject.com/en/4.1/ref/signals/#post-delete
+    """
+    if (
+        isinstance(origin, BookmarkQuerySet)
+        or is_user_deletion(origin)
+        or is_folder_deletion(origin)
+    ):
+        return
+    adjust_folder_counters(count_by_folder([instance], sign=-1))
+
+
+@receiver(pre_delete, sender=Bookmark)
+def decrement_tag_stats(sender, instance, origin=None, **kwargs):
+    """
+    Decrement user tag statistics for tags of the bookmark being deleted - its tag links are deleted by cascade,
+    which doesn't send `m2m_changed`. `BookmarkQuerySet.delete()` adjusts statistics by itself, and so does
+    `decrement_folder_tag_stats` for bookmarks deleted with their folder; statistics of a deleted user are deleted
+    by the same cascade.
+    """
+    if (
+        isinstance(origin, BookmarkQuerySet)
+        or is_user_deletion(origin)
+        or is_folder_deletion(origin)
+    ):
+        return
+    links = Bookmark.tags.through.objects.filter(bookmark_id=instance.pk)
+    adjust_tag_stats(count_tag_links(links, sign=-1))
+
+
+@receiver(pre_delete, sender=Folder)
+def decrement_folder_tag_stats(sender, instance, origin=None, **kwargs):
+    """
+    Decrement user tag statistics for all bookmarks deleted by cascade with the folder at once. `pre_delete`
+    signals of the whole cascade are sent before anything is deleted, so the tag links are still there.
+    """
+    if is_user_deletion(origin):
+        return
+    links = Bookmark.tags.through.objects.filter(bookmark__folder_id=instance.pk)
+    adjust_tag_stats(count_tag_links(links, sign=-1))
+
+
+@receiver(pre_delete, sender=Bookmark)
+def create_tombstone(sender, instance, origin=None, **kwargs):
+    """
+    Leave tombstone of the bookmark being deleted for delta sync. `BookmarkQuerySet.delete()` creates tombstones
+    by itself; nothing is left when the user is deleted.
+    """
+    if isinstance(origin, BookmarkQuerySet) or is_user_deletion(origin):
+        return
+    BookmarkTombstone.objects.create(
+        user_id=instance.user_id,
+        bookmark_id=instance.pk,
+        change_seq=next_change_seq(instance.user_id),
+    )
+
+
+@receiver(m2m_changed, sender=Bookmark.tags.through)
+def update_tag_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Update user tag statistics and stamp bookmarks for delta sync when tags are added to or removed from
+    bookmarks (or bookmarks to/from tags).
+    Links are counted after they're added, and before they're removed - `pk_set` of `remove()` may contain
+    objects which are not linked, and `clear()` doesn't pass it at all.
+    Reference: https://docs.djangoproject.com/en/4.1/ref/signals/#m2m-changed
+    """
+    if action not in ("post_add", "pre_remove", "pre_clear"):
+        return
+
+    links = sender.objects.filter(
+        **{"tag_id" if reverse else "bookmark_id": instance.pk}
+    )
+    if pk_set is not None:
+        links = links.filter(**{"bookmark_id__in" if reverse else "tag_id__in": pk_set})
+
+    adjust_tag_stats(count_tag_links(links, sign=1 if action == "post_add" else -1))
+    touch_bookmarks(Bookmark.objects.filter(pk__in=links.values("bookmark_id")))
+
+
+@receiver(post_delete, sender=Folder)
+def bump_version_on_folder_delete(sender, instance, origin=None, **kwargs):
+    """
+    Increment user's collection version when the folder is deleted, unless the user is deleted too.
+    """
+    if not is_user_deletion(origin):
+        next_change_seq(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def bump_version_on_user_save(sender, instance, update_fields=None, **kwargs):
+    """
+    Increment user's collection version when the user is changed - user details are served with conditional GET,
+    too. Updates of `last_login` alone, which happen on every login, are skipped so logging in doesn't invalidate
+    every cached response of the user; `last_login` in user details may lag until the next change.
+    """
+    if update_fields == frozenset(["last_login"]):
+        return
+    next_change_seq(instance.pk)
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    """
+    Create the full-text index of bookmarks and its triggers after migrations of this app. It's done on each
+    `migrate`, as SQLite drops triggers of a table when Django rebuilds the table to alter it.
+    """
+    if sender.name == "bookmarks":
+        install_search_index(using)
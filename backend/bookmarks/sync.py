@@ -0,0 +1,124 @@
+"""
+Delta sync of bookmarks: clients keeping a local copy of user's bookmarks fetch only those changed since their
+last sync, plus ids of deleted ones.
+
+Every change of a bookmark stamps it with the next value of user's `ChangeSequence`, deleted bookmarks leave
+`BookmarkTombstone` with the same kind of stamp. The counter row is incremented with `UPDATE` in the transaction
+making the change, so it stays locked until commit: changes of one user are committed in the order of their
+sequence numbers, and a client which has seen the value N can't miss a change with a number <= N committed later.
+Timestamps (`Bookmark.updated`) don't give such guarantee, so they are not used as the watermark.
+
+The counter is also incremented on changes of user's folders and the user itself, and serves as the version of
+user's collection for conditional requests - see `conditional` module.
+"""
+from typing import Iterable, Optional, Union
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Model, QuerySet
+from django.utils import timezone
+
+from .models import Bookmark, BookmarkTombstone, ChangeSequence
+
+
+@transaction.atomic(savepoint=False)
+def next_change_seq(user_id: int) -> int:
+    """
+    Increment user's change sequence and return the new value. Should be called in the transaction making
+    the change - the counter stays locked until it's committed.
+    """
+    sequences = ChangeSequence.objects.filter(user_id=user_id)
+    increment = {"value": F("value") + 1, "updated": timezone.now()}
+    if not sequences.update(**increment):
+        ChangeSequence.objects.get_or_create(user_id=user_id)
+        sequences.update(**increment)
+    return sequences.values_list("value", flat=True).get()
+
+
+@transaction.atomic(savepoint=False)
+def bump_change_seqs(user_ids: Iterable[int]) -> None:
+    """
+    Increment change sequences of `user_ids`, i.e. after maintenance commands have changed data served by read
+    endpoints - so conditional requests and the response cache don't serve the old data.
+    """
+    for user_id in sorted(set(user_ids)):
+        next_change_seq(user_id)
+
+
+def get_change_seq(user_id: int) -> int:
+    """
+    Return the current value of user's change sequence - the watermark for the next sync.
+    """
+    value = (
+        ChangeSequence.objects.filter(user_id=user_id)
+        .values_list("value", flat=True)
+        .first()
+    )
+    return value or 0
+
+
+@transaction.atomic(savepoint=False)
+def touch_bookmarks(bookmarks: QuerySet) -> None:
+    """
+    Stamp `bookmarks` with the next change sequence numbers of their users, so they're picked up by the next sync.
+    Used when the bookmark's representation changes without saving it: tags, folder or download changes.
+    """
+    user_ids = bookmarks.order_by().values_list("user_id", flat=True).distinct()
+    for user_id in list(user_ids):
+        bookmarks.filter(user_id=user_id).update(change_seq=next_change_seq(user_id))
+
+
+@transaction.atomic(savepoint=False)
+def create_tombstones(bookmarks: QuerySet) -> None:
+    """
+    Leave tombstones for `bookmarks` which are about to be deleted, one change sequence number per user.
+    Should be called in the deleting transaction.
+    """
+    tombstones = []
+    change_seqs = {}
+    for bookmark_id, user_id in bookmarks.order_by().values_list("pk", "user_id"):
+        if user_id not in change_seqs:
+            change_seqs[user_id] = next_change_seq(user_id)
+        tombstones.append(
+            BookmarkTombstone(
+                user_id=user_id,
+                bookmark_id=bookmark_id,
+                change_seq=change_seqs[user_id],
+            )
+        )
+    BookmarkTombstone.objects.bulk_create(tombstones, batch_size=1000)
+
+
+def is_user_deletion(origin: Union[Model, QuerySet, None]) -> bool:
+    """
+    Return True if `origin` of the deletion (passed to `pre_delete`/`post_delete` signals) is a user - then
+    all user's change records are deleted by cascade, and must not be created anew.
+    """
+    user_model = get_user_model()
+    if isinstance(origin, QuerySet):
+        return origin.model is user_model
+    return isinstance(origin, user_model)
+
+
+def get_changes(user, since: Optional[int] = None) -> dict:
+    """
+    Return bookmarks of `user` changed after `since` change sequence number, and ids of deleted ones,
+    along with the new watermark. All bookmarks are returned if `since` is None.
+    """
+    watermark = get_change_seq(user.pk)
+    bookmarks = Bookmark.objects.filter(
+        user_id__exact=user.pk, change_seq__lte=watermark
+    ).with_related()
+    deleted: Iterable[int] = []
+
+    if since is not None:
+        bookmarks = bookmarks.filter(change_seq__gt=since)
+        deleted = BookmarkTombstone.objects.filter(
+            user_id=user.pk, change_seq__gt=since, change_seq__lte=watermark
+        ).values_list("bookmark_id", flat=True)
+
+    return {
+        "watermark": watermark,
+        "bookmarks": bookmarks,
+        "deleted": list(deleted),
+    }
@@ -0,0 +1,105 @@
+import logging
+
+import requests
+from celery import shared_task
+from django.db import transaction
+
+from .metadata_cache import get_url_info
+from .models import Bookmark, ImportJob
+from .utils import placeholder_title
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    bind=True,
+    max_retries=3,
+)
+def enrich_bookmark_metadata(self, bookmark_id: int) -> None:  # noqa: max-complexity: 9
+    """
+    Fetch the page bookmarked in Bookmark with `bookmark_id` (or get it from the shared metadata cache), fill in
+    bookmark's title, description and image URL.
+
+    Title is only replaced while it's still the placeholder (bookmark's URL) set on creation, description and image
+    URL - while they're empty, so fields edited by the user in the meantime are preserved. Network errors are retried with exponential backoff; when retries
+    are exhausted, or on any other error, `metadata_status` is set to "failed" - so it never stays "pending".
+    """
+    bookmark = Bookmark.objects.filter(pk=bookmark_id).first()
+
+    if not bookmark or bookmark.metadata_status == Bookmark.MetadataStatus.COMPLETED:
+        return
+
+    try:
+        title, description, image_url = get_url_info(bookmark.url)
+    except requests.RequestException as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc, countdown=2**self.request.retries)
+        set_metadata_failed(bookmark)
+        return
+    except Exception:
+        logger.exception(f"Can't get metadata of bookmark #{bookmark_id}")
+        set_metadata_failed(bookmark)
+        return
+
+    # The user may have edited the bookmark while the page was fetched
+    bookmark.refresh_from_db(fields=["title", "description", "image_url"])
+    if bookmark.title == placeholder_title(bookmark.url):
+        bookmark.title = title[:256]
+    if not bookmark.description:
+        bookmark.description = description
+    if not bookmark.image_url:
+        bookmark.image_url = image_url
+    bookmark.metadata_status = Bookmark.MetadataStatus.COMPLETED
+    bookmark.save(
+        update_fields=[
+            "title",
+            "description",
+            "image_url",
+            "metadata_status",
+            "updated",
+        ]
+    )
+
+
+def set_metadata_failed(bookmark: Bookmark) -> None:
+    """
+    Set `metadata_status` of the `bookmark` to "failed", so clients learn enrichment has finished.
+    """
+    bookmark.metadata_status = Bookmark.MetadataStatus.FAILED
+    bookmark.save(update_fields=["metadata_status", "updated"])
+
+
+def schedule_metadata_enrichment(bookmark: Bookmark) -> None:
+    """
+    Run `enrich_bookmark_metadata` task for the `bookmark` once the current transaction is committed,
+    so the worker is guaranteed to see the new bookmark.
+    """
+    transaction.on_commit(
+        lambda: enrich_bookmark_metadata.delay(bookmark_id=bookmark.pk)
+    )
+
+
+@shared_task
+def process_import(import_job_id: int) -> None:
+    """
+    Import bookmarks from the file uploaded with ImportJob with `import_job_id`.
+    Chunks imported before an error are kept; the error is saved to the job.
+    The uploaded file is deleted once the job is completed or failed.
+    """
+    from .importers import run_import
+
+    job = ImportJob.objects.get(pk=import_job_id)
+    job.status = ImportJob.Status.PROCESSING
+    job.save(update_fields=["status", "updated"])
+
+    try:
+        run_import(job)
+    except Exception as e:
+        print(f"An error has occured while importing bookmarks: {e}")
+        job.status = ImportJob.Status.FAILED
+        job.error = str(e)
+    else:
+        job.status = ImportJob.Status.COMPLETED
+    job.file.delete(save=False)
+    job.file = ""
+    job.save(update_fields=["status", "error", "file", "updated"])
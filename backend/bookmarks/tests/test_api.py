@@ -1,9 +1,21 @@
+import base64
 import json
 
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APITestCase
 
 from bookmarks.models import Bookmark, Folder, Tag
+from bookmarks.pagination import (
+    BOOKMARK_KEYSET_ORDERING,
+    BOOKMARK_ORDERINGS,
+    KeysetCursorPagination,
+)
 from bookmarks.serializers import FolderSerializer
+from downloads.models import Download
+from users.authentication import invalidate_token
 from users.models import CustomUser
 
 NUMBER_OF_TAGS = 10
@@ -199,6 +211,47 @@ class BookmarksAPITest(APITestCase):
         for _id in bookmark_ids:
             self.assertEqual(Bookmark.objects.get(pk=_id).folder, None)
 
+    def test_folder_delete_move_to_api(self):
+        """
+        Ensure that `FolderDeleteView`:
+        - moves bookmarks to the folder passed in `move_to` query parameter, adjusting its counter;
+        - rejects unknown target folders;
+        - runs the same number of queries regardless of the number of bookmarks in the folder.
+        """
+        folder, target, small_folder, other_target = Folder.objects.filter(
+            user_id__exact=self.new_user.pk
+        )[:4]
+        bookmark_ids = list(folder.bookmarks.values_list("id", flat=True))
+        small_folder.bookmarks.exclude(pk=small_folder.bookmarks.first().pk).delete()
+
+        for move_to in ("unknown", folder.pk, 0):
+            response = self.client.delete(
+                f"/api/v1/folders/delete/{folder.pk}/?move_to={move_to}",
+                **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+            )
+            self.assertEqual(response.status_code, 400)
+
+        query_counts = []
+        for deleted, moved_to in ((folder, target), (small_folder, other_target)):
+            # Look the token up in DB on each request, not in the cache
+            invalidate_token(self.auth_token)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.delete(
+                    f"/api/v1/folders/delete/{deleted.pk}/?move_to={moved_to.pk}",
+                    **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+                )
+            self.assertEqual(response.status_code, 204)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertFalse(Folder.objects.filter(pk=folder.pk).exists())
+        self.assertEqual(
+            Bookmark.objects.filter(pk__in=bookmark_ids, folder=target).count(),
+            NUMBER_OF_BOOKMARKS_IN_FOLDER,
+        )
+        target.refresh_from_db()
+        self.assertEqual(target.bookmarks_qty, NUMBER_OF_BOOKMARKS_IN_FOLDER * 2)
+
     def test_bookmark_list_api(self):
         """
         Ensure that `BookmarkListView`:
@@ -217,6 +270,78 @@ class BookmarksAPITest(APITestCase):
             len(bookmark_list), NUMBER_OF_FOLDERS * NUMBER_OF_BOOKMARKS_IN_FOLDER + 1
         )
 
+    def test_bookmark_list_paginated_api(self):
+        """
+        Ensure that `BookmarkListView`:
+        - returns keyset-paginated results when `page_size` is passed;
+        - `next` links walk through all user's bookmarks in `Bookmark.Meta.ordering` order, without duplicates;
+        - `previous` link returns the preceding page;
+        - returns 404 on malformed or tampered cursor.
+        """
+        url = "/api/v1/bookmarks/?page_size=7"
+        expected_ids = list(
+            Bookmark.objects.filter(user_id__exact=self.new_user.pk)
+            .order_by(*BOOKMARK_KEYSET_ORDERING)
+            .values_list("id", flat=True)
+        )
+        pages = []
+
+        while url:
+            response = self.client.get(
+                url,
+                **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+            )
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.content)
+            self.assertLessEqual(len(page["results"]), 7)
+            self.assertEqual(page["previous"] is None, len(pages) == 0)
+            pages.append(page)
+            url = page["next"]
+
+        received_ids = [
+            bookmark["id"] for page in pages for bookmark in page["results"]
+        ]
+        self.assertEqual(received_ids, expected_ids)
+
+        # Step back from the last page:
+        response = self.client.get(
+            pages[-1]["previous"],
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        previous_page = json.loads(response.content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [bookmark["id"] for bookmark in previous_page["results"]],
+            [bookmark["id"] for bookmark in pages[-2]["results"]],
+        )
+
+        # Try with malformed cursor:
+        response = self.client.get(
+            "/api/v1/bookmarks/?cursor=garbage",
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        self.assertEqual(response.status_code, 404)
+
+        # Try with cursors whose position values have unexpected types:
+        created = timezone.now().isoformat()
+        for position in (
+            [False, True, False, created, None],
+            [False, True, False, created, [1]],
+            [False, True, False, created, {"id": 1}],
+            [False, True, False, created, True],
+            [False, True, 0, created, 1],
+            [False, True, False, 1, 1],
+            [False, True, False, "not a date", 1],
+        ):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({"p": position, "r": 0}).encode("ascii")
+            ).decode("ascii")
+            response = self.client.get(
+                f"/api/v1/bookmarks/?cursor={cursor}",
+                **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+            )
+            self.assertEqual(response.status_code, 404, position)
+
     def test_bookmark_create_from_telegram_api(self):
         """
         Ensure that `bookmark_create_from_telegram`:
@@ -262,17 +387,22 @@ class BookmarksAPITest(APITestCase):
         - return 400 code if the URL is incorrect.
         """
         url = "/api/v1/bookmarks/create/"
-        response = self.client.post(
-            url,
-            {
-                "url": "https://ya.ru",
-            },
-            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
-        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                url,
+                {
+                    "url": "https://ya.ru",
+                },
+                **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+            )
         bookmark = json.loads(response.content)
         self.assertEqual(response.status_code, 201)
         self.assertEqual(bookmark["url"], "https://ya.ru")
         self.assertEqual(bookmark["user"], self.new_user.pk)
+        # Metadata is fetched in background:
+        self.assertEqual(bookmark["title"], "https://ya.ru")
+        self.assertEqual(bookmark["metadata_status"], Bookmark.MetadataStatus.PENDING)
+        self.assertEqual(len(callbacks), 1)
 
         # Try with wrong URL:
         response = self.client.post(
@@ -284,6 +414,46 @@ class BookmarksAPITest(APITestCase):
         )
         self.assertEqual(response.status_code, 400)
 
+    def test_bookmark_metadata_api(self):
+        """
+        Ensure that `BookmarkMetadataView`:
+        - is located at defined URL;
+        - returns bookmark's metadata and `metadata_status`;
+        - only owner can get the metadata.
+        """
+        bookmark = Bookmark.objects.create(
+            title="https://ya.ru",
+            url="https://ya.ru",
+            user=self.new_user,
+            metadata_status=Bookmark.MetadataStatus.PENDING,
+        )
+        url = f"/api/v1/bookmarks/metadata/{bookmark.pk}/"
+        response = self.client.get(
+            url,
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        metadata = json.loads(response.content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(metadata["id"], bookmark.pk)
+        self.assertEqual(metadata["metadata_status"], Bookmark.MetadataStatus.PENDING)
+
+        # Try to get another user's bookmark metadata
+        new_user2 = CustomUser.objects.create_user(
+            "testuser2",
+            password="password2",
+        )
+        others_bookmark = Bookmark.objects.create(
+            title="Other's bookmark",
+            url="https://www.hazadus.ru/",
+            user=new_user2,
+        )
+        url = f"/api/v1/bookmarks/metadata/{others_bookmark.pk}/"
+        response = self.client.get(
+            url,
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        self.assertEqual(response.status_code, 403)
+
     def test_bookmark_update_api(self):
         """
         Ensure that `BookmarkUpdateView`:
@@ -325,7 +495,7 @@ class BookmarksAPITest(APITestCase):
         self.assertEqual(bookmark_data["is_favorite"], bookmark.is_favorite)
         self.assertEqual(bookmark_data["is_archived"], bookmark.is_archived)
 
-        # Check that folder is set to None if no folder is passed to API:
+        # Check that folder and tags are kept if they are not passed to API:
         url = f"/api/v1/bookmarks/update/{bookmark.pk}/"
         response = self.client.patch(
             url,
@@ -338,8 +508,92 @@ class BookmarksAPITest(APITestCase):
         bookmark_data = json.loads(response.content)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(bookmark_data["title"], "New title 2")
+        self.assertEqual(bookmark_data["folder"]["id"], folder.pk)
+        self.assertEqual([tag["id"] for tag in bookmark_data["tags"]], [tag.pk])
+
+        # Check that folder is set to None if `null` is passed to API:
+        response = self.client.patch(
+            url,
+            {
+                "folder": None,
+            },
+            format="json",
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        bookmark_data = json.loads(response.content)
+        self.assertEqual(response.status_code, 200)
         self.assertEqual(bookmark_data["folder"], None)
 
+    def test_bookmark_update_tags_api(self):
+        """
+        Ensure that `BookmarkUpdateView`:
+        - only writes tag links which were added or removed, with a fixed number of queries;
+        - doesn't accept unknown tags and other users' folders.
+        """
+        bookmark = Bookmark.objects.filter(tags__isnull=False).distinct().first()
+        tags = list(bookmark.tags.order_by("pk"))
+        kept_link_ids = set(
+            Bookmark.tags.through.objects.filter(
+                bookmark=bookmark, tag__in=tags[:5]
+            ).values_list("pk", flat=True)
+        )
+        new_tags = [Tag.objects.create(title=f"New tag #{i}") for i in range(0, 5)]
+        url = f"/api/v1/bookmarks/update/{bookmark.pk}/"
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                url,
+                {
+                    "tags": [
+                        {"id": tag.pk, "title": tag.title}
+                        for tag in tags[:5] + new_tags
+                    ],
+                },
+                format="json",
+                **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {tag["id"] for tag in response.data["tags"]},
+            {tag.pk for tag in tags[:5] + new_tags},
+        )
+        link_writes = [
+            query["sql"].split()[0]
+            for query in queries
+            if '"bookmarks_bookmark_tags"' in query["sql"]
+            and not query["sql"].startswith("SELECT")
+        ]
+        self.assertEqual(sorted(link_writes), ["DELETE", "INSERT"])
+        # Links which were not changed are kept:
+        self.assertTrue(
+            kept_link_ids
+            <= set(
+                Bookmark.tags.through.objects.filter(bookmark=bookmark).values_list(
+                    "pk", flat=True
+                )
+            )
+        )
+
+        other_user = CustomUser.objects.create_user("otheruser", password="password")
+        other_folder = Folder.objects.create(user=other_user, title="Not mine")
+        for data in (
+            {"tags": [{"id": 0, "title": "Unknown"}]},
+            {
+                "folder": {
+                    "id": other_folder.pk,
+                    "user": other_user.pk,
+                    "title": other_folder.title,
+                }
+            },
+        ):
+            response = self.client.patch(
+                url,
+                data,
+                format="json",
+                **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+            )
+            self.assertEqual(response.status_code, 400)
+
     def test_bookmark_delete_view(self):
         """
         Ensure that `BookmarkDeleteView`:
@@ -373,3 +627,115 @@ class BookmarksAPITest(APITestCase):
             **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
         )
         self.assertEqual(response.status_code, 403)
+
+
+class BookmarkListQueryCountTest(APITestCase):
+    """
+    Ensure that listing bookmarks costs a constant number of DB queries.
+    """
+
+    password = "password"
+    library_sizes = [1, 100, 1000]
+    users = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        tags = [Tag.objects.create(title=f"Tag #{i}") for i in range(0, 3)]
+
+        for size in cls.library_sizes:
+            user = CustomUser.objects.create_user(
+                f"testuser{size}",
+                password=cls.password,
+            )
+            folder = Folder.objects.create(title="Folder", user=user)
+            bookmarks = Bookmark.objects.bulk_create(
+                [
+                    Bookmark(
+                        title=f"Bookmark {i}",
+                        url="https://bookmarks.hazadus.ru",
+                        user=user,
+                        folder=folder,
+                    )
+                    for i in range(0, size)
+                ]
+            )
+            Bookmark.tags.through.objects.bulk_create(
+                [
+                    Bookmark.tags.through(bookmark_id=bookmark.pk, tag_id=tag.pk)
+                    for bookmark in bookmarks
+                    for tag in tags
+                ]
+            )
+            Download.objects.bulk_create(
+                [
+                    Download(title=bookmark.title, bookmark=bookmark)
+                    for bookmark in bookmarks
+                ]
+            )
+            cls.users[size] = user
+
+    def get_auth_token(self, username: str) -> str:
+        """
+        Login as `username` and return auth token.
+        """
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": username, "password": self.password},
+        )
+        return json.loads(response.content).get("auth_token")
+
+    def test_bookmark_list_query_count(self):
+        """
+        Ensure that `BookmarkListView` issues the same number of queries for 1, 100 and 1000 bookmarks.
+        """
+        query_counts = []
+
+        for size, user in self.users.items():
+            auth_token = self.get_auth_token(user.username)
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(
+                    "/api/v1/bookmarks/",
+                    **{"HTTP_AUTHORIZATION": "Token " + auth_token},
+                )
+            bookmark_list = json.loads(response.content)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(bookmark_list), size)
+            self.assertEqual(len(bookmark_list[0]["tags"]), 3)
+            self.assertEqual(bookmark_list[0]["folder"]["title"], "Folder")
+            self.assertIsNotNone(bookmark_list[0]["download"])
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(len(set(query_counts)), 1, query_counts)
+
+
+class KeysetPaginationQueryPlanTest(TestCase):
+    """
+    Ensure that pages past a cursor are seeks in the ordering's index, so their cost doesn't grow with depth.
+    """
+
+    def test_keyset_query_plans(self):
+        """
+        Ensure every disjunct of the keyset condition searches the index by all its columns, without sorting.
+        """
+        for name, ordering in BOOKMARK_ORDERINGS.items():
+            queryset = Bookmark.objects.filter(user_id__exact=1).order_by(*ordering)
+            position = [
+                timezone.now() if field.lstrip("-") == "created" else False
+                for field in ordering
+            ]
+            position[-1] = 100
+            conditions = KeysetCursorPagination.build_keyset_filters(position, ordering)
+            self.assertEqual(len(conditions), len(ordering))
+
+            for condition in conditions:
+                with self.subTest(ordering=name, condition=condition):
+                    plan = queryset.filter(condition)[:51].explain()
+                    self.assertNotIn("TEMP B-TREE", plan)
+                    columns = (
+                        len(condition) + 1
+                    )  # `user_id` and each column in the condition
+                    self.assertRegex(
+                        plan,
+                        r"SEARCH bookmarks_bookmark USING INDEX bookmark_user_\w+_idx "
+                        r"\(user_id=\?" + r" AND \w+[=<>]\?" * (columns - 1) + r"\)",
+                    )
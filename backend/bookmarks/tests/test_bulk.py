@@ -0,0 +1,204 @@
+import json
+from unittest.mock import patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from bookmarks.counters import find_stale_folders, find_stale_tag_stats
+from bookmarks.models import Bookmark, Folder, Tag
+from users.authentication import invalidate_token
+from users.models import CustomUser
+
+
+class BookmarkBulkAPITest(APITestCase):
+    """
+    Test `bookmark_bulk` API endpoint.
+    """
+
+    url = "/api/v1/bookmarks/bulk/"
+    username = "testuser"
+    password = "password"
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(cls.username, password=cls.password)
+        cls.other_user = CustomUser.objects.create_user(
+            "otheruser", password=cls.password
+        )
+        cls.folder = Folder.objects.create(user=cls.user, title="Folder")
+        cls.other_folder = Folder.objects.create(user=cls.user, title="Other")
+        cls.python, cls.django = [
+            Tag.objects.create(title=title) for title in ("python", "django")
+        ]
+
+        for i in range(0, 10):
+            bookmark = Bookmark.objects.create(
+                user=cls.user,
+                url="https://hazadus.ru/",
+                title=f"Bookmark #{i}",
+                folder=cls.folder if i < 5 else None,
+            )
+            bookmark.tags.add(cls.python)
+        cls.foreign_bookmark = Bookmark.objects.create(
+            user=cls.other_user, url="https://hazadus.ru/", title="Not mine"
+        )
+
+    def setUp(self):
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": self.username, "password": self.password},
+        )
+        self.auth_token = json.loads(response.content).get("auth_token")
+
+    def post(self, data):
+        return self.client.post(
+            self.url,
+            data,
+            format="json",
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+
+    def assertCountersCorrect(self):
+        self.assertFalse(find_stale_folders().exists())
+        self.assertEqual(find_stale_tag_stats(), {})
+
+    def test_set_flags(self):
+        """
+        Ensure flags are set only on user's bookmarks, and archived bookmarks leave folder counters.
+        """
+        ids = list(
+            Bookmark.objects.filter(folder=self.folder).values_list("pk", flat=True)
+        )
+        response = self.post(
+            {
+                "ids": ids[:3] + [self.foreign_bookmark.pk],
+                "operation": "set_flags",
+                "is_read": True,
+                "is_archived": True,
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["ids"], sorted(ids[:3]))
+        self.assertEqual(
+            Bookmark.objects.filter(is_read=True, is_archived=True).count(), 3
+        )
+        self.folder.refresh_from_db()
+        self.assertEqual(self.folder.bookmarks_qty, 2)
+
+        response = self.post(
+            {
+                "filter": {"is_archived": True},
+                "operation": "set_flags",
+                "is_archived": False,
+            }
+        )
+        self.assertEqual(len(response.data["ids"]), 3)
+        self.folder.refresh_from_db()
+        self.assertEqual(self.folder.bookmarks_qty, 5)
+        self.assertCountersCorrect()
+
+    def test_move(self):
+        """
+        Ensure bookmarks selected with filter are moved between folders, and out of folders.
+        """
+        response = self.post(
+            {
+                "filter": {"folder": None},
+                "operation": "move",
+                "folder": self.other_folder.pk,
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["ids"]), 5)
+        self.assertEqual(self.other_folder.bookmarks.count(), 5)
+        self.assertCountersCorrect()
+
+        response = self.post(
+            {"filter": {"folder": self.folder.pk}, "operation": "move", "folder": None}
+        )
+        self.assertEqual(len(response.data["ids"]), 5)
+        self.assertFalse(self.folder.bookmarks.exists())
+        self.assertCountersCorrect()
+
+    def test_add_and_remove_tags(self):
+        """
+        Ensure tags are added and removed, and tag statistics are kept correct.
+        """
+        ids = list(Bookmark.objects.filter(user=self.user).values_list("pk", flat=True))
+        response = self.post(
+            {
+                "ids": ids[:4],
+                "operation": "add_tags",
+                "tags": [self.python.pk, self.django.pk],
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.django.bookmarks.count(), 4)
+        self.assertEqual(self.python.bookmarks.count(), 11 - 1)
+        self.assertCountersCorrect()
+
+        response = self.post(
+            {
+                "filter": {"tag": self.django.pk},
+                "operation": "remove_tags",
+                "tags": [self.python.pk],
+            }
+        )
+        self.assertEqual(len(response.data["ids"]), 4)
+        self.assertEqual(self.python.bookmarks.count(), 6)
+        self.assertCountersCorrect()
+
+    def test_delete(self):
+        """
+        Ensure bookmarks are deleted with a number of queries which doesn't depend on the number of bookmarks.
+        """
+        query_counts = []
+        first_id = self.folder.bookmarks.order_by("pk").first().pk
+        for data in ({"ids": [first_id]}, {"filter": {"folder": self.folder.pk}}):
+            # Look the token up in DB on each request, not in the cache
+            invalidate_token(self.auth_token)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post({**data, "operation": "delete"})
+            self.assertEqual(response.status_code, 200)
+            query_counts.append(len(queries))
+            self.assertCountersCorrect()
+
+        self.assertEqual(len(response.data["ids"]), 4)
+        self.post({"filter": {"folder": None}, "operation": "delete"})
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertFalse(Bookmark.objects.filter(user=self.user).exists())
+        self.assertTrue(Bookmark.objects.filter(pk=self.foreign_bookmark.pk).exists())
+
+    def test_filter_selection_limit(self):
+        """
+        Ensure filter selecting more than `BULK_MAX_IDS` bookmarks is rejected, and nothing is changed.
+        """
+        with patch("bookmarks.bulk.BULK_MAX_IDS", 9):
+            response = self.post({"filter": {}, "operation": "delete"})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("filter", response.data)
+            self.assertEqual(Bookmark.objects.filter(user=self.user).count(), 10)
+
+            response = self.post({"filter": {"folder": None}, "operation": "delete"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["ids"]), 5)
+
+    def test_invalid_requests(self):
+        """
+        Ensure invalid requests are rejected: both or none of `ids`/`filter`, missing operation parameters,
+        other user's folder.
+        """
+        other_users_folder = Folder.objects.create(user=self.other_user, title="Folder")
+        for data in (
+            {"operation": "delete"},
+            {"ids": [1], "filter": {}, "operation": "delete"},
+            {"ids": [1], "operation": "set_flags"},
+            {"ids": [1], "operation": "move"},
+            {"ids": [1], "operation": "add_tags"},
+            {"ids": [1], "operation": "add_tags", "tags": [0]},
+            {"ids": [1], "operation": "move", "folder": other_users_folder.pk},
+            {"ids": [1], "operation": "unknown"},
+        ):
+            self.assertEqual(self.post(data).status_code, 400)
@@ -0,0 +1,126 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+
+from bookmarks.models import Bookmark, Folder, Tag
+from users.models import CustomUser
+
+URLS = [
+    "/api/v1/bookmarks/",
+    "/api/v1/folders/",
+    "/api/v1/tags/",
+    "/api/v1/user/details/",
+]
+MAIN_TABLES = [
+    '"bookmarks_bookmark"',
+    '"bookmarks_folder"',
+    '"bookmarks_tag"',
+    '"bookmarks_usertagstat"',
+    '"downloads_download"',
+]
+
+
+class ConditionalGetTest(APITestCase):
+    """
+    Test conditional GET of list endpoints with per-user collection version.
+    """
+
+    username = "testuser"
+    password = "password"
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(cls.username, password=cls.password)
+        cls.other_user = CustomUser.objects.create_user(
+            "otheruser", password=cls.password
+        )
+        folder = Folder.objects.create(user=cls.user, title="Folder")
+        bookmark = Bookmark.objects.create(
+            user=cls.user, url="https://hazadus.ru/", title="Bookmark", folder=folder
+        )
+        bookmark.tags.add(Tag.objects.create(title="python"))
+
+    def setUp(self):
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": self.username, "password": self.password},
+        )
+        self.auth_token = json.loads(response.content).get("auth_token")
+
+    def get(self, url, **headers):
+        return self.client.get(
+            url, **{"HTTP_AUTHORIZATION": "Token " + self.auth_token, **headers}
+        )
+
+    def test_not_modified(self):  # noqa: max-complexity: 4
+        """
+        Ensure repeated requests with `If-None-Match` get 304 without querying bookmarks, folders, tags and downloads;
+        `Last-Modified` is not sent, and `If-Modified-Since` alone is not answered with 304.
+        """
+        for url in URLS:
+            response = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("private", response["Cache-Control"])
+
+            with CaptureQueriesContext(connection) as queries:
+                not_modified = self.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified.content, b"")
+            for query in queries:
+                for table in MAIN_TABLES:
+                    self.assertNotIn(table, query["sql"])
+
+            self.assertNotIn("Last-Modified", response)
+            modified = self.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+            self.assertEqual(modified.status_code, 200)
+
+    def test_representations(self):
+        """
+        Ensure different query strings and media types of the same endpoint get different ETags.
+        """
+        url = "/api/v1/bookmarks/"
+        response = self.get(url)
+        self.assertIn("Accept", response["Vary"])
+
+        sparse = self.get(url + "?fields=id", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(sparse.status_code, 200)
+        self.assertNotEqual(sparse["ETag"], response["ETag"])
+
+        html = self.get(
+            url, HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(html.status_code, 200)
+        self.assertNotEqual(html["ETag"], response["ETag"])
+
+        not_modified = self.get(url + "?fields=id", HTTP_IF_NONE_MATCH=sparse["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_modified(self):
+        """
+        Ensure writes of the user change the version, and writes of other users and updates of `last_login` don't.
+        """
+        etag = self.get("/api/v1/folders/")["ETag"]
+
+        Folder.objects.create(user=self.other_user, title="Not mine")
+        Bookmark.objects.create(
+            user=self.other_user, url="https://hazadus.ru/", title="Not mine"
+        )
+        self.user.save(update_fields=["last_login"])
+        response = self.get("/api/v1/folders/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        for change in (
+            lambda: Folder.objects.create(user=self.user, title="New"),
+            lambda: Folder.objects.filter(title="New").get().delete(),
+            lambda: Bookmark.objects.get(user=self.user).tags.clear(),
+            lambda: self.user.save(),
+        ):
+            change()
+            response = self.get("/api/v1/folders/", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+            etag = response["ETag"]
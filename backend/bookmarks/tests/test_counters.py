@@ -0,0 +1,145 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from bookmarks.importers import import_chunk
+from bookmarks.models import Bookmark, Folder
+from bookmarks.sync import get_change_seq
+from users.models import CustomUser
+
+
+class FolderCountersTest(TestCase):
+    """
+    Test maintenance of denormalized `Folder.bookmarks_qty` counters.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user("testuser", password="password")
+        cls.folder = Folder.objects.create(user=cls.user, title="Folder")
+        cls.other_folder = Folder.objects.create(user=cls.user, title="Other")
+
+    def create_bookmark(self, **kwargs) -> Bookmark:
+        return Bookmark.objects.create(
+            user=self.user, url="https://hazadus.ru/", title="Bookmark", **kwargs
+        )
+
+    def assertCounters(self, folder_qty: int, other_folder_qty: int):
+        self.folder.refresh_from_db()
+        self.other_folder.refresh_from_db()
+        self.assertEqual(self.folder.bookmarks_qty, folder_qty)
+        self.assertEqual(self.other_folder.bookmarks_qty, other_folder_qty)
+
+    def test_create_and_delete(self):
+        """
+        Ensure counters include created non-archived bookmarks, and exclude deleted ones.
+        """
+        bookmark = self.create_bookmark(folder=self.folder)
+        self.create_bookmark(folder=self.folder)
+        self.create_bookmark(folder=self.folder, is_archived=True)
+        self.create_bookmark()
+        self.assertCounters(2, 0)
+
+        Bookmark.objects.get(pk=bookmark.pk).delete()
+        self.assertCounters(1, 0)
+
+        Bookmark.objects.filter(folder=self.folder).delete()
+        self.assertCounters(0, 0)
+
+    def test_cascade_delete(self):
+        """
+        Ensure counters are not updated for bookmarks deleted with their folder or user.
+        """
+        for i in range(3):
+            self.create_bookmark(folder=self.folder)
+            self.create_bookmark(folder=self.other_folder)
+
+        with CaptureQueriesContext(connection) as queries:
+            Folder.objects.get(pk=self.folder.pk).delete()
+        self.assertFalse(
+            [q for q in queries if q["sql"].startswith('UPDATE "bookmarks_folder"')]
+        )
+        self.other_folder.refresh_from_db()
+        self.assertEqual(self.other_folder.bookmarks_qty, 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            CustomUser.objects.get(pk=self.user.pk).delete()
+        self.assertFalse(
+            [q for q in queries if q["sql"].startswith('UPDATE "bookmarks_folder"')]
+        )
+        self.assertFalse(Folder.objects.exists())
+
+    def test_move_and_archive(self):
+        """
+        Ensure counters follow the bookmark moved between folders, archived and unarchived.
+        """
+        self.create_bookmark(folder=self.folder)
+        bookmark = Bookmark.objects.get()
+
+        bookmark.folder = self.other_folder
+        bookmark.save()
+        self.assertCounters(0, 1)
+
+        bookmark.is_archived = True
+        bookmark.save()
+        self.assertCounters(0, 0)
+
+        bookmark = Bookmark.objects.only("id", "title").get()
+        bookmark.is_archived = False
+        bookmark.folder = self.folder
+        bookmark.save()
+        self.assertCounters(1, 0)
+
+        # Saving unrelated fields doesn't touch counters:
+        bookmark.title = "New title"
+        bookmark.save(update_fields=["title"])
+        bookmark.save()
+        self.assertCounters(1, 0)
+
+    def test_folder_save_keeps_counter(self):
+        """
+        Ensure saving the folder loaded before bookmarks were added doesn't overwrite its counter.
+        """
+        folder = Folder.objects.get(pk=self.folder.pk)
+        self.create_bookmark(folder=self.folder)
+
+        folder.title = "Renamed"
+        folder.save()
+        self.assertCounters(1, 0)
+        self.assertEqual(self.folder.title, "Renamed")
+
+    def test_bulk_import(self):
+        """
+        Ensure bookmarks inserted in bulk by importer are counted.
+        """
+        item = {
+            "url": "https://hazadus.ru/",
+            "title": "Bookmark",
+            "description": None,
+            "folder": self.folder.title,
+            "tags": [],
+            "is_favorite": False,
+            "is_read": False,
+            "is_archived": False,
+        }
+        import_chunk(self.user, [item, item, {**item, "is_archived": True}])
+        self.assertCounters(2, 0)
+
+    def test_repair_command(self):
+        """
+        Ensure `repair_folder_counters` command reports and fixes drifted counters, bumping collection version.
+        """
+        self.create_bookmark(folder=self.folder)
+        Folder.objects.filter(pk=self.folder.pk).update(bookmarks_qty=10)
+
+        with self.assertRaises(CommandError):
+            call_command("repair_folder_counters", "--check", stdout=StringIO())
+
+        change_seq = get_change_seq(self.user.pk)
+        call_command("repair_folder_counters", stdout=StringIO())
+        self.assertCounters(1, 0)
+        self.assertGreater(get_change_seq(self.user.pk), change_seq)
+        call_command("repair_folder_counters", "--check", stdout=StringIO())
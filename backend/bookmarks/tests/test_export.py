@@ -0,0 +1,188 @@
+import csv
+import gzip
+import io
+import json
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+from bookmarks.exporters import accepts_gzip, export_netscape_html, iter_bookmarks
+from bookmarks.importers import clean_bookmark, iter_netscape_bookmarks
+from bookmarks.models import Bookmark, Folder, Tag
+from users.models import CustomUser
+
+
+class BookmarksExportTest(APITestCase):
+    """
+    Test streaming export of bookmarks.
+    """
+
+    username = "testuser"
+    password = "password"
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):
+        user = cls.user = CustomUser.objects.create_user(
+            username=cls.username, password=cls.password
+        )
+        other_user = CustomUser.objects.create_user(
+            username="otheruser", password=cls.password
+        )
+        folder = Folder.objects.create(user=user, title="Dev & Ops")
+        tags = [Tag.objects.create(title="python"), Tag.objects.create(title="django")]
+
+        django = Bookmark.objects.create(
+            user=user,
+            folder=folder,
+            url="https://www.djangoproject.com/",
+            title='Django "framework"',
+            description="The web framework, for perfectionists with deadlines.",
+            is_favorite=True,
+        )
+        django.tags.set(tags)
+        Bookmark.objects.create(user=user, url="https://hazadus.ru/", title="Хазадус")
+        Bookmark.objects.create(
+            user=other_user, url="https://example.com/", title="Not mine"
+        )
+
+    def setUp(self) -> None:
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": self.username, "password": self.password},
+            format="json",
+        )
+        self.auth_token = response.data["auth_token"]
+
+    def export(self, export_format: str, **headers):
+        return self.client.get(
+            f"/api/v1/bookmarks/export/{export_format}/",
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token, **headers},
+        )
+
+    def test_export_json_lines(self):
+        """
+        Ensure export to JSON Lines contains only user's bookmarks, in the format of bookmarks list API.
+        """
+        response = self.export("jsonl")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn("bookmarks.jsonl", response["Content-Disposition"])
+
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        items = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [item["url"] for item in items],
+            ["https://www.djangoproject.com/", "https://hazadus.ru/"],
+        )
+        self.assertEqual(items[0]["folder"]["title"], "Dev & Ops")
+        self.assertEqual(
+            {tag["title"] for tag in items[0]["tags"]}, {"python", "django"}
+        )
+
+    def test_export_csv(self):
+        """
+        Ensure export to CSV has header and a row per bookmark.
+        """
+        response = self.export("csv")
+        self.assertEqual(response.status_code, 200)
+
+        content = b"".join(response.streaming_content).decode("utf-8")
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["title"], 'Django "framework"')
+        self.assertEqual(rows[0]["folder"], "Dev & Ops")
+        self.assertEqual(set(rows[0]["tags"].split(",")), {"python", "django"})
+        self.assertEqual(rows[1]["folder"], "")
+
+    def test_export_netscape_html(self):
+        """
+        Ensure exported Netscape bookmark file is parsed back by the importer.
+        """
+        response = self.export("html")
+        self.assertEqual(response.status_code, 200)
+
+        content = b"".join(response.streaming_content).decode("utf-8")
+        items = {
+            item["url"]: item
+            for item in map(clean_bookmark, iter_netscape_bookmarks([content]))
+        }
+        self.assertEqual(
+            set(items), {"https://www.djangoproject.com/", "https://hazadus.ru/"}
+        )
+        django = items["https://www.djangoproject.com/"]
+        self.assertEqual(django["title"], 'Django "framework"')
+        self.assertEqual(django["folder"], "Dev & Ops")
+        self.assertEqual(set(django["tags"]), {"python", "django"})
+        self.assertEqual(
+            django["description"],
+            "The web framework, for perfectionists with deadlines.",
+        )
+        self.assertIsNone(items["https://hazadus.ru/"]["folder"])
+
+    def test_export_gzip(self):
+        """
+        Ensure export is compressed on the fly when the client accepts gzip.
+        """
+        plain = b"".join(self.export("jsonl").streaming_content)
+        response = self.export("jsonl", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+    def test_export_netscape_html_unfiled_last(self):
+        """
+        Ensure bookmarks without folder are written at the top level when the DB sorts them after folders.
+        """
+        bookmarks = list(iter_bookmarks(self.user))
+        bookmarks.sort(key=lambda bookmark: bookmark.folder_id is None)
+        with mock.patch(
+            "bookmarks.exporters.iter_bookmarks", return_value=iter(bookmarks)
+        ):
+            content = "".join(export_netscape_html(self.user))
+
+        items = {
+            item["url"]: item
+            for item in map(clean_bookmark, iter_netscape_bookmarks([content]))
+        }
+        self.assertEqual(items["https://www.djangoproject.com/"]["folder"], "Dev & Ops")
+        self.assertIsNone(items["https://hazadus.ru/"]["folder"])
+
+    def test_accepts_gzip(self):
+        """
+        Ensure gzip is only used if `Accept-Encoding` allows it with non-zero quality.
+        """
+        response = self.export("jsonl", HTTP_ACCEPT_ENCODING="gzip;q=0, deflate")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        for header, expected in [
+            ("gzip", True),
+            ("deflate, GZIP;q=0.5", True),
+            ("*", True),
+            ("*;q=0", False),
+            ("gzip;q=0, *", False),
+            ("identity", False),
+            ("", False),
+        ]:
+            with self.subTest(header=header):
+                self.assertEqual(accepts_gzip(header), expected)
+
+    def test_export_accept_header(self):
+        """
+        Ensure each format is exported to clients accepting only its media type.
+        """
+        for export_format, accept in (
+            ("jsonl", "application/x-ndjson"),
+            ("html", "text/html"),
+            ("csv", "text/csv"),
+        ):
+            with self.subTest(export_format=export_format):
+                response = self.export(export_format, HTTP_ACCEPT=accept)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response["Content-Type"].startswith(accept))
+
+    def test_export_unknown_format(self):
+        """
+        Ensure unknown export format is not found, and export requires authentication.
+        """
+        self.assertEqual(self.export("xml").status_code, 404)
+        response = self.client.get("/api/v1/bookmarks/export/jsonl/")
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,141 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from bookmarks.models import Bookmark, Folder, Tag
+from downloads.models import Download
+from users.models import CustomUser
+
+
+class SparseFieldsetTest(APITestCase):
+    """
+    Test `fields` and `expand` query parameters of list endpoints.
+    """
+
+    username = "testuser"
+    password = "password"
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(cls.username, password=cls.password)
+        cls.folder = Folder.objects.create(user=cls.user, title="Folder")
+        cls.tag = Tag.objects.create(title="python")
+        cls.bookmark = Bookmark.objects.create(
+            user=cls.user,
+            url="https://hazadus.ru/",
+            title="Bookmark",
+            description="Description",
+            folder=cls.folder,
+        )
+        cls.bookmark.tags.add(cls.tag)
+        cls.download = Download.objects.create(bookmark=cls.bookmark, title="Video")
+        Bookmark.objects.create(user=cls.user, url="https://hazadus.ru/", title="Other")
+
+    def setUp(self):
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": self.username, "password": self.password},
+        )
+        self.auth_token = json.loads(response.content).get("auth_token")
+
+    def get(self, url, **params):
+        return self.client.get(
+            url, params, HTTP_AUTHORIZATION="Token " + self.auth_token
+        )
+
+    def get_bookmark(self, **params):
+        response = self.get("/api/v1/bookmarks/", **params)
+        self.assertEqual(response.status_code, 200)
+        return next(
+            bookmark
+            for bookmark in response.json()
+            if bookmark["id"] == self.bookmark.pk
+        )
+
+    def test_full_representation_by_default(self):
+        """
+        Ensure all fields with nested objects are returned without `fields` and `expand`.
+        """
+        bookmark = self.get_bookmark()
+        self.assertEqual(bookmark["folder"]["title"], "Folder")
+        self.assertEqual(bookmark["tags"], [{"id": self.tag.pk, "title": "python"}])
+        self.assertEqual(bookmark["download"]["title"], "Video")
+        self.assertEqual(bookmark["description"], "Description")
+
+    def test_fields(self):
+        """
+        Ensure only requested fields (and `id`) are returned, nested objects collapsed to ids.
+        """
+        self.assertEqual(
+            self.get_bookmark(fields="title,folder,tags,download"),
+            {
+                "id": self.bookmark.pk,
+                "title": "Bookmark",
+                "folder": self.folder.pk,
+                "tags": [self.tag.pk],
+                "download": self.download.pk,
+            },
+        )
+
+    def test_expand(self):
+        """
+        Ensure expanded nested objects are returned in full, others collapsed to ids.
+        """
+        bookmark = self.get_bookmark(fields="url,folder,tags,download", expand="tags")
+        self.assertEqual(bookmark["folder"], self.folder.pk)
+        self.assertEqual(bookmark["tags"], [{"id": self.tag.pk, "title": "python"}])
+        self.assertEqual(bookmark["download"], self.download.pk)
+
+        bookmark = self.get_bookmark(expand="folder,download")
+        self.assertEqual(bookmark["folder"]["title"], "Folder")
+        self.assertEqual(bookmark["download"]["title"], "Video")
+        self.assertEqual(bookmark["tags"], [self.tag.pk])
+        self.assertEqual(bookmark["description"], "Description")
+
+        bookmark = self.get_bookmark(expand="")
+        self.assertEqual(bookmark["folder"], self.folder.pk)
+
+    def test_sql_projection(self):
+        """
+        Ensure columns of fields which are not requested are not loaded, and unused relations are not queried.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get("/api/v1/bookmarks/", fields="title", page_size=10)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        sql = "\n".join(
+            query["sql"]
+            for query in queries.captured_queries
+            if '"bookmarks_bookmark"' in query["sql"]
+        )
+        self.assertIn('"bookmarks_bookmark"."title"', sql)
+        self.assertNotIn('"bookmarks_bookmark"."description"', sql)
+        self.assertNotIn('"bookmarks_folder"', sql)
+        self.assertNotIn('"downloads_download"', sql)
+        self.assertNotIn('"bookmarks_bookmark_tags"', sql)
+
+    def test_folders_and_tags(self):
+        """
+        Ensure folder and tag lists support `fields`.
+        """
+        response = self.get("/api/v1/folders/", fields="title")
+        self.assertEqual(response.json(), [{"id": self.folder.pk, "title": "Folder"}])
+
+        response = self.get("/api/v1/tags/", fields="bookmarks_qty")
+        self.assertEqual(response.json(), [{"id": self.tag.pk, "bookmarks_qty": 1}])
+
+    def test_invalid_fields(self):
+        """
+        Ensure unknown fields are rejected.
+        """
+        for url, params in [
+            ("/api/v1/bookmarks/", {"fields": "title,password"}),
+            ("/api/v1/bookmarks/", {"expand": "user"}),
+            ("/api/v1/folders/", {"expand": "bookmarks"}),
+            ("/api/v1/tags/", {"fields": "bookmarks"}),
+        ]:
+            with self.subTest(url=url, params=params):
+                self.assertEqual(self.get(url, **params).status_code, 400)
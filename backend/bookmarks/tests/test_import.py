@@ -0,0 +1,244 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from bookmarks.importers import iter_json_bookmarks, run_import
+from bookmarks.models import Bookmark, Folder, ImportJob, Tag
+from bookmarks.tasks import process_import
+from users.models import CustomUser
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+NETSCAPE_BOOKMARKS = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks</H1>
+<DL><p>
+    <DT><H3 ADD_DATE="1680000000">Dev</H3>
+    <DD>Folder description is not a bookmark description
+    <DL><p>
+        <DT><A HREF="https://www.djangoproject.com/" ADD_DATE="1680000000" TAGS="python,django">Django</A>
+        <DD>The web framework for perfectionists with deadlines.
+        <DT><H3>Vue &amp; Nuxt</H3>
+        <DL><p>
+            <DT><A HREF="https://nuxt.com/">Nuxt</A>
+        </DL><p>
+        <DT><A HREF="https://docs.celeryq.dev/"></A>
+    </DL><p>
+    <DT><A HREF="javascript:alert(1)">Bookmarklet</A>
+    <DT><A HREF="https://hazadus.ru/">Хазадус</A>
+</DL><p>
+"""
+
+JSON_BOOKMARKS = [
+    {
+        "url": "https://www.djangoproject.com/",
+        "title": "Django",
+        "folder": "Dev",
+        "tags": ["python", "django"],
+        "is_favorite": True,
+    },
+    # Format of `/api/v1/bookmarks/` output:
+    {
+        "id": 1,
+        "url": "https://nuxt.com/",
+        "title": "Nuxt",
+        "folder": {"id": 1, "user": 1, "title": "Vue"},
+        "tags": [{"id": 1, "title": "vue"}],
+        "is_read": True,
+    },
+    {"url": "not an URL"},
+    {"url": "https://vuejs.org/", "is_favorite": "false"},
+    {"url": "https://vuejs.org/", "is_read": 0},
+    {"url": "https://vuejs.org/", "is_archived": None},
+]
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BookmarksImportTest(APITestCase):
+    """
+    Test bulk import of bookmarks.
+    """
+
+    username = "testuser"
+    password = "password"
+    new_user = None
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.new_user = CustomUser.objects.create_user(
+            cls.username,
+            password=cls.password,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        """
+        Login to get auth token for further tests.
+        """
+        url = "/api/v1/token/login/"
+        response = self.client.post(
+            url,
+            {"username": self.username, "password": self.password},
+        )
+        self.auth_token = json.loads(response.content).get("auth_token")
+
+    def create_job(self, content: str, file_format: str) -> ImportJob:
+        """
+        Create ImportJob with `content` file.
+        """
+        job = ImportJob(user=self.new_user, file_format=file_format)
+        job.file.save("bookmarks", ContentFile(content.encode("utf-8")), save=False)
+        job.bytes_total = job.file.size
+        job.save()
+        return job
+
+    def test_import_netscape_bookmarks(self):
+        """
+        Ensure that bookmarks are imported from Netscape bookmark file:
+        - bookmarks are put to the innermost folder, tags are created;
+        - descriptions are assigned to bookmarks, but not to folders;
+        - bookmarks with non-HTTP URLs are skipped;
+        - page metadata fetching is scheduled only for bookmarks without a title.
+        """
+        job = self.create_job(NETSCAPE_BOOKMARKS, ImportJob.FileFormat.HTML)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            run_import(job, chunk_size=2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.bookmarks_created, 4)
+        self.assertEqual(job.bookmarks_skipped, 1)
+        self.assertEqual(job.bytes_processed, job.bytes_total)
+        self.assertEqual(len(callbacks), 1)
+
+        django = Bookmark.objects.get(url="https://www.djangoproject.com/")
+        self.assertEqual(django.title, "Django")
+        self.assertEqual(
+            django.description, "The web framework for perfectionists with deadlines."
+        )
+        self.assertEqual(django.folder.title, "Dev")
+        self.assertEqual(
+            sorted(django.tags.values_list("title", flat=True)), ["django", "python"]
+        )
+        self.assertEqual(django.metadata_status, Bookmark.MetadataStatus.COMPLETED)
+        self.assertEqual(Bookmark.objects.get(title="Nuxt").folder.title, "Vue & Nuxt")
+        celery = Bookmark.objects.get(url="https://docs.celeryq.dev/")
+        self.assertEqual(celery.title, "https://docs.celeryq.dev/")
+        self.assertEqual(celery.metadata_status, Bookmark.MetadataStatus.PENDING)
+        self.assertEqual(celery.folder.title, "Dev")
+        self.assertIsNone(Bookmark.objects.get(title="Хазадус").folder)
+        self.assertEqual(Folder.objects.filter(user=self.new_user).count(), 2)
+
+    def test_import_json_bookmarks(self):
+        """
+        Ensure that bookmarks are imported from JSON list, including `/api/v1/bookmarks/` output;
+        existing folders and tags are reused; items with flags other than JSON booleans or null are skipped.
+        """
+        Folder.objects.create(user=self.new_user, title="Dev")
+        Tag.objects.create(title="python")
+        job = self.create_job(json.dumps(JSON_BOOKMARKS), ImportJob.FileFormat.JSON)
+
+        run_import(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.bookmarks_created, 3)
+        self.assertEqual(job.bookmarks_skipped, 3)
+        self.assertEqual(Folder.objects.filter(user=self.new_user).count(), 2)
+        self.assertEqual(Tag.objects.count(), 3)
+
+        django = Bookmark.objects.get(url="https://www.djangoproject.com/")
+        self.assertTrue(django.is_favorite)
+        self.assertEqual(django.folder.title, "Dev")
+        nuxt = Bookmark.objects.get(url="https://nuxt.com/")
+        self.assertTrue(nuxt.is_read)
+        self.assertEqual(nuxt.folder.title, "Vue")
+        self.assertEqual(list(nuxt.tags.values_list("title", flat=True)), ["vue"])
+        vue = Bookmark.objects.get(url="https://vuejs.org/")
+        self.assertFalse(vue.is_favorite or vue.is_read or vue.is_archived)
+
+    def test_process_import_deletes_file(self):
+        """
+        Ensure that the uploaded file is deleted when the job is completed or failed.
+        """
+        for content, status in [
+            (json.dumps(JSON_BOOKMARKS), ImportJob.Status.COMPLETED),
+            ("[{", ImportJob.Status.FAILED),
+        ]:
+            job = self.create_job(content, ImportJob.FileFormat.JSON)
+            path = job.file.path
+
+            process_import(job.pk)
+
+            job.refresh_from_db()
+            self.assertEqual(job.status, status)
+            self.assertFalse(job.file)
+            self.assertFalse(os.path.exists(path))
+
+    def test_iter_json_bookmarks(self):
+        """
+        Ensure that JSON list and JSON Lines are parsed when split into arbitrary chunks,
+        and malformed JSON raises an error.
+        """
+        content = json.dumps(JSON_BOOKMARKS)
+        chunks = [content[i : i + 3] for i in range(0, len(content), 3)]  # noqa: E203
+        self.assertEqual(list(iter_json_bookmarks(chunks)), JSON_BOOKMARKS)
+
+        json_lines = "\n".join(json.dumps(item) for item in JSON_BOOKMARKS)
+        self.assertEqual(list(iter_json_bookmarks([json_lines])), JSON_BOOKMARKS)
+
+        with self.assertRaises(ValueError):
+            list(iter_json_bookmarks([content[:-5]]))
+
+    def test_bookmark_import_api(self):
+        """
+        Ensure that `bookmark_import`:
+        - is located at defined URL;
+        - creates ImportJob with detected file format and schedules processing;
+        - `ImportJobDetailView` returns job's progress to the owner only.
+        """
+        url = "/api/v1/bookmarks/import/"
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                url,
+                {
+                    "file": SimpleUploadedFile(
+                        "bookmarks.json", json.dumps(JSON_BOOKMARKS).encode("utf-8")
+                    ),
+                },
+                **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+            )
+        job_data = json.loads(response.content)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(job_data["status"], ImportJob.Status.PENDING)
+        self.assertEqual(job_data["file_format"], ImportJob.FileFormat.JSON)
+        self.assertEqual(len(callbacks), 1)
+
+        url = f"/api/v1/bookmarks/import/{job_data['id']}/"
+        response = self.client.get(
+            url,
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["progress"], 0)
+
+        # Try to get another user's job
+        new_user2 = CustomUser.objects.create_user("testuser2", password="password2")
+        others_job = ImportJob.objects.create(user=new_user2, file="imports/other")
+        url = f"/api/v1/bookmarks/import/{others_job.pk}/"
+        response = self.client.get(
+            url,
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        self.assertEqual(response.status_code, 403)
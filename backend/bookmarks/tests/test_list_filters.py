@@ -0,0 +1,169 @@
+import json
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from bookmarks.models import Bookmark, Folder, Tag
+from users.authentication import invalidate_token
+from users.models import CustomUser
+
+
+class BookmarkListFilterTest(APITestCase):
+    """
+    Test filtering and ordering of `BookmarkListView` with query parameters.
+    """
+
+    username = "testuser"
+    password = "password"
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):  # noqa: max-complexity: 5
+        cls.user = CustomUser.objects.create_user(cls.username, password=cls.password)
+        other_user = CustomUser.objects.create_user("otheruser", password=cls.password)
+        cls.folder = Folder.objects.create(user=cls.user, title="Folder")
+        cls.python = Tag.objects.create(title="python")
+        cls.django = Tag.objects.create(title="django")
+
+        now = timezone.now()
+        cls.bookmarks = []
+        for number in range(10):
+            bookmark = Bookmark.objects.create(
+                user=cls.user,
+                url=f"https://hazadus.ru/{number}/",
+                title=f"Bookmark {number}",
+                folder=cls.folder if number % 2 else None,
+                is_favorite=number % 3 == 0,
+                is_read=number % 4 == 0,
+                is_archived=number == 9,
+            )
+            if number % 2 == 0:
+                bookmark.tags.add(cls.python)
+            if number % 5 == 0:
+                bookmark.tags.add(cls.django)
+            cls.bookmarks.append(bookmark)
+        for number, bookmark in enumerate(cls.bookmarks):
+            Bookmark.objects.filter(pk=bookmark.pk).update(
+                created=now - timedelta(days=number)
+            )
+
+        Bookmark.objects.create(
+            user=other_user, url="https://hazadus.ru/", title="Other", is_favorite=True
+        ).tags.add(cls.python)
+
+    def setUp(self):
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": self.username, "password": self.password},
+        )
+        self.auth_token = json.loads(response.content).get("auth_token")
+
+    def get(self, url, **params):
+        return self.client.get(
+            url, params, HTTP_AUTHORIZATION="Token " + self.auth_token
+        )
+
+    def get_ids(self, **params):
+        response = self.get("/api/v1/bookmarks/", **params)
+        self.assertEqual(response.status_code, 200)
+        return [bookmark["id"] for bookmark in response.json()]
+
+    def expected_ids(self, numbers):
+        return sorted(self.bookmarks[number].pk for number in numbers)
+
+    def test_filters(self):
+        """
+        Ensure each filter selects only matching bookmarks of the user.
+        """
+        for params, numbers in [
+            ({"folder": self.folder.pk}, [1, 3, 5, 7, 9]),
+            ({"folder": "none"}, [0, 2, 4, 6, 8]),
+            ({"is_favorite": "true"}, [0, 3, 6, 9]),
+            ({"is_read": "false"}, [1, 2, 3, 5, 6, 7, 9]),
+            ({"is_archived": "true"}, [9]),
+            ({"is_favorite": "true", "folder": self.folder.pk}, [3, 9]),
+            ({"tag": [self.python.pk]}, [0, 2, 4, 6, 8]),
+            ({"tag": [self.python.pk, self.django.pk]}, [0, 2, 4, 5, 6, 8]),
+            (
+                {"tag": [self.python.pk, self.django.pk], "tag_mode": "all"},
+                [0],
+            ),
+        ]:
+            with self.subTest(params=params):
+                self.assertEqual(
+                    sorted(self.get_ids(**params)), self.expected_ids(numbers)
+                )
+
+    def test_created_range(self):
+        """
+        Ensure `created_after` and `created_before` select bookmarks created in the range.
+        """
+        ids = self.get_ids(
+            created_after=Bookmark.objects.get(pk=self.bookmarks[5].pk).created,
+            created_before=Bookmark.objects.get(pk=self.bookmarks[2].pk).created,
+        )
+        self.assertEqual(sorted(ids), self.expected_ids([2, 3, 4, 5]))
+
+    def test_ordering(self):
+        """
+        Ensure bookmarks are returned in chosen order, and default ordering is kept.
+        """
+        newest_first = [bookmark.pk for bookmark in self.bookmarks]
+        self.assertEqual(self.get_ids(ordering="-created"), newest_first)
+        self.assertEqual(self.get_ids(ordering="created"), newest_first[::-1])
+        self.assertEqual(
+            self.get_ids(),
+            list(Bookmark.objects.filter(user=self.user).values_list("pk", flat=True)),
+        )
+
+    def test_pagination(self):
+        """
+        Ensure filtering and ordering compose with keyset pagination.
+        """
+        url = "/api/v1/bookmarks/"
+        params = {"page_size": 2, "is_archived": "false", "ordering": "created"}
+        ids = []
+        while url:
+            page = self.get(url, **params).json()
+            ids += [bookmark["id"] for bookmark in page["results"]]
+            url, params = page["next"], {}
+
+        self.assertEqual(ids, [bookmark.pk for bookmark in self.bookmarks[8::-1]])
+
+    def test_constant_query_count(self):
+        """
+        Ensure the number of queries doesn't depend on filters or the number of results.
+        """
+        query_counts = []
+        for params in [
+            {"tag": [self.django.pk]},
+            {"tag": [self.python.pk, self.django.pk], "tag_mode": "all"},
+            {"folder": self.folder.pk, "is_read": "false", "ordering": "-created"},
+            {"tag": [self.python.pk], "page_size": 3},
+        ]:
+            # Look the token up in DB on each request, not in the cache
+            invalidate_token(self.auth_token)
+            with CaptureQueriesContext(connection) as queries:
+                self.get("/api/v1/bookmarks/", **params)
+            query_counts.append(len(queries))
+
+        self.assertEqual(len(set(query_counts)), 1, query_counts)
+
+    def test_invalid_params(self):
+        """
+        Ensure invalid query parameters are rejected.
+        """
+        for params in [
+            {"folder": "x"},
+            {"tag": "python"},
+            {"tag_mode": "some"},
+            {"is_read": "maybe"},
+            {"created_after": "yesterday"},
+            {"ordering": "title"},
+        ]:
+            with self.subTest(params=params):
+                response = self.get("/api/v1/bookmarks/", **params)
+                self.assertEqual(response.status_code, 400)
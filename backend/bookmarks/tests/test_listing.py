@@ -0,0 +1,153 @@
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from bookmarks.models import Bookmark, Folder, Tag
+from bookmarks.pagination import BOOKMARK_KEYSET_ORDERING
+from bookmarks.renderers import ORJSONRenderer
+from bookmarks.serializers import BookmarkListSerializer
+from downloads.models import Download
+from users.models import CustomUser
+
+
+class ListingTest(APITestCase):
+    """
+    Test that the fast path of `BookmarkListView` renders the same bytes as `BookmarkListSerializer`.
+    """
+
+    username = "testuser"
+    password = "password"
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(cls.username, password=cls.password)
+        folder = Folder.objects.create(user=cls.user, title="Папка")
+        tags = [
+            Tag.objects.create(title=title) for title in ["python", "django", "python"]
+        ]
+        bookmark = Bookmark.objects.create(
+            user=cls.user,
+            url="https://hazadus.ru/",
+            title='Закладка \u2028 "quoted" </script> 🔖',
+            description="Description",
+            image_url="https://hazadus.ru/image.png",
+            folder=folder,
+            is_favorite=True,
+        )
+        bookmark.tags.add(*tags)
+        Download.objects.create(
+            bookmark=bookmark, title="Video", file="downloads/video.mp4", file_size=42
+        )
+        Download.objects.create(
+            bookmark=Bookmark.objects.create(
+                user=cls.user, url="https://hazadus.ru/2/", title="No file"
+            )
+        )
+        Bookmark.objects.create(
+            user=cls.user,
+            url="https://hazadus.ru/3/",
+            title="Same folder",
+            folder=folder,
+            is_read=True,
+            metadata_status=Bookmark.MetadataStatus.PENDING,
+        ).tags.add(tags[1])
+        Bookmark.objects.filter(title="Same folder").update(
+            created=timezone.now().replace(microsecond=0) - timedelta(days=1)
+        )
+        Bookmark.objects.create(
+            user=CustomUser.objects.create_user("otheruser"),
+            url="https://hazadus.ru/",
+            title="Other",
+        )
+
+    def setUp(self):
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": self.username, "password": self.password},
+        )
+        self.auth_token = json.loads(response.content).get("auth_token")
+
+    def get(self, **params):
+        response = self.client.get(
+            "/api/v1/bookmarks/", params, HTTP_AUTHORIZATION="Token " + self.auth_token
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def render_with_serializer(self, bookmarks):
+        return JSONRenderer().render(
+            BookmarkListSerializer(bookmarks.with_related(), many=True).data
+        )
+
+    def test_list(self):
+        """
+        Ensure the unpaginated list is byte-identical to the serializer's output.
+        """
+        bookmarks = Bookmark.objects.filter(user=self.user)
+        self.assertEqual(self.get(), self.render_with_serializer(bookmarks))
+
+    def test_page(self):
+        """
+        Ensure paginated results are byte-identical to the serializer's output, and pages are linked.
+        """
+        content = self.get(page_size=2)
+        bookmarks = Bookmark.objects.filter(user=self.user).order_by(
+            *BOOKMARK_KEYSET_ORDERING
+        )
+        self.assertTrue(
+            content.endswith(
+                b'"results":' + self.render_with_serializer(bookmarks[:2]) + b"}"
+            )
+        )
+
+        page = json.loads(content)
+        response = self.client.get(
+            page["next"], HTTP_AUTHORIZATION="Token " + self.auth_token
+        )
+        self.assertEqual(
+            [bookmark["id"] for bookmark in response.json()["results"]],
+            [bookmark.pk for bookmark in bookmarks[2:]],
+        )
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    """
+    Test `ORJSONRenderer` output is the same as of DRF's `JSONRenderer`.
+    """
+
+    def test_render(self):
+        """
+        Ensure types converted by DRF encoder, non-ASCII and JS-unsafe characters are rendered the same.
+        """
+        now = timezone.now()
+        for data in [
+            {"text": "Текст \u2028\u2029 \"'</script>", "list": [1, 2.5, None, True]},
+            {"aware": now, "naive": datetime(2023, 4, 1, 12, 30, 15, 123456)},
+            {"date": now.date(), "duration": timedelta(minutes=1)},
+            {"decimal": Decimal("1.50"), "uuid": uuid4(), "tuple": (1, 2)},
+            {"big": 2**70, 1: "non-string key"},
+            [],
+            "",
+        ]:
+            with self.subTest(data=data):
+                self.assertEqual(
+                    ORJSONRenderer().render(data), JSONRenderer().render(data)
+                )
+
+    def test_indent(self):
+        """
+        Ensure indented output falls back to the standard renderer.
+        """
+        data = {"a": [1, 2]}
+        self.assertEqual(
+            ORJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+        self.assertEqual(ORJSONRenderer().render(None), b"")
@@ -0,0 +1,70 @@
+from django.test import SimpleTestCase, override_settings
+
+from bookmarks.metadata_cache import (
+    canonicalize_url,
+    get_cache_key,
+    get_freshness_lifetime,
+)
+
+
+class CanonicalizeURLTest(SimpleTestCase):
+    """
+    Test canonical form of URLs used as metadata cache keys.
+    """
+
+    def test_canonicalize_url(self):
+        """
+        Ensure that host is lowercased, tracking params, fragment, default port and trailing slash are removed,
+        remaining query params are sorted.
+        """
+        self.assertEqual(
+            canonicalize_url(
+                "HTTPS://Bookmarks.Hazadus.RU:443/Path/?b=2&utm_source=tg&a=1&fbclid=xyz#top"
+            ),
+            "https://bookmarks.hazadus.ru/Path?a=1&b=2",
+        )
+        self.assertEqual(
+            canonicalize_url("http://hazadus.ru:8000"), "http://hazadus.ru:8000/"
+        )
+
+    def test_same_key_for_equivalent_urls(self):
+        """
+        Ensure that equivalent URLs share the cache key, and different pages don't.
+        """
+        self.assertEqual(
+            get_cache_key("https://hazadus.ru/blog/"),
+            get_cache_key("https://HAZADUS.ru/blog?utm_medium=social"),
+        )
+        self.assertNotEqual(
+            get_cache_key("https://hazadus.ru/blog/?page=1"),
+            get_cache_key("https://hazadus.ru/blog/?page=2"),
+        )
+
+
+@override_settings(URL_METADATA_CACHE_TTL=100, URL_METADATA_CACHE_MAX_TTL=1000)
+class FreshnessLifetimeTest(SimpleTestCase):
+    """
+    Test how long page metadata is considered fresh depending on response headers.
+    """
+
+    def test_freshness_lifetime(self):
+        """
+        Ensure that `Cache-Control` directives are respected, with fallback to default TTL.
+        """
+        self.assertEqual(get_freshness_lifetime({}), 100)
+        self.assertEqual(get_freshness_lifetime({"Cache-Control": "max-age=60"}), 60)
+        self.assertEqual(
+            get_freshness_lifetime(
+                {"Cache-Control": "public, s-maxage=30, max-age=60"}
+            ),
+            30,
+        )
+        self.assertEqual(
+            get_freshness_lifetime({"Cache-Control": "max-age=999999"}), 1000
+        )
+        self.assertEqual(get_freshness_lifetime({"Cache-Control": "no-cache"}), 0)
+        self.assertIsNone(get_freshness_lifetime({"Cache-Control": "no-store"}))
+        self.assertIsNone(get_freshness_lifetime({"Cache-Control": "private"}))
+        self.assertEqual(
+            get_freshness_lifetime({"Expires": "Thu, 01 Dec 1994 16:00:00 GMT"}), 0
+        )
@@ -0,0 +1,153 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from bookmarks.models import Bookmark, Folder, Tag
+from bookmarks.response_cache import get_stats
+from users.models import CustomUser
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheTest(APITestCase):
+    """
+    Test per-user cache of list endpoints' responses.
+    """
+
+    username = "testuser"
+    password = "password"
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(cls.username, password=cls.password)
+        cls.other_user = CustomUser.objects.create_user(
+            "otheruser", password=cls.password
+        )
+        cls.admin = CustomUser.objects.create_user(
+            "admin", password=cls.password, is_staff=True
+        )
+        cls.folder = Folder.objects.create(user=cls.user, title="Folder")
+        bookmark = Bookmark.objects.create(
+            user=cls.user,
+            url="https://hazadus.ru/",
+            title="Bookmark",
+            folder=cls.folder,
+        )
+        bookmark.tags.add(Tag.objects.create(title="python"))
+
+    def setUp(self):
+        cache.clear()
+        self.auth_token = self.login(self.username)
+
+    def login(self, username):
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": username, "password": self.password},
+        )
+        return json.loads(response.content).get("auth_token")
+
+    def get(self, url, auth_token=None):
+        return self.client.get(
+            url, HTTP_AUTHORIZATION="Token " + (auth_token or self.auth_token)
+        )
+
+    def test_cache_hit(self):
+        """
+        Ensure repeated requests are served from the cache without querying bookmarks, and counted.
+        """
+        for url, endpoint in [
+            ("/api/v1/bookmarks/", "bookmarks"),
+            ("/api/v1/bookmarks/?page_size=1", "bookmarks"),
+            ("/api/v1/folders/", "folders"),
+            ("/api/v1/tags/", "tags"),
+        ]:
+            first = self.get(url)
+            with CaptureQueriesContext(connection) as context:
+                second = self.get(url)
+
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second["Content-Type"], "application/json")
+            self.assertEqual(second["ETag"], first["ETag"])
+            for query in context.captured_queries:
+                self.assertNotIn('"bookmarks_bookmark"', query["sql"])
+
+        stats = get_stats()
+        self.assertEqual(stats["bookmarks"], {"hits": 2, "misses": 2, "oversized": 0})
+        self.assertEqual(stats["folders"], {"hits": 1, "misses": 1, "oversized": 0})
+        self.assertEqual(stats["tags"], {"hits": 1, "misses": 1, "oversized": 0})
+
+    def test_write_bumps_generation(self):
+        """
+        Ensure writes are visible right away: cached responses of the previous generation are not served.
+        """
+        self.get("/api/v1/folders/")
+        self.folder.title = "Renamed"
+        self.folder.save()
+
+        response = self.get("/api/v1/folders/")
+        self.assertEqual(response.json()[0]["title"], "Renamed")
+        self.assertEqual(get_stats()["folders"]["misses"], 2)
+
+    def test_users_isolated(self):
+        """
+        Ensure users never get each other's cached responses.
+        """
+        self.get("/api/v1/bookmarks/")
+        response = self.get("/api/v1/bookmarks/", self.login("otheruser"))
+        self.assertEqual(response.json(), [])
+
+    @override_settings(RESPONSE_CACHE_MAX_BYTES=10)
+    def test_oversized(self):
+        """
+        Ensure responses larger than the cap are not cached.
+        """
+        self.get("/api/v1/bookmarks/")
+        self.get("/api/v1/bookmarks/")
+        self.assertEqual(
+            get_stats()["bookmarks"], {"hits": 0, "misses": 2, "oversized": 2}
+        )
+
+    def test_single_flight(self):
+        """
+        Ensure a request waits for the entry being computed by another request holding the lock.
+        """
+        response = self.get("/api/v1/tags/")
+        (key,) = [key for key in cache._cache if ":response:" in key]
+        key = key.split(":", 2)[2]
+        entry = cache.get(key)
+        cache.delete(key)
+        cache.add(f"{key}:lock", 1)
+
+        def finish_computing(seconds):
+            cache.set(key, entry)
+            cache.delete(f"{key}:lock")
+
+        with mock.patch(
+            "bookmarks.response_cache.time.sleep", side_effect=finish_computing
+        ) as sleep:
+            self.assertEqual(self.get("/api/v1/tags/").content, response.content)
+
+        sleep.assert_called_once()
+        self.assertEqual(get_stats()["tags"]["hits"], 1)
+
+    def test_stats_api(self):
+        """
+        Ensure cache stats are available to staff users only.
+        """
+        self.get("/api/v1/tags/")
+        response = self.get("/api/v1/cache/stats/")
+        self.assertEqual(response.status_code, 403)
+
+        response = self.get("/api/v1/cache/stats/", self.login("admin"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["tags"]["misses"], 1)
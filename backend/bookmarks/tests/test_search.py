@@ -0,0 +1,165 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from bookmarks.models import Bookmark, Tag
+from users.models import CustomUser
+
+
+class BookmarkSearchTest(APITestCase):
+    """
+    Test full-text search over bookmarks.
+    """
+
+    username = "testuser"
+    password = "password"
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(cls.username, password=cls.password)
+        cls.other_user = CustomUser.objects.create_user(
+            "otheruser", password=cls.password
+        )
+        cls.django = Bookmark.objects.create(
+            user=cls.user,
+            url="https://www.djangoproject.com/",
+            title="Django web framework",
+            description="The web framework for perfectionists with deadlines.",
+        )
+        cls.python = Bookmark.objects.create(
+            user=cls.user,
+            url="https://www.python.org/",
+            title="Python",
+            description="Python is a programming language <b>that</b> lets you work quickly, e.g. with Django.",
+        )
+        cls.python.tags.add(Tag.objects.create(title="scripting"))
+        Bookmark.objects.create(
+            user=cls.other_user,
+            url="https://docs.djangoproject.com/",
+            title="Django documentation",
+        )
+
+    def setUp(self):
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": self.username, "password": self.password},
+        )
+        self.auth_token = json.loads(response.content).get("auth_token")
+
+    def search(self, query, **params):
+        response = self.client.get(
+            "/api/v1/bookmarks/search/",
+            {"q": query, **params},
+            HTTP_AUTHORIZATION="Token " + self.auth_token,
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def search_ids(self, query):
+        return [bookmark["id"] for bookmark in self.search(query)]
+
+    def test_search(self):
+        """
+        Ensure user's bookmarks are found by words of any indexed field and ranked with title matches first.
+        """
+        self.assertEqual(self.search_ids("django "), [self.django.pk, self.python.pk])
+        self.assertEqual(self.search_ids("perfectionists "), [self.django.pk])
+        self.assertEqual(self.search_ids("python org "), [self.python.pk])
+        self.assertEqual(self.search_ids("scripting "), [self.python.pk])
+        self.assertEqual(self.search_ids("django python "), [self.python.pk])
+        self.assertEqual(self.search_ids("documentation "), [])
+
+    def test_prefix_search(self):
+        """
+        Ensure the last word is matched as a prefix, unless the query ends with a space.
+        """
+        self.assertEqual(self.search_ids("fram"), [self.django.pk])
+        self.assertEqual(self.search_ids("web fr"), [self.django.pk])
+        self.assertEqual(self.search_ids("fram "), [])
+
+    def test_highlights(self):
+        """
+        Ensure matches are highlighted in title and snippet, and indexed text is HTML-escaped.
+        """
+        (result,) = self.search("lang")
+        self.assertEqual(result["title_highlight"], "Python")
+        self.assertIn("<mark>language</mark>", result["snippet"])
+        self.assertIn("&lt;b&gt;that&lt;/b&gt;", result["snippet"])
+        self.assertIsInstance(result["rank"], float)
+
+        (result,) = self.search("perfectionists")
+        self.assertEqual(result["title_highlight"], "Django web framework")
+
+        (result,) = self.search("scripting ")
+        self.assertEqual(result["snippet"], "<mark>scripting</mark>")
+
+    def test_query_syntax_is_literal(self):
+        """
+        Ensure FTS5 syntax in the query is searched for literally.
+        """
+        self.assertEqual(self.search_ids('"web" OR NEAR(python'), [])
+        self.assertEqual(self.search_ids("web* -framework:"), [self.django.pk])
+        self.assertEqual(self.search_ids("  "), [])
+
+    def test_owner_token_not_searched(self):
+        """
+        Ensure search terms don't match the owner column of the index.
+        """
+        self.assertEqual(self.search_ids(f"u{self.user.pk}"), [])
+        self.assertEqual(self.search_ids(f"u{self.user.pk} django"), [])
+
+    def test_index_sync(self):
+        """
+        Ensure the index follows changes of bookmarks, their tags and tags themselves, including bulk ones.
+        """
+        self.django.title = "Flask"
+        self.django.save()
+        self.assertEqual(self.search_ids("flask"), [self.django.pk])
+
+        Bookmark.objects.filter(pk=self.django.pk).update(description="Microframework")
+        self.assertEqual(self.search_ids("microframework"), [self.django.pk])
+        self.assertEqual(self.search_ids("perfectionists"), [])
+
+        tag = Tag.objects.create(title="backend")
+        self.django.tags.add(tag)
+        self.assertEqual(self.search_ids("backend"), [self.django.pk])
+        tag.title = "server"
+        tag.save()
+        self.assertEqual(self.search_ids("server"), [self.django.pk])
+        self.django.tags.remove(tag)
+        self.assertEqual(self.search_ids("server"), [])
+
+        Bookmark.objects.create(
+            user=self.user, url="https://flask.palletsprojects.com/", title="Flask"
+        )
+        self.assertEqual(len(self.search_ids("flask")), 2)
+        self.django.delete()
+        self.assertEqual(len(self.search_ids("flask")), 1)
+
+    def test_limit(self):
+        """
+        Ensure number of results is limited, and invalid limits are rejected.
+        """
+        self.assertEqual(len(self.search("django", limit=1)), 1)
+        for limit in ["0", "x", "1000"]:
+            response = self.client.get(
+                "/api/v1/bookmarks/search/",
+                {"q": "django", "limit": limit},
+                HTTP_AUTHORIZATION="Token " + self.auth_token,
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_search_index(self):
+        """
+        Ensure `rebuild_search_index` command restores missing index entries.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM bookmarks_bookmark_fts")
+        self.assertEqual(self.search_ids("django"), [])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search_ids("django "), [self.django.pk, self.python.pk])
@@ -0,0 +1,131 @@
+import json
+
+from rest_framework.test import APITestCase
+
+from bookmarks.models import Bookmark, Folder, Tag
+from downloads.models import Download
+from users.models import CustomUser
+
+
+class BookmarkSyncAPITest(APITestCase):
+    """
+    Test delta sync of bookmarks with `BookmarkSyncView`.
+    """
+
+    url = "/api/v1/bookmarks/sync/"
+    username = "testuser"
+    password = "password"
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(cls.username, password=cls.password)
+        cls.folder = Folder.objects.create(user=cls.user, title="Folder")
+        cls.bookmarks = [
+            Bookmark.objects.create(
+                user=cls.user,
+                url="https://hazadus.ru/",
+                title=f"Bookmark #{i}",
+                folder=cls.folder if i < 3 else None,
+            )
+            for i in range(0, 6)
+        ]
+
+    def setUp(self):
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": self.username, "password": self.password},
+        )
+        self.auth_token = json.loads(response.content).get("auth_token")
+
+    def sync(self, since=None) -> dict:
+        response = self.client.get(
+            self.url,
+            {} if since is None else {"since": since},
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertChanges(self, since: int, changed: list, deleted: list) -> int:
+        """
+        Check that sync since `since` returns exactly `changed` and `deleted` bookmarks; return the new watermark.
+        """
+        data = self.sync(since)
+        self.assertEqual(
+            sorted(bookmark["id"] for bookmark in data["bookmarks"]),
+            sorted(bookmark.pk for bookmark in changed),
+        )
+        self.assertEqual(
+            sorted(data["deleted"]), sorted(bookmark.pk for bookmark in deleted)
+        )
+        self.assertGreaterEqual(data["watermark"], since)
+        return data["watermark"]
+
+    def test_initial_sync(self):
+        """
+        Ensure all bookmarks are returned without `since`, and nothing is returned since the watermark.
+        """
+        data = self.sync()
+        self.assertEqual(len(data["bookmarks"]), len(self.bookmarks))
+        self.assertEqual(data["deleted"], [])
+        self.assertChanges(data["watermark"], changed=[], deleted=[])
+
+    def test_changes_are_captured(self):
+        """
+        Ensure updates, tag changes, folder changes, downloads and deletions are returned by the next sync.
+        """
+        first, second, third, fourth, fifth, sixth = self.bookmarks
+        watermark = self.sync()["watermark"]
+
+        response = self.client.patch(
+            f"/api/v1/bookmarks/update/{fourth.pk}/",
+            {"title": "New title"},
+            format="json",
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        self.assertEqual(response.status_code, 200)
+        fifth.tags.add(Tag.objects.create(title="python"))
+        Download.objects.create(bookmark=sixth, title="Video")
+        watermark = self.assertChanges(
+            watermark, changed=[fourth, fifth, sixth], deleted=[]
+        )
+
+        self.folder.title = "Renamed"
+        self.folder.save()
+        watermark = self.assertChanges(
+            watermark, changed=[first, second, third], deleted=[]
+        )
+
+        response = self.client.delete(
+            f"/api/v1/bookmarks/delete/{first.pk}/",
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        self.assertEqual(response.status_code, 204)
+        response = self.client.delete(
+            f"/api/v1/folders/delete/{self.folder.pk}/",
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        self.assertEqual(response.status_code, 204)
+        Bookmark.objects.filter(pk=sixth.pk).delete()
+        self.assertChanges(watermark, changed=[second, third], deleted=[first, sixth])
+
+    def test_invalid_since(self):
+        """
+        Ensure invalid `since` is rejected.
+        """
+        response = self.client.get(
+            self.url,
+            {"since": "yesterday"},
+            **{"HTTP_AUTHORIZATION": "Token " + self.auth_token},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_user_deletion(self):
+        """
+        Ensure user with bookmarks, downloads and sync records can be deleted.
+        """
+        Download.objects.create(bookmark=self.bookmarks[0], title="Video")
+        self.bookmarks[1].delete()
+        self.user.delete()
+        self.assertFalse(Bookmark.objects.exists())
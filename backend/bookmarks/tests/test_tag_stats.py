@@ -0,0 +1,162 @@
+import json
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from bookmarks.counters import find_stale_tag_stats
+from bookmarks.importers import import_chunk
+from bookmarks.models import Bookmark, Folder, Tag, UserTagStat
+from bookmarks.sync import get_change_seq
+from users.models import CustomUser
+
+
+class UserTagStatsTest(APITestCase):
+    """
+    Test maintenance of per-user tag statistics and tag list built from them.
+    """
+
+    username = "testuser"
+    password = "password"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(cls.username, password=cls.password)
+        cls.other_user = CustomUser.objects.create_user(
+            "otheruser", password=cls.password
+        )
+        cls.python, cls.django, cls.vue = [
+            Tag.objects.create(title=title) for title in ("python", "django", "vue")
+        ]
+
+    def create_bookmark(self, user, tags) -> Bookmark:
+        bookmark = Bookmark.objects.create(
+            user=user, url="https://hazadus.ru/", title="Bookmark"
+        )
+        bookmark.tags.add(*tags)
+        return bookmark
+
+    def get_stats(self, user) -> dict:
+        return dict(
+            UserTagStat.objects.filter(user=user).values_list(
+                "tag__title", "bookmarks_qty"
+            )
+        )
+
+    def test_stats_follow_tag_changes(self):
+        """
+        Ensure statistics are updated on adding, removing, clearing tags and deleting bookmarks,
+        and rows are removed once tag is not used by the user.
+        """
+        bookmark = self.create_bookmark(self.user, [self.python, self.django])
+        self.create_bookmark(self.user, [self.python])
+        self.create_bookmark(self.other_user, [self.python, self.vue])
+        self.assertEqual(self.get_stats(self.user), {"python": 2, "django": 1})
+
+        # Adding already linked tag and removing not linked one change nothing:
+        bookmark.tags.add(self.python)
+        bookmark.tags.remove(self.vue)
+        self.assertEqual(self.get_stats(self.user), {"python": 2, "django": 1})
+
+        bookmark.tags.remove(self.django)
+        self.assertEqual(self.get_stats(self.user), {"python": 2})
+
+        self.vue.bookmarks.add(bookmark)
+        bookmark.tags.set([self.django])
+        self.assertEqual(self.get_stats(self.user), {"python": 1, "django": 1})
+
+        bookmark.tags.clear()
+        Bookmark.objects.filter(user=self.user).delete()
+        self.assertEqual(self.get_stats(self.user), {})
+        self.assertEqual(self.get_stats(self.other_user), {"python": 1, "vue": 1})
+        self.assertEqual(find_stale_tag_stats(), {})
+
+    def test_cascade_delete(self):  # noqa: max-complexity: 4
+        """
+        Ensure statistics of bookmarks deleted with their folder are adjusted with a number of queries which
+        doesn't depend on the number of bookmarks, and are not updated when the user is deleted.
+        """
+        query_counts = []
+        for qty in (1, 3):
+            folder = Folder.objects.create(user=self.user, title=f"Folder {qty}")
+            for i in range(qty):
+                bookmark = self.create_bookmark(self.user, [self.python, self.django])
+                bookmark.folder = folder
+                bookmark.save()
+            self.create_bookmark(self.user, [self.python])
+
+            with CaptureQueriesContext(connection) as queries:
+                folder.delete()
+            query_counts.append(
+                len([q for q in queries if "bookmarks_usertagstat" in q["sql"]])
+            )
+            self.assertEqual(find_stale_tag_stats(), {})
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(self.get_stats(self.user), {"python": 2})
+
+        with CaptureQueriesContext(connection) as queries:
+            CustomUser.objects.get(pk=self.user.pk).delete()
+        for query in queries:
+            self.assertFalse(query["sql"].startswith('UPDATE "bookmarks_usertagstat"'))
+        self.assertEqual(self.get_stats(self.user), {})
+
+    def test_bulk_import(self):
+        """
+        Ensure tag links inserted in bulk by importer are counted.
+        """
+        item = {
+            "url": "https://hazadus.ru/",
+            "title": "Bookmark",
+            "description": None,
+            "folder": None,
+            "tags": ["python", "new tag"],
+            "is_favorite": False,
+            "is_read": False,
+            "is_archived": False,
+        }
+        import_chunk(self.user, [item, {**item, "tags": ["python"]}])
+        self.assertEqual(self.get_stats(self.user), {"python": 2, "new tag": 1})
+
+    def test_tag_list_api(self):
+        """
+        Ensure `TagListView` returns only user's tags with user's bookmark counts.
+        """
+        self.create_bookmark(self.user, [self.python, self.django])
+        self.create_bookmark(self.user, [self.python])
+        self.create_bookmark(self.other_user, [self.python, self.vue])
+
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": self.username, "password": self.password},
+        )
+        auth_token = json.loads(response.content).get("auth_token")
+        response = self.client.get(
+            "/api/v1/tags/",
+            **{"HTTP_AUTHORIZATION": "Token " + auth_token},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(tag["title"], tag["bookmarks_qty"]) for tag in response.data],
+            [("django", 1), ("python", 2)],
+        )
+
+    def test_rebuild_command(self):
+        """
+        Ensure `rebuild_tag_stats` command reports and fixes stale statistics, bumping collection versions
+        of their users only.
+        """
+        self.create_bookmark(self.user, [self.python])
+        UserTagStat.objects.all().delete()
+        UserTagStat.objects.create(user=self.user, tag=self.vue, bookmarks_qty=3)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_tag_stats", "--check", stdout=StringIO())
+
+        change_seqs = [get_change_seq(user.pk) for user in (self.user, self.other_user)]
+        call_command("rebuild_tag_stats", stdout=StringIO())
+        self.assertEqual(self.get_stats(self.user), {"python": 1})
+        self.assertGreater(get_change_seq(self.user.pk), change_seqs[0])
+        self.assertEqual(get_change_seq(self.other_user.pk), change_seqs[1])
+        call_command("rebuild_tag_stats", "--check", stdout=StringIO())
@@ -0,0 +1,108 @@
+from unittest import mock
+
+import requests
+from django.test import TestCase
+
+from bookmarks.models import Bookmark
+from bookmarks.tasks import enrich_bookmark_metadata
+from users.models import CustomUser
+
+
+class EnrichBookmarkMetadataTaskTest(TestCase):
+    """
+    Test `enrich_bookmark_metadata` Celery task.
+    """
+
+    url = "https://bookmarks.hazadus.ru"
+    new_user = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.new_user = CustomUser.objects.create_user("testuser", password="password")
+
+    def create_pending_bookmark(self, title: str = url) -> Bookmark:
+        """
+        Create bookmark waiting for metadata.
+        """
+        return Bookmark.objects.create(
+            title=title,
+            url=self.url,
+            user=self.new_user,
+            metadata_status=Bookmark.MetadataStatus.PENDING,
+        )
+
+    @mock.patch("bookmarks.tasks.get_url_info")
+    def test_metadata_filled_in(self, get_url_info):
+        """
+        Ensure that title, description and image URL are saved, and the status is set to "completed".
+        """
+        get_url_info.return_value = ["Title", "Description", "https://img.ru/1.png"]
+        bookmark = self.create_pending_bookmark()
+
+        enrich_bookmark_metadata.apply(kwargs={"bookmark_id": bookmark.pk})
+
+        bookmark.refresh_from_db()
+        self.assertEqual(bookmark.title, "Title")
+        self.assertEqual(bookmark.description, "Description")
+        self.assertEqual(bookmark.image_url, "https://img.ru/1.png")
+        self.assertEqual(bookmark.metadata_status, Bookmark.MetadataStatus.COMPLETED)
+
+    @mock.patch("bookmarks.tasks.get_url_info")
+    def test_edited_fields_preserved(self, get_url_info):
+        """
+        Ensure that title, description and image URL edited by user while metadata was pending are not overwritten,
+        and empty ones are filled in.
+        """
+        get_url_info.return_value = ["Title", "Description", "https://img.ru/1.png"]
+        bookmark = self.create_pending_bookmark(title="My title")
+
+        enrich_bookmark_metadata.apply(kwargs={"bookmark_id": bookmark.pk})
+
+        bookmark.refresh_from_db()
+        self.assertEqual(bookmark.title, "My title")
+        self.assertEqual(bookmark.description, "Description")
+        self.assertEqual(bookmark.image_url, "https://img.ru/1.png")
+
+        bookmark = self.create_pending_bookmark()
+        Bookmark.objects.filter(pk=bookmark.pk).update(
+            description="My description", image_url="https://img.ru/my.png"
+        )
+
+        enrich_bookmark_metadata.apply(kwargs={"bookmark_id": bookmark.pk})
+
+        bookmark.refresh_from_db()
+        self.assertEqual(bookmark.title, "Title")
+        self.assertEqual(bookmark.description, "My description")
+        self.assertEqual(bookmark.image_url, "https://img.ru/my.png")
+
+    @mock.patch("bookmarks.tasks.get_url_info")
+    def test_status_failed_after_retries(self, get_url_info):
+        """
+        Ensure that status is set to "failed" when the page can't be fetched.
+        """
+        get_url_info.side_effect = requests.ConnectionError()
+        bookmark = self.create_pending_bookmark()
+
+        enrich_bookmark_metadata.apply(
+            kwargs={"bookmark_id": bookmark.pk},
+            retries=enrich_bookmark_metadata.max_retries,
+        )
+
+        bookmark.refresh_from_db()
+        self.assertEqual(bookmark.title, self.url)
+        self.assertEqual(bookmark.metadata_status, Bookmark.MetadataStatus.FAILED)
+
+    @mock.patch("bookmarks.tasks.get_url_info")
+    def test_status_failed_on_unexpected_error(self, get_url_info):
+        """
+        Ensure that status is set to "failed" without retries when the page can't be parsed.
+        """
+        get_url_info.side_effect = UnicodeDecodeError("utf-8", b"\xff", 0, 1, "")
+        bookmark = self.create_pending_bookmark()
+
+        with self.assertLogs("bookmarks.tasks", "ERROR"):
+            result = enrich_bookmark_metadata.apply(kwargs={"bookmark_id": bookmark.pk})
+
+        self.assertTrue(result.successful())
+        bookmark.refresh_from_db()
+        self.assertEqual(bookmark.metadata_status, Bookmark.MetadataStatus.FAILED)
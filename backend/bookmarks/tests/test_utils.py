@@ -0,0 +1,96 @@
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from bookmarks.utils import detect_encoding, extract_head_metadata
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "html"
+
+
+def iter_chunks(content: bytes, chunk_size: int, consumed: list):
+    """
+    Yield `content` in chunks of `chunk_size` bytes, appending size of each yielded chunk to `consumed`.
+    """
+    for start in range(0, len(content), chunk_size):
+        end = start + chunk_size
+        chunk = content[start:end]
+        consumed.append(len(chunk))
+        yield chunk
+
+
+class ExtractHeadMetadataTest(SimpleTestCase):
+    """
+    Test streaming head-only HTML metadata parser.
+    """
+
+    def get_metadata(self, fixture: str, chunk_size: int = 7, **kwargs) -> list:
+        """
+        Return metadata extracted from HTML `fixture` fed in small chunks.
+        """
+        content = (FIXTURES_DIR / fixture).read_bytes()
+        return extract_head_metadata(iter_chunks(content, chunk_size, []), **kwargs)
+
+    def test_og_metadata(self):
+        """
+        Ensure that title (with entities decoded and whitespace collapsed), `og:description` and `og:image`
+        are extracted, and tags in the body are ignored.
+        """
+        self.assertEqual(
+            self.get_metadata("article_og.html"),
+            [
+                "Dockerize Vue.js App — Vue.js Cookbook",
+                "Learn how to build a Docker image for your Vue.js app & serve it with nginx.",
+                "https://vuejs.org/images/logo.png",
+            ],
+        )
+
+    def test_charset_from_meta(self):
+        """
+        Ensure that encoding is taken from `<meta http-equiv>` if not set in `Content-Type` header.
+        """
+        title, description, image_url = self.get_metadata("cp1251_http_equiv.html")
+        self.assertEqual(title, "Закладки «Хабр»")
+        self.assertEqual(description, "Статья о том, как хранить закладки.")
+
+    def test_charset_from_header(self):
+        """
+        Ensure that charset from `Content-Type` header takes precedence over `<meta charset>`.
+        """
+        self.assertEqual(
+            detect_encoding("text/html; charset=KOI8-R", b'<meta charset="utf-8">'),
+            "koi8-r",
+        )
+        self.assertEqual(detect_encoding("text/html", b"<html>"), "utf-8")
+        self.assertEqual(detect_encoding("text/html; charset=bogus", b""), "utf-8")
+
+    def test_missing_tags(self):
+        """
+        Ensure that pages without head/body tags or without title are handled.
+        """
+        self.assertEqual(
+            self.get_metadata("no_head_tags.html"),
+            [
+                "Minimal page without head and body tags",
+                "",
+                "https://hazadus.ru/og.png",
+            ],
+        )
+        self.assertEqual(
+            self.get_metadata("no_title.html"),
+            ["Unknown Title", "Page without title", ""],
+        )
+
+    def test_stops_after_head(self):
+        """
+        Ensure that chunks past the end of the head are not consumed, and reading stops at `max_bytes`.
+        """
+        content = (FIXTURES_DIR / "article_og.html").read_bytes()
+        content += b"<p>Lorem ipsum</p>" * 100_000
+        consumed = []
+        extract_head_metadata(iter_chunks(content, 1024, consumed))
+        self.assertLess(sum(consumed), 4096)
+
+        consumed = []
+        endless_head = b"<html><head>" + b'<meta name="x" content="y">' * 100_000
+        extract_head_metadata(iter_chunks(endless_head, 1024, consumed), max_bytes=2048)
+        self.assertEqual(sum(consumed), 2048)
@@ -2,15 +2,23 @@ from django.urls import path
 
 from .views import (
     BookmarkDeleteView,
+    BookmarkExportView,
     BookmarkListView,
+    BookmarkMetadataView,
+    BookmarkSearchView,
+    BookmarkSyncView,
     BookmarkUpdateView,
     FolderDeleteView,
     FolderListView,
     FolderUpdateView,
+    ImportJobDetailView,
     TagListView,
+    bookmark_bulk,
     bookmark_create_from_telegram,
     bookmark_create_from_web,
+    bookmark_import,
     folder_create,
+    response_cache_stats,
 )
 
 urlpatterns = [
@@ -20,8 +28,16 @@ urlpatterns = [
     path("folders/update/<int:pk>/", FolderUpdateView.as_view()),
     path("folders/delete/<int:pk>/", FolderDeleteView.as_view()),
     path("bookmarks/", BookmarkListView.as_view()),
+    path("bookmarks/sync/", BookmarkSyncView.as_view()),
+    path("bookmarks/search/", BookmarkSearchView.as_view()),
     path("bookmarks/create_from_telegram/", bookmark_create_from_telegram),
     path("bookmarks/create/", bookmark_create_from_web),
+    path("bookmarks/metadata/<int:pk>/", BookmarkMetadataView.as_view()),
     path("bookmarks/update/<int:pk>/", BookmarkUpdateView.as_view()),
     path("bookmarks/delete/<int:pk>/", BookmarkDeleteView.as_view()),
+    path("bookmarks/bulk/", bookmark_bulk),
+    path("bookmarks/import/", bookmark_import),
+    path("bookmarks/import/<int:pk>/", ImportJobDetailView.as_view()),
+    path("bookmarks/export/<str:export_format>/", BookmarkExportView.as_view()),
+    path("cache/stats/", response_cache_stats),
 ]
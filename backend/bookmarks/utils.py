@@ -1,23 +1,197 @@
-from typing import List
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional
 
 import requests
-from bs4 import BeautifulSoup
 
+# Stop reading the page after this many bytes even if `</head>` wasn't found yet
+HEAD_MAX_BYTES = 512 * 1024
+# Size of chunks the page is downloaded with
+CHUNK_SIZE = 16 * 1024
+# Number of bytes to look for `<meta charset>` in, if there's no charset in `Content-Type` header.
+# Reference: https://html.spec.whatwg.org/multipage/parsing.html#prescan-a-byte-stream-to-determine-its-encoding
+PRESCAN_BYTES = 1024
+DEFAULT_ENCODING = "utf-8"
 
-def parse_url_info(url: str) -> List[str]:
+META_CHARSET_RE = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-z0-9_.:-]+)""", re.IGNORECASE
+)
+CONTENT_TYPE_CHARSET_RE = re.compile(
+    r"""charset\s*=\s*["']?([a-z0-9_.:-]+)""", re.IGNORECASE
+)
+
+
+def parse_url_info(url: str, timeout: float = 10) -> List[str]:
     """
     Parse meta tag contents from `url`.
-    Reference: https://stackoverflow.com/questions/36768068/get-meta-tag-content-property-with-beautifulsoup-and-python
+    The page is downloaded in chunks, and only until the end of `<head>` - see `extract_head_metadata()`.
+    Raise `requests.RequestException` if the page can't be fetched within `timeout` seconds.
+    """
+    with requests.get(url, timeout=timeout, stream=True) as response:
+        return extract_response_metadata(response)
+
+
+def extract_response_metadata(response: requests.Response) -> List[str]:
+    """
+    Return title, `og:description` and `og:image` contents from streamed `response`.
+    """
+    return extract_head_metadata(
+        response.iter_content(chunk_size=CHUNK_SIZE),
+        content_type=response.headers.get("Content-Type", ""),
+    )
+
+
+def parse_html_info(content: bytes, content_type: str = "") -> List[str]:
+    """
+    Return title, `og:description` and `og:image` contents from HTML page `content`.
+    """
+    return extract_head_metadata([content], content_type=content_type)
+
+
+def extract_head_metadata(  # noqa: max-complexity: 6
+    chunks: Iterable[bytes],
+    content_type: str = "",
+    max_bytes: int = HEAD_MAX_BYTES,
+) -> List[str]:
+    """
+    Return title, `og:description` and `og:image` contents from HTML page coming in `chunks` of bytes.
+
+    Chunks are decoded and parsed incrementally, and consumed only until `</head>` (or `<body>`) is reached, or
+    `max_bytes` are read - metadata lives in the head, so there's no need to download and parse the whole page.
+    Page encoding is taken from `content_type` header, or from `<meta charset>` in the first bytes of the page.
+    """
+    parser = HeadMetadataParser()
+    decoder = None
+    buffer = b""
+    bytes_read = 0
+
+    for chunk in chunks:
+        bytes_read += len(chunk)
+        if decoder is None:
+            # Hold the data until there's enough of it to look for `<meta charset>`
+            buffer += chunk
+            if len(buffer) < PRESCAN_BYTES and bytes_read < max_bytes:
+                continue
+            decoder = get_incremental_decoder(content_type, buffer)
+            chunk, buffer = buffer, b""
+
+        parser.feed(decoder.decode(chunk))
+        if parser.done or bytes_read >= max_bytes:
+            break
+
+    if decoder is None:
+        # The page is shorter than `PRESCAN_BYTES`
+        decoder = get_incremental_decoder(content_type, buffer)
+        parser.feed(decoder.decode(buffer))
+
+    return parser.get_info()
+
+
+def get_incremental_decoder(
+    content_type: str, head: bytes
+) -> codecs.IncrementalDecoder:
+    """
+    Return incremental decoder for the page encoding detected from `content_type` header or the `head` of the page.
     """
-    request = requests.get(url)
-    html = BeautifulSoup(request.content, "html.parser")
+    return codecs.getincrementaldecoder(detect_encoding(content_type, head))(
+        errors="replace"
+    )
 
-    title = html.title.string if html.title else "Unknown Title"
-    description = html.find("meta", property="og:description")
-    image_url = html.find("meta", property="og:image")
 
-    return [
-        title if title else "No title set",
-        description["content"] if description else "",
-        image_url["content"] if image_url else "",
-    ]
+def detect_encoding(content_type: str, head: bytes) -> str:  # noqa: max-complexity: 5
+    """
+    Return encoding of the page: BOM takes precedence, then charset from `Content-Type` header,
+    then `<meta charset>` or `<meta http-equiv="Content-Type">` found in the `head` bytes.
+    Fall back to UTF-8 if encoding is not set or unknown.
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+
+    label = None
+    if match := CONTENT_TYPE_CHARSET_RE.search(content_type or ""):
+        label = match.group(1)
+    elif match := META_CHARSET_RE.search(head[:PRESCAN_BYTES]):
+        label = match.group(1).decode("ascii")
+
+    return normalize_encoding(label)
+
+
+def normalize_encoding(label: Optional[str]) -> str:
+    """
+    Return Python codec name for encoding `label`, or the default encoding if it's unknown.
+    """
+    try:
+        name = codecs.lookup(label).name if label else DEFAULT_ENCODING
+    except LookupError:
+        return DEFAULT_ENCODING
+    # Browsers treat Latin-1 as its superset, Windows-1252:
+    return "cp1252" if name in ("latin-1", "iso8859-1", "ascii") else name
+
+
+class HeadMetadataParser(HTMLParser):
+    """
+    Incremental HTML parser collecting page title, `og:description` and `og:image`.
+    Sets `done` once the end of the page head is reached - no need to feed the rest of the page.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.done = False
+        self.in_title = False
+        self.title_parts = []
+        self.title = None
+        self.meta = {}
+
+    def handle_starttag(self, tag, attrs):  # noqa: max-complexity: 5
+        """
+        Start collecting title text; remember OpenGraph meta tags; stop at `<body>`.
+        Tags past the head are ignored - they still may come in the last chunk fed to the parser.
+        """
+        if self.done:
+            return
+        if tag == "title" and self.title is None:
+            self.in_title = True
+        elif tag == "meta":
+            attributes = dict(attrs)
+            self.meta.setdefault(attributes.get("property"), attributes.get("content"))
+        elif tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag):
+        """
+        Finish collecting title text; stop at `</head>`.
+        """
+        if tag == "title" and self.in_title:
+            self.in_title = False
+            self.title = "".join(self.title_parts)
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        """
+        Collect title text.
+        """
+        if self.in_title:
+            self.title_parts.append(data)
+
+    def get_info(self) -> List[str]:
+        """
+        Return title, description and image URL, same as `parse_url_info()`.
+        """
+        title = self.title if self.title is not None else "".join(self.title_parts)
+        title = " ".join(title.split())
+        has_title = self.title is not None or self.in_title
+
+        return [
+            (title or "No title set") if has_title else "Unknown Title",
+            self.meta.get("og:description") or "",
+            self.meta.get("og:image") or "",
+        ]
+
+
+def placeholder_title(url: str) -> str:
+    """
+    Return title assigned to new bookmarks until `enrich_bookmark_metadata` task fetches the real one.
+    """
+    return url[:256]
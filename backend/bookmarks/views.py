@@ -1,28 +1,50 @@
-from django.db.models import Count, Q
-from rest_framework import authentication, permissions, status
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import permissions, status
 from rest_framework.decorators import (
     api_view,
     authentication_classes,
     permission_classes,
 )
-from rest_framework.generics import DestroyAPIView, UpdateAPIView
+from rest_framework.generics import DestroyAPIView, RetrieveAPIView, UpdateAPIView
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Bookmark, Folder, Tag
+from users.authentication import CachedTokenAuthentication
+
+from .bulk import apply_bulk_operation
+from .conditional import conditional_on_collection_version
+from .counters import adjust_folder_counters
+from .exporters import EXPORT_FORMATS, accepts_gzip, encode, gzip_stream
+from .listing import get_bookmark_rows, serialize_bookmarks
+from .models import Bookmark, Folder, ImportJob, Tag
+from .pagination import BookmarkCursorPagination
 from .permissions import IsOwnerOnly
+from .renderers import IgnoreClientContentNegotiation, ORJSONRenderer
+from .response_cache import cache_response, get_stats
+from .search import SEARCH_MAX_RESULTS, is_search_supported, search_bookmarks
 from .serializers import (
+    BookmarkBulkSerializer,
     BookmarkCreateFromTelegramSerializer,
     BookmarkCreateFromWebSerializer,
+    BookmarkListFilterSerializer,
     BookmarkListSerializer,
+    BookmarkMetadataSerializer,
+    BookmarkSearchResultSerializer,
     BookmarkUpdateSerializer,
+    FieldsetSerializer,
     FolderCreateSerializer,
     FolderListSerializer,
     FolderSerializer,
+    ImportJobCreateSerializer,
+    ImportJobSerializer,
     TagListSerializer,
 )
-from .utils import parse_url_info
+from .sync import get_changes, next_change_seq
+from .tasks import process_import, schedule_metadata_enrichment
 
 
 class TagListView(APIView):
@@ -30,30 +52,32 @@ class TagListView(APIView):
     List all Tags applied to user's bookmarks.
     """
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
 
     @staticmethod
+    @conditional_on_collection_version
+    @cache_response("tags")
     def get(request: Request) -> Response:
         """
         Return all Tags applied to user's bookmarks.
-        Tags are annotated with `bookmarks_qty` - count of user's bookmarks marked with each tag.
+        Tags are annotated with `bookmarks_qty` - count of user's bookmarks marked with each tag, taken from
+        `UserTagStat`, so only this user's statistics rows are read.
         """
+        fieldset = FieldsetSerializer(
+            data=request.query_params, context={"serializer_class": TagListSerializer}
+        )
+        if not fieldset.is_valid():
+            return Response(fieldset.errors, status=status.HTTP_400_BAD_REQUEST)
+
         tags = (
-            Tag.objects.filter(
-                bookmarks__user_id__exact=request.user.pk,
-            )
-            .annotate(
-                bookmarks_qty=Count(
-                    "bookmarks",
-                    filter=Q(
-                        bookmarks__user_id__exact=request.user.pk,
-                    ),
-                ),
-            )
+            Tag.objects.filter(user_stats__user_id=request.user.pk)
+            .annotate(bookmarks_qty=F("user_stats__bookmarks_qty"))
+            .only(*fieldset.get_model_field_names(Tag))
             .order_by("title")
         )
-        serializer = TagListSerializer(tags, many=True)
+        serializer = TagListSerializer(tags, many=True, **fieldset.validated_data)
         return Response(serializer.data)
 
 
@@ -62,39 +86,39 @@ class FolderListView(APIView):
     List all user's Folders.
     """
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [
         permissions.IsAuthenticated,
         IsOwnerOnly,
     ]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
 
     @staticmethod
+    @conditional_on_collection_version
+    @cache_response("folders")
     def get(request: Request) -> Response:
         """
         Return all user's Folders.
-        Folders are annotated with `bookmarks_qty` - count of bookmarks in each folder.
+        `bookmarks_qty` - count of non-archived bookmarks in each folder - is stored with the folder.
         """
+        fieldset = FieldsetSerializer(
+            data=request.query_params,
+            context={"serializer_class": FolderListSerializer},
+        )
+        if not fieldset.is_valid():
+            return Response(fieldset.errors, status=status.HTTP_400_BAD_REQUEST)
+
         folders = (
             Folder.objects.filter(user_id__exact=request.user.pk)
-            .annotate(
-                bookmarks_qty=Count(
-                    "bookmarks",
-                    filter=Q(
-                        bookmarks__user_id__exact=request.user.pk,
-                    )
-                    & Q(
-                        bookmarks__is_archived=False,
-                    ),
-                ),
-            )
+            .only(*fieldset.get_model_field_names(Folder))
             .order_by("title")
         )
-        serializer = FolderListSerializer(folders, many=True)
+        serializer = FolderListSerializer(folders, many=True, **fieldset.validated_data)
         return Response(serializer.data)
 
 
 @api_view(["POST"])
-@authentication_classes([authentication.TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([permissions.IsAuthenticated])
 def folder_create(request: Request) -> Response:
     """
@@ -121,7 +145,7 @@ class FolderUpdateView(UpdateAPIView):
     Partially update folder data. Return updated data.
     """
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [
         permissions.IsAuthenticated,
         IsOwnerOnly,
@@ -133,10 +157,11 @@ class FolderUpdateView(UpdateAPIView):
 
 class FolderDeleteView(DestroyAPIView):
     """
-    Delete the folder. Set `folder=None` for all bookmarks in the folder.
+    Delete the folder. Set `folder=None` for all bookmarks in the folder, or move them to another user's folder
+    passed in `move_to` query parameter.
     """
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [
         permissions.IsAuthenticated,
         IsOwnerOnly,
@@ -145,45 +170,180 @@ class FolderDeleteView(DestroyAPIView):
     queryset = Folder.objects.all()
     serializer_class = FolderSerializer
 
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
         """
-        Set `folder=None` for all bookmarks in the folder before actually deleting it.
+        Move all bookmarks out of the folder with a single UPDATE query before actually deleting it,
+        so the number of queries doesn't depend on the number of bookmarks.
         """
         instance = self.get_object()
-        bookmarks = instance.bookmarks.all()
-        if bookmarks:
-            for bookmark in bookmarks:
-                bookmark.folder = None
-                bookmark.save()
+        target = None
+
+        if move_to := request.query_params.get("move_to"):
+            target = (
+                Folder.objects.filter(
+                    user_id__exact=request.user.pk,
+                    pk=move_to if move_to.isdigit() else None,
+                )
+                .exclude(pk=instance.pk)
+                .first()
+            )
+            if not target:
+                return Response(
+                    {"error": f"Folder with id={move_to} does not exist."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            adjust_folder_counters(
+                {target.pk: instance.bookmarks.filter(is_archived=False).count()}
+            )
 
-        return self.destroy(request, *args, **kwargs)
+        instance.bookmarks.update(
+            folder=target, change_seq=next_change_seq(request.user.pk)
+        )
+        self.perform_destroy(instance)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class BookmarkListView(APIView):
     """
-    List all user's bookmarks.
+    List all user's bookmarks, optionally paginated with `BookmarkCursorPagination`.
     """
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [
         permissions.IsAuthenticated,
         IsOwnerOnly,
     ]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+
+    @staticmethod
+    @conditional_on_collection_version
+    @cache_response("bookmarks")
+    def get(request: Request) -> Response:  # noqa: max-complexity: 5
+        """
+        Return all user's bookmarks, optionally filtered and ordered with query parameters described in
+        `BookmarkListFilterSerializer`. Pass `fields` and/or `expand` query parameters to get sparse fieldsets,
+        see `SparseFieldsetMixin`.
+
+        Pass `page_size` and/or `cursor` query parameters to get keyset-paginated results instead:
+        `{"next": <url>, "previous": <url>, "results": [...]}`.
+        """
+        filters = BookmarkListFilterSerializer(data=request.query_params)
+        fieldset = FieldsetSerializer(
+            data=request.query_params,
+            context={"serializer_class": BookmarkListSerializer},
+        )
+        if not all([filters.is_valid(), fieldset.is_valid()]):
+            return Response(
+                {**filters.errors, **fieldset.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        ordering = filters.get_ordering()
+        bookmarks = filters.filter_queryset(
+            Bookmark.objects.filter(user_id__exact=request.user.pk)
+        ).order_by(*ordering)
+        if fieldset.validated_data:
+            bookmarks = bookmarks.with_fieldset(
+                fieldset.get_field_names(),
+                fieldset.validated_data.get("expand", []),
+                keep=[name.lstrip("-") for name in ordering],
+            )
+
+            def serialize(items):
+                return BookmarkListSerializer(
+                    items, many=True, **fieldset.validated_data
+                ).data
+
+        else:
+            # Full representation is the hot path - build it from `.values()` rows, see `listing` module
+            bookmarks = get_bookmark_rows(bookmarks)
+            serialize = serialize_bookmarks
+
+        paginator = BookmarkCursorPagination(ordering=ordering)
+        page = paginator.paginate_queryset(bookmarks, request)
+        if page is not None:
+            return paginator.get_paginated_response(serialize(page))
+        return Response(serialize(bookmarks))
+
+
+class BookmarkSyncView(APIView):
+    """
+    Return user's bookmarks changed since the last sync, and ids of deleted ones - for clients keeping a local copy.
+    """
+
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
 
     @staticmethod
     def get(request: Request) -> Response:
         """
-        Return all user's bookmarks.
+        Return changes since `since` query parameter - `watermark` value from the previous response.
+        Omit `since` for the initial sync: all bookmarks are returned then.
+
+        Response example:
+        {"watermark": 42, "bookmarks": [<changed or created bookmarks>], "deleted": [<ids of deleted bookmarks>]}
         """
-        bookmarks = Bookmark.objects.filter(user_id__exact=request.user.pk)
-        serializer = BookmarkListSerializer(bookmarks, many=True)
-        return Response(serializer.data)
+        since = request.query_params.get("since")
+        if since is not None and not since.isdigit():
+            return Response(
+                {"error": "`since` must be a non-negative integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        changes = get_changes(request.user, int(since) if since is not None else None)
+        return Response(
+            {
+                "watermark": changes["watermark"],
+                "bookmarks": BookmarkListSerializer(
+                    changes["bookmarks"], many=True
+                ).data,
+                "deleted": changes["deleted"],
+            }
+        )
+
+
+class BookmarkSearchView(APIView):
+    """
+    Full-text search over user's bookmarks: titles, descriptions, URLs and tags.
+    """
+
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @staticmethod
+    def get(request: Request) -> Response:  # noqa: max-complexity: 4
+        """
+        Return bookmarks matching all words of `q` query parameter, best matches first, up to `limit` (default 50).
+        The last word matches as a prefix, unless `q` ends with a space - for search-as-you-type.
+        Each bookmark has extra `rank`, `title_highlight` and `snippet` fields, see `BookmarkSearchResultSerializer`.
+        """
+        if not is_search_supported():
+            return Response(
+                {"error": "Search is not supported by the database."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+
+        limit = request.query_params.get("limit", "50")
+        if not limit.isdigit() or not 0 < int(limit) <= SEARCH_MAX_RESULTS:
+            return Response(
+                {
+                    "error": f"`limit` must be an integer from 1 to {SEARCH_MAX_RESULTS}."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        bookmarks = search_bookmarks(
+            request.user, request.query_params.get("q", ""), int(limit)
+        )
+        return Response(BookmarkSearchResultSerializer(bookmarks, many=True).data)
 
 
 @api_view(["POST"])
 def bookmark_create_from_telegram(request: Request) -> Response:
     """
     Create new bookmark. Assign to user with "telegram_id" (if exists).
+    Bookmark is created with URL as a placeholder title, page metadata is fetched in background.
 
     Post data example:
     {
@@ -198,12 +358,7 @@ def bookmark_create_from_telegram(request: Request) -> Response:
     if serializer.is_valid():
         # NB: we check existence of user with `telegram_id` in `CustomUserTelegramIDSerializer.validate_telegram_id()`
         bookmark = serializer.save()
-
-        title, description, image_url = parse_url_info(serializer.data.get("url"))
-        bookmark.title = title
-        bookmark.description = description
-        bookmark.image_url = image_url
-        bookmark.save()
+        schedule_metadata_enrichment(bookmark)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -211,11 +366,13 @@ def bookmark_create_from_telegram(request: Request) -> Response:
 
 
 @api_view(["POST"])
-@authentication_classes([authentication.TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([permissions.IsAuthenticated])
 def bookmark_create_from_web(request: Request) -> Response:
     """
     Create new bookmark. Assign to authenticated user.
+    Bookmark is created with URL as a placeholder title and `metadata_status="PG"`, page metadata is fetched
+    in background - poll `BookmarkMetadataView` to find out when it's done.
 
     Post data example:
     {
@@ -225,16 +382,11 @@ def bookmark_create_from_web(request: Request) -> Response:
     serializer = BookmarkCreateFromWebSerializer(data=request.data)
 
     if serializer.is_valid():
-        bookmark = serializer.save()
-
-        title, description, image_url = parse_url_info(serializer.data.get("url"))
-        bookmark.title = title
-        bookmark.description = description
-        bookmark.image_url = image_url
-        bookmark.user = request.user
-        bookmark.save()
+        bookmark = serializer.save(user=request.user)
+        schedule_metadata_enrichment(bookmark)
 
         # Return detailed bookmark info to the user:
+        bookmark = Bookmark.objects.with_related().get(pk=bookmark.pk)
         detail_serializer = BookmarkListSerializer(instance=bookmark, many=False)
 
         return Response(detail_serializer.data, status=status.HTTP_201_CREATED)
@@ -242,18 +394,34 @@ def bookmark_create_from_web(request: Request) -> Response:
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BookmarkMetadataView(RetrieveAPIView):
+    """
+    Return bookmark's page metadata and `metadata_status` - lets clients find out when background fetching
+    of title, description and image is finished.
+    """
+
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [
+        permissions.IsAuthenticated,
+        IsOwnerOnly,
+    ]
+
+    queryset = Bookmark.objects.all()
+    serializer_class = BookmarkMetadataSerializer
+
+
 class BookmarkUpdateView(UpdateAPIView):
     """
     Partially update bookmark data. Return updated data.
     """
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [
         permissions.IsAuthenticated,
         IsOwnerOnly,
     ]
 
-    queryset = Bookmark.objects.all()
+    queryset = Bookmark.objects.with_related()
     serializer_class = BookmarkUpdateSerializer
 
 
@@ -262,7 +430,7 @@ class BookmarkDeleteView(DestroyAPIView):
     Delete the Bookmark.
     """
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [
         permissions.IsAuthenticated,
         IsOwnerOnly,
@@ -270,3 +438,131 @@ class BookmarkDeleteView(DestroyAPIView):
 
     queryset = Bookmark.objects.all()
     serializer_class = BookmarkListSerializer
+
+
+@api_view(["POST"])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def bookmark_bulk(request: Request) -> Response:
+    """
+    Apply operation to many bookmarks of authenticated user at once. Return ids of affected bookmarks.
+    Bookmarks of other users are silently left out - ownership is checked in the query, not per object.
+    At most `BULK_MAX_IDS` bookmarks can be selected at once, either with `ids` or with `filter`.
+
+    Post data examples:
+    {"ids": [1, 2, 3], "operation": "set_flags", "is_read": true, "is_archived": true}
+    {"filter": {"folder": 5, "is_read": true}, "operation": "move", "folder": null}
+    {"ids": [1, 2, 3], "operation": "add_tags", "tags": [7, 8]}
+    {"filter": {"is_archived": true}, "operation": "delete"}
+    """
+    serializer = BookmarkBulkSerializer(data=request.data, context={"request": request})
+
+    if serializer.is_valid():
+        operation = serializer.validated_data["operation"]
+        ids = apply_bulk_operation(
+            request.user,
+            serializer.get_bookmarks(),
+            operation,
+            serializer.validated_data,
+        )
+        return Response({"operation": operation, "ids": ids})
+
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(["POST"])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def bookmark_import(request: Request) -> Response:
+    """
+    Upload file with bookmarks to import for authenticated user: Netscape bookmark file (exported by browsers),
+    or JSON list of bookmarks. Import is processed in background by `process_import` Celery task.
+    Return ImportJob - poll `ImportJobDetailView` with its `id` to track progress.
+
+    Post data: multipart form with `file` field.
+    JSON list items example:
+    {
+        "url": "https://ru.vuejs.org/v2/cookbook/dockerize-vuejs-app.html",
+        "title": "Dockerize Vue.js App",
+        "folder": "Vue",
+        "tags": ["docker", "vue"],
+        "is_favorite": true
+    }
+    """
+    serializer = ImportJobCreateSerializer(data=request.data)
+
+    if serializer.is_valid():
+        job = serializer.save(user=request.user)
+        transaction.on_commit(lambda: process_import.delay(import_job_id=job.pk))
+
+        return Response(
+            ImportJobSerializer(instance=job).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ImportJobDetailView(RetrieveAPIView):
+    """
+    Return bookmarks import status and progress.
+    """
+
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [
+        permissions.IsAuthenticated,
+        IsOwnerOnly,
+    ]
+
+    queryset = ImportJob.objects.all()
+    serializer_class = ImportJobSerializer
+
+
+class BookmarkExportView(APIView):
+    """
+    Export all user's bookmarks as a file: JSON Lines (`jsonl`), Netscape bookmark file (`html`) or `csv`.
+    The format is chosen by the URL, so `Accept` header is not negotiated.
+    """
+
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    @staticmethod
+    def get(  # noqa: max-complexity: 4
+        request: Request,
+        export_format: str,
+    ) -> StreamingHttpResponse:
+        """
+        Stream the export file; bookmarks are read from DB and written out in chunks, so the whole library is never
+        loaded in memory. Response is compressed on the fly if the client accepts gzip encoding.
+        JSON Lines file can be imported back with `bookmark_import`.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise Http404()
+
+        generator, content_type, extension = EXPORT_FORMATS[export_format]
+        content = encode(generator(request.user))
+        use_gzip = accepts_gzip(request.headers.get("Accept-Encoding", ""))
+        if use_gzip:
+            content = gzip_stream(content)
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="bookmarks.{extension}"'
+        response["Vary"] = "Accept-Encoding"
+        if use_gzip:
+            response["Content-Encoding"] = "gzip"
+        return response
+
+
+@api_view(["GET"])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([permissions.IsAdminUser])
+def response_cache_stats(request: Request) -> Response:
+    """
+    Return response cache hits, misses and oversized responses counters of each cached endpoint, for monitoring.
+    Available to staff users only.
+    """
+    return Response(get_stats())
@@ -169,9 +169,47 @@ REDIS_HOST = env.str("REDIS_HOST", "redis")
 REDIS_PORT = env.int("REDIS_PORT", 6379)
 REDIS_DB = env.int("REDIS_DB", 0)
 
+# Cache, used for read endpoints' responses (see `bookmarks.response_cache`)
+# https://docs.djangoproject.com/en/4.1/topics/cache/#redis
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}",
+    }
+}
+RESPONSE_CACHE_TTL = env.int("RESPONSE_CACHE_TTL", 60 * 60)
+RESPONSE_CACHE_MAX_BYTES = env.int("RESPONSE_CACHE_MAX_BYTES", 1024 * 1024)
+RESPONSE_CACHE_LOCK_TIMEOUT = env.int("RESPONSE_CACHE_LOCK_TIMEOUT", 10)
+
+# Cache of token -> user lookups (see `users.authentication`), seconds and entries
+AUTH_TOKEN_CACHE_TTL = env.int("AUTH_TOKEN_CACHE_TTL", 60 * 5)
+AUTH_TOKEN_LOCAL_CACHE_TTL = env.int("AUTH_TOKEN_LOCAL_CACHE_TTL", 5)
+AUTH_TOKEN_LOCAL_CACHE_SIZE = env.int("AUTH_TOKEN_LOCAL_CACHE_SIZE", 1024)
+
+# Progress of downloads in progress (see `downloads.progress`), seconds since the last update
+DOWNLOAD_PROGRESS_TTL = env.int("DOWNLOAD_PROGRESS_TTL", 60 * 60 * 24)
+# Disk quota reservations of downloads in progress, seconds before `reconcile_disk_usage` releases them
+DOWNLOAD_RESERVATION_TTL = env.int("DOWNLOAD_RESERVATION_TTL", 60 * 60 * 6)
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+REST_FRAMEWORK = {
+    # Used by Djoser views (i.e. token logout), our views list `authentication_classes` explicitly
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "users.authentication.CachedTokenAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+}
+
 # Celery
 CELERY_BROKER_URL = "redis://redis:6379"
 
+# Shared cache of bookmarked pages metadata (see `bookmarks.metadata_cache`), seconds
+URL_METADATA_CACHE_TTL = env.int("URL_METADATA_CACHE_TTL", 60 * 60 * 24)
+URL_METADATA_CACHE_MAX_TTL = env.int("URL_METADATA_CACHE_MAX_TTL", 60 * 60 * 24 * 30)
+URL_METADATA_CACHE_STALE_TTL = env.int("URL_METADATA_CACHE_STALE_TTL", 60 * 60 * 24 * 7)
+
 # Telegram
 # These env vars must be set for worker service in docker-compose.yml
 TELEGRAM_BOT_TOKEN = env.str("TELEGRAM_BOT_TOKEN", None)
@@ -6,7 +6,4 @@ class DownloadsConfig(AppConfig):
     name = "downloads"
 
     def ready(self):
-        try:
-            import downloads.signals  # noqa: F401
-        except ImportError:
-            pass
+        import downloads.signals  # noqa: F401
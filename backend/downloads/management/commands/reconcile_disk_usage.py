@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from downloads.usage import (
+    find_file_size_drift,
+    find_orphan_files,
+    find_stale_reservations,
+    find_stale_users,
+    release_stale_reservations,
+    repair_disk_space_used,
+    repair_file_sizes,
+    scan_files,
+)
+
+
+class Command(BaseCommand):
+    """
+    Scan `MEDIA_ROOT/videos` and fix drift of disk usage accounting:
+    - `Download.file_size` which differs from the size of the file on disk, or isn't 0 if the file is missing;
+    - `CustomUser.disk_space_used_bytes` which differs from the total `file_size` of user's downloads;
+    - `Download.reserved_size` of downloads not in progress anymore, or reserved longer than
+      `DOWNLOAD_RESERVATION_TTL` ago - i.e. by a killed worker;
+    - `CustomUser.disk_space_reserved_bytes` which differs from the total `reserved_size` of user's downloads.
+    Files no download refers to are reported, but not deleted - they may be downloads in progress.
+
+    Counters are maintained on every completed and deleted download, so drift is only expected after changing
+    downloads or their files bypassing `downloads.usage` module, e.g. removing files by hand. Reservations left by
+    killed workers are only released by this command, so run it periodically, i.e. from cron.
+
+    Usage: python -m manage reconcile_disk_usage [--check]
+    """
+
+    help = "Fix download sizes and users' disk usage counters that have drifted from files on disk."
+
+    def add_arguments(self, parser):
+        """
+        Add command line arguments.
+        """
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drift, exit with error if there is any.",
+        )
+
+    def handle(self, *args, **options):  # noqa: max-complexity: 6
+        """
+        Report or fix drift.
+        """
+        file_sizes = scan_files()
+        drift = find_file_size_drift(file_sizes)
+        for pk, file_size, actual_size in drift:
+            self.stdout.write(
+                f"Download #{pk}: file_size={file_size}, actual={actual_size}"
+            )
+        for name in find_orphan_files(file_sizes):
+            self.stdout.write(f"File {name} doesn't belong to any download")
+
+        if options["check"]:
+            reservations = list(
+                find_stale_reservations().values_list("pk", "reserved_size")
+            )
+            for pk, reserved_size in reservations:
+                self.stdout.write(
+                    f"Download #{pk}: stale reservation of {reserved_size} bytes"
+                )
+            stale = list(
+                find_stale_users().values_list(
+                    "pk",
+                    "disk_space_used_bytes",
+                    "actual_disk_space_used_bytes",
+                    "disk_space_reserved_bytes",
+                    "actual_disk_space_reserved_bytes",
+                )
+            )
+            for pk, used, actual_used, reserved, actual_reserved in stale:
+                self.stdout.write(
+                    f"User #{pk}: disk_space_used_bytes={used}, actual={actual_used}, "
+                    f"disk_space_reserved_bytes={reserved}, actual={actual_reserved}"
+                )
+            if drift or reservations or stale:
+                raise CommandError(
+                    f"{len(drift)} download size(s), {len(reservations)} reservation(s) "
+                    f"and {len(stale)} user counter(s) are stale."
+                )
+            self.stdout.write("Disk usage accounting is correct.")
+            return
+
+        repaired_downloads = repair_file_sizes(drift)
+        released = release_stale_reservations()
+        repaired_users = repair_disk_space_used()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Repaired {repaired_downloads} download size(s), released {released} reservation(s) "
+                f"and repaired {repaired_users} user counter(s)."
+            )
+        )
@@ -0,0 +1,16 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0003_alter_download_bookmark"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="download",
+            index=models.Index(fields=["status"], name="download_status_idx"),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0004_download_status_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="download",
+            name="reserved_size",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="reserved size, bytes"
+            ),
+        ),
+    ]
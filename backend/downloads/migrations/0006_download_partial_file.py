@@ -0,0 +1,23 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0005_download_reserved_size"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="download",
+            name="partial_file",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=512,
+                verbose_name="partial file",
+            ),
+        ),
+    ]
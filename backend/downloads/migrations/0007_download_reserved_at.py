@@ -0,0 +1,19 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0006_download_partial_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="download",
+            name="reserved_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="reserved at"
+            ),
+        ),
+    ]
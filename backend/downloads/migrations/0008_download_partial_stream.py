@@ -0,0 +1,28 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("downloads", "0007_download_reserved_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="download",
+            name="partial_itag",
+            field=models.IntegerField(
+                blank=True, editable=False, null=True, verbose_name="partial file itag"
+            ),
+        ),
+        migrations.AddField(
+            model_name="download",
+            name="partial_size",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                verbose_name="partial file expected size, bytes",
+            ),
+        ),
+    ]
@@ -48,6 +48,39 @@ class Download(models.Model):
         verbose_name=_("file size, bytes"),
         default=0,
     )
+    # Partially downloaded file, relative to MEDIA_ROOT, which retries of the download resume, see `streaming` module
+    partial_file = models.CharField(
+        verbose_name=_("partial file"),
+        max_length=512,
+        blank=True,
+        default="",
+        editable=False,
+    )
+    # Stream the partial file is downloaded from: YouTube's format code and size, so that bytes of another stream
+    # aren't appended to it
+    partial_itag = models.IntegerField(
+        verbose_name=_("partial file itag"),
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    partial_size = models.IntegerField(
+        verbose_name=_("partial file expected size, bytes"),
+        default=0,
+        editable=False,
+    )
+    # Estimated size reserved against user's disk quota while the download is in progress, see `usage` module
+    reserved_size = models.IntegerField(
+        verbose_name=_("reserved size, bytes"),
+        default=0,
+        editable=False,
+    )
+    reserved_at = models.DateTimeField(
+        verbose_name=_("reserved at"),
+        blank=True,
+        null=True,
+        editable=False,
+    )
     created = models.DateTimeField(verbose_name=_("created"), auto_now_add=True)
     updated = models.DateTimeField(verbose_name=_("updated"), auto_now=True)
 
@@ -55,6 +88,9 @@ class Download(models.Model):
         verbose_name = _("download")
         verbose_name_plural = _("downloads")
         ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["status"], name="download_status_idx"),
+        ]
 
     def __str__(self):
         return self.title if self.title else _("Untitled")
@@ -0,0 +1,99 @@
+"""
+Live progress of downloads, kept in Redis so it can be polled without touching DB.
+
+Progress of download #N is stored under `download_progress:N` key, with the id of the user who owns the download,
+so `views.download_progress` can check ownership too. It's set to pending by `views.download_start_from_web`, updated
+by the worker at most every `PUBLISH_INTERVAL` seconds while downloading, and set to completed or failed when done.
+Entries expire `DOWNLOAD_PROGRESS_TTL` seconds after the last update. Progress is best-effort: if Redis is
+unavailable, downloads work without it.
+"""
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from redis.exceptions import RedisError
+
+from .models import Download
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_INTERVAL = 1
+
+
+def get_progress_key(download_id: int) -> str:
+    """
+    Return cache key of the progress of download with `download_id`.
+    """
+    return f"download_progress:{download_id}"
+
+
+def get_progress(download_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Return progress of download with `download_id`, or None if it's unknown.
+    """
+    try:
+        return cache.get(get_progress_key(download_id))
+    except RedisError as e:
+        logger.warning(f"Download progress is unavailable: {e}")
+        return None
+
+
+class DownloadProgress:
+    """
+    Progress of a download: bytes done out of `total`, and throughput since the download was (re)started.
+    """
+
+    def __init__(self, download_id: int, user_id: int, total: int = 0):
+        self.download_id = download_id
+        self.user_id = user_id
+        self.total = total
+        self.bytes_done = 0
+        self.bytes_resumed = 0
+        self.started_at = time.monotonic()
+        self.published_at = 0.0
+
+    def resume(self, bytes_done: int) -> None:
+        """
+        Start counting throughput from `bytes_done` left by a previous attempt.
+        """
+        self.bytes_done = self.bytes_resumed = bytes_done
+        self.started_at = time.monotonic()
+
+    def get_bytes_per_second(self) -> int:
+        """
+        Return average throughput, bytes per second.
+        """
+        elapsed = time.monotonic() - self.started_at
+        bytes_done = self.bytes_done - self.bytes_resumed
+        return round(bytes_done / elapsed) if elapsed > 0 else 0
+
+    def update(self, bytes_done: int) -> None:
+        """
+        Set `bytes_done`, publishing progress if `PUBLISH_INTERVAL` has passed since it was published.
+        """
+        self.bytes_done = bytes_done
+        if time.monotonic() - self.published_at >= PUBLISH_INTERVAL:
+            self.publish()
+
+    def publish(self, status: str = Download.Status.PENDING) -> None:
+        """
+        Store progress with download `status` to Redis.
+        """
+        self.published_at = time.monotonic()
+        progress = {
+            "user_id": self.user_id,
+            "status": str(status),
+            "bytes_done": self.bytes_done,
+            "total": self.total,
+            "bytes_per_second": self.get_bytes_per_second(),
+        }
+        try:
+            cache.set(
+                get_progress_key(self.download_id),
+                progress,
+                timeout=settings.DOWNLOAD_PROGRESS_TTL,
+            )
+        except RedisError as e:
+            logger.warning(f"Download progress is unavailable: {e}")
@@ -28,7 +28,7 @@ class DownloadCreateSerializer(serializers.Serializer):
     Serializer used to start download from `bookmark.url` via web frontend.
     Checks
     - if bookmark with `bookmark_id` exists in DB.
-    - if user has positive disk quota.
+    - if user has disk quota left, not used or reserved by downloads in progress.
     """
 
     bookmark_id = serializers.IntegerField()
@@ -46,12 +46,14 @@ class DownloadCreateSerializer(serializers.Serializer):
             )
 
         user = bookmark.user
-        if user.disk_quota - user.disk_space_used <= 0:
+        if user.disk_space_available_bytes <= 0:
             raise serializers.ValidationError(
-                "'{username}' has not enough disk quota to download files! Quota {quota} Mb, used {used} Mb.".format(
+                "'{username}' has not enough disk quota to download files! "
+                "Quota {quota} Mb, used {used} Mb, reserved by downloads in progress {reserved} Mb.".format(
                     username=user.username,
                     quota=user.disk_quota,
                     used=user.disk_space_used,
+                    reserved=user.disk_space_reserved,
                 )
             )
 
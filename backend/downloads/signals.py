@@ -1,16 +1,52 @@
-from django.db.models.signals import post_delete
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
+from bookmarks.models import Bookmark, BookmarkQuerySet
+from bookmarks.sync import is_user_deletion, touch_bookmarks
+
 from .models import Download
+from .usage import adjust_disk_space_used
 
 
 @receiver(post_delete, sender=Download)
 def delete_attached_file(sender, instance, **kwargs):
     """
-    Delete attached file when model instance gets deleted without explicit call of `Download.delete()`.
+    Delete attached file when model instance gets deleted without explicit call of `Download.delete()`,
+    and the partial file if the download is in progress.
 
     Issue: https://code.djangoproject.com/ticket/12034
     Reference: https://docs.djangoproject.com/en/4.0/ref/signals/#post-delete
     """
     if instance.file:
         instance.file.delete(save=False)
+    if instance.partial_file:
+        default_storage.delete(instance.partial_file)
+
+
+@receiver(pre_delete, sender=Download)
+def release_disk_space(sender, instance, origin=None, **kwargs):
+    """
+    Subtract size of the deleted download from disk space used by its user and release its reservation, in the
+    deletion transaction - also when deleted with `Download.delete()`, by cascade or in bulk. Done before deletion,
+    as the user is found through the bookmark, which is deleted before its download by cascade. Nothing to do if
+    the download is deleted along with the user.
+    """
+    if is_user_deletion(origin):
+        return
+    adjust_disk_space_used(
+        instance.bookmark_id, -instance.file_size, -instance.reserved_size
+    )
+
+
+@receiver(post_save, sender=Download)
+@receiver(post_delete, sender=Download)
+def touch_bookmark(sender, instance, origin=None, **kwargs):
+    """
+    Stamp the bookmark for delta sync when its download changes - download is a part of bookmark representation.
+    Nothing to do if the download is deleted along with the bookmark or the user.
+    """
+    if isinstance(origin, (Bookmark, BookmarkQuerySet)) or is_user_deletion(origin):
+        return
+    if instance.bookmark_id:
+        touch_bookmarks(Bookmark.objects.filter(pk=instance.bookmark_id))
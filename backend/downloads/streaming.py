@@ -0,0 +1,118 @@
+"""
+Chunked, resumable download of video streams, so memory use doesn't depend on the size of the video.
+
+A stream is requested in ranges of `RANGE_SIZE` bytes, like pytube does, as YouTube throttles larger requests.
+Responses are read in chunks of `CHUNK_SIZE` bytes and appended to `<path>.part`, which is atomically renamed to
+`path` once it has the expected size - so a file in `MEDIA_ROOT/videos` is always a complete video.
+
+A range that fails or ends prematurely, i.e. when the connection drops, is requested again from the last byte
+received, up to `MAX_RETRIES` times per download. If the download still fails, the partial file is kept, and
+the next download to the same `path` - i.e. a retry of the Celery task - continues from its end.
+"""
+import http.client
+import os
+from contextlib import suppress
+from typing import Iterator, Optional
+from urllib.request import Request, urlopen
+
+from .progress import DownloadProgress
+
+CHUNK_SIZE = 256 * 1024
+RANGE_SIZE = 9 * 1024 * 1024
+MAX_RETRIES = 3
+TIMEOUT = 30
+PART_SUFFIX = ".part"
+
+
+class IncompleteDownload(Exception):
+    """
+    Raised when a range of the stream ends before all its bytes are received.
+    """
+
+
+class ResumeNotSupported(Exception):
+    """
+    Raised when the server responds to a request of a range in the middle of the stream with the whole stream.
+    """
+
+
+def get_part_path(path: str) -> str:
+    """
+    Return path of the file being downloaded to `path`.
+    """
+    return path + PART_SUFFIX
+
+
+def iter_range(  # noqa: max-complexity: 4
+    url: str, start: int, stop: int
+) -> Iterator[bytes]:
+    """
+    Yield chunks of bytes from `start` to `stop` (inclusive) of the stream at `url`.
+    Raise `IncompleteDownload` if the response ends prematurely.
+    """
+    request = Request(
+        url, headers={"Range": f"bytes={start}-{stop}", "User-Agent": "Mozilla/5.0"}
+    )
+    with urlopen(request, timeout=TIMEOUT) as response:  # nosec
+        if start and response.status != 206:
+            raise ResumeNotSupported(f"{url} doesn't support range requests")
+        while chunk := response.read(CHUNK_SIZE):
+            start += len(chunk)
+            yield chunk
+    if start <= stop:
+        raise IncompleteDownload(f"Range of {url} ended at {start}, expected {stop}")
+
+
+def iter_chunks(  # noqa: max-complexity: 5
+    url: str, total: int, offset: int = 0
+) -> Iterator[bytes]:
+    """
+    Yield chunks of the stream at `url` from `offset` up to `total` bytes, requesting it by ranges.
+    Ranges that fail are requested again from the last byte received, up to `MAX_RETRIES` times.
+    """
+    retries = 0
+    while offset < total:
+        stop = min(offset + RANGE_SIZE, total) - 1
+        try:
+            for chunk in iter_range(url, offset, stop):
+                offset += len(chunk)
+                yield chunk
+        except (IncompleteDownload, OSError, http.client.HTTPException):
+            # `OSError` covers dropped connections, timeouts and `URLError`
+            if retries >= MAX_RETRIES:
+                raise
+            retries += 1
+
+
+def download_to_file(  # noqa: max-complexity: 6
+    url: str, path: str, total: int, progress: Optional[DownloadProgress] = None
+) -> int:
+    """
+    Download `total` bytes of the stream at `url` to `path` via `<path>.part` file, reporting to `progress`.
+    Resume the partial file if it's left by a previous download. Return size of the file.
+    The partial file is kept if the download fails, unless it can't be resumed.
+    """
+    part_path = get_part_path(path)
+    with open(part_path, "ab") as file:
+        size = file.tell()
+        if size > total:
+            file.truncate(0)
+            size = 0
+        if progress:
+            progress.resume(size)
+        try:
+            for chunk in iter_chunks(url, total, size):
+                file.write(chunk)
+                size += len(chunk)
+                if progress:
+                    progress.update(size)
+        except ResumeNotSupported:
+            file.truncate(0)
+            raise
+
+    if size != total or os.path.getsize(part_path) != total:
+        with suppress(FileNotFoundError):
+            os.remove(part_path)
+        raise IncompleteDownload(f"Downloaded {size} bytes of {total} from {url}")
+    os.replace(part_path, path)
+    return size
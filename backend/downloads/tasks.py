@@ -1,11 +1,18 @@
 import os
 import uuid
+from typing import Optional
 
 from celery import shared_task
 from django.conf import settings
-from pytube import YouTube
+from django.core.files.storage import default_storage
+from pytube import Stream, YouTube
 
 from .models import Download
+from .progress import DownloadProgress
+from .streaming import PART_SUFFIX, download_to_file
+from .usage import reserve_disk_space, settle_disk_space
+
+MAX_RETRIES = 5
 
 
 @shared_task(
@@ -14,10 +21,10 @@ from .models import Download
     retry_backoff=2,
     retry_jitter=True,
     retry_kwargs={
-        "max_retries": 5,
+        "max_retries": MAX_RETRIES,
     },
 )
-def process_download(self, download_id: int) -> None:  # noqa: max-complexity: 5
+def process_download(self, download_id: int) -> None:  # noqa: max-complexity: 6
     """
     Process Download instance with `download_id` depending on it's status and type.
 
@@ -31,6 +38,7 @@ def process_download(self, download_id: int) -> None:  # noqa: max-complexity: 5
 
     There's a bug in pytube causing video sometimes not get downloaded on the first try,
     so we have to make some retries. Issue: https://github.com/pytube/pytube/issues/1542
+    Retries resume the partially downloaded file, which is deleted when the last retry fails.
     """
     download = Download.objects.get(pk=download_id)
 
@@ -45,6 +53,8 @@ def process_download(self, download_id: int) -> None:  # noqa: max-complexity: 5
         download.save()
 
     if not download_from_youtube(download=download):
+        if self.request.retries >= MAX_RETRIES:
+            discard_partial_file(download)
         raise Exception()
 
 
@@ -60,40 +70,99 @@ def is_youtube_link(url: str) -> bool:
 def download_from_youtube(download: Download) -> bool:  # noqa: max-complexity: 4
     """
     Download YouTube video from `download.bookmark.url` and save it to a file in "MEDIA_ROOT/videos" folder.
-    Save title, file name, file size, download status to the `download` instance.
+    The video is streamed to the file in chunks, publishing progress to Redis, see `streaming` and `progress`.
+    Size of the video from stream metadata is reserved against user's disk quota before downloading, the download
+    fails if there is not enough quota left.
+    Save title, file name, file size, download status to the `download` instance, and convert the reservation to
+    disk space used by the user in the same transaction.
+    If the download fails, its partial file is kept for the next attempt to resume, see `get_output_filename()`.
     Return True if succeeded, otherwise False.
     """
+    counted_file_size = download.file_size
     url = download.bookmark.url
     yt = YouTube(url)
-    output_filename = f"{uuid.uuid1()}.mp4"
     output_path = os.path.join(settings.MEDIA_ROOT, "videos")
 
     if not os.path.exists(output_path):
         os.mkdir(output_path)
 
-    output_full_filename = os.path.join(output_path, output_filename)
+    progress = DownloadProgress(download.pk, download.bookmark.user_id)
 
     try:
         print("Starting video download from URL: " + url)
-        stream = yt.streams.filter(file_extension="mp4")
-        stream.get_highest_resolution().download(
-            filename=output_full_filename,
+        stream = yt.streams.filter(file_extension="mp4").get_highest_resolution()
+        output_filename = get_output_filename(download, stream)
+        output_full_filename = os.path.join(output_path, output_filename)
+        progress.total = stream.filesize
+        reserve_disk_space(download, progress.total)
+        file_size = download_to_file(
+            stream.url, output_full_filename, progress.total, progress
         )
 
-        file_stats = os.stat(output_full_filename)
-
         print(f"Video saved to file {output_filename}")
-        print(f"File Size in Bytes is {file_stats.st_size}")
+        print(f"File Size in Bytes is {file_size}")
 
         download.title = yt.title
         download.status = Download.Status.COMPLETED
         download.file.name = "videos/{filename}".format(
             filename=output_filename,
         )
-        download.file_size = file_stats.st_size
+        download.file_size = file_size
+        download.partial_file, download.partial_itag, download.partial_size = (
+            "",
+            None,
+            0,
+        )
     except Exception as e:
         print(f"An error has occured while downloading video: {e}")
         download.status = Download.Status.FAILED
     finally:
-        download.save()
+        settle_disk_space(download, counted_file_size)
+        progress.publish(download.status)
         return True if download.status is Download.Status.COMPLETED else False
+
+
+def get_output_filename(download: Download, stream: Stream) -> str:
+    """
+    Return name of the file in "MEDIA_ROOT/videos" to download the `stream` to: the one whose partial file is left
+    by a previous attempt to download the same stream, or a new one - stored as `download.partial_file` with
+    the stream's itag and size right away, so that later attempts resume it. Task retries and restarts of
+    the download from web resume it, also after a worker crash.
+    """
+    if download.partial_file and (download.partial_itag, download.partial_size) == (
+        stream.itag,
+        stream.filesize,
+    ):
+        return os.path.basename(download.partial_file).removesuffix(PART_SUFFIX)
+
+    discard_partial_file(download)
+    output_filename = f"{uuid.uuid1()}.mp4"
+    set_partial_file(
+        download, f"videos/{output_filename}{PART_SUFFIX}", stream.itag, stream.filesize
+    )
+    return output_filename
+
+
+def discard_partial_file(download: Download) -> None:
+    """
+    Delete partial file of the `download` which won't be resumed.
+    """
+    if not download.partial_file:
+        return
+    default_storage.delete(download.partial_file)
+    set_partial_file(download, "", None, 0)
+
+
+def set_partial_file(
+    download: Download, partial_file: str, itag: Optional[int], size: int
+) -> None:
+    """
+    Store `partial_file` of the `download`, and `itag` and `size` of the stream it's downloaded from.
+    """
+    download.partial_file = partial_file
+    download.partial_itag = itag
+    download.partial_size = size
+    # Not a part of bookmark representation, so not saved with `save()` stamping the bookmark for sync
+    Download.objects.filter(pk=download.pk).update(
+        partial_file=partial_file, partial_itag=itag, partial_size=size
+    )
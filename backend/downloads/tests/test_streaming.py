@@ -0,0 +1,306 @@
+import os
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from bookmarks.models import Bookmark
+from downloads import streaming
+from downloads.models import Download
+from downloads.progress import DownloadProgress, get_progress
+from downloads.streaming import (
+    IncompleteDownload,
+    ResumeNotSupported,
+    download_to_file,
+    get_part_path,
+)
+from downloads.tasks import download_from_youtube, process_download
+from users.models import CustomUser
+
+MEDIA_ROOT = tempfile.mkdtemp()
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+VIDEO = os.urandom(100 * 1024)
+
+
+class VideoRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serve `VIDEO` with support of "Range" header, unless `server.ignore_range` is set.
+    Connection is dropped after `server.limit` bytes of the first `server.drops` responses.
+    """
+
+    def do_GET(self):
+        start, stop = 0, len(VIDEO) - 1
+        ranged = "Range" in self.headers and not self.server.ignore_range
+        if ranged:
+            first, last = self.headers["Range"].removeprefix("bytes=").split("-")
+            start, stop = int(first), min(int(last or stop), stop)
+        self.server.ranges.append((start, stop))
+
+        end = stop + 1
+        body = VIDEO[start:end]
+        self.send_response(206 if ranged else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Range", f"bytes {start}-{stop}/{len(VIDEO)}")
+        self.end_headers()
+        if self.server.drops > 0:
+            self.server.drops -= 1
+            body = body[: self.server.limit]
+        self.wfile.write(body)
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CACHES=LOCMEM_CACHES)
+@mock.patch.object(streaming, "CHUNK_SIZE", 4 * 1024)
+@mock.patch.object(streaming, "RANGE_SIZE", 32 * 1024)
+class StreamingTest(TestCase):
+    """
+    Test chunked, resumable download of videos from a local HTTP server, and progress reporting.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), VideoRequestHandler)
+        cls.server.ranges = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/video.mp4"
+        os.makedirs(os.path.join(MEDIA_ROOT, "videos"), exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            "testuser", password="password", disk_quota=10
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.server.ranges.clear()
+        self.server.ignore_range = False
+        self.server.drops = 0
+        self.server.limit = 10000
+        self.path = os.path.join(MEDIA_ROOT, "videos", "video.mp4")
+
+    def tearDown(self):
+        videos = os.path.join(MEDIA_ROOT, "videos")
+        for name in os.listdir(videos):
+            os.remove(os.path.join(videos, name))
+
+    def test_download_to_file(self):
+        """
+        Ensure the video is downloaded by ranges via the partial file, reporting progress.
+        """
+        progress = mock.Mock()
+        self.assertEqual(
+            download_to_file(self.url, self.path, len(VIDEO), progress), len(VIDEO)
+        )
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(), VIDEO)
+        self.assertFalse(os.path.exists(get_part_path(self.path)))
+        self.assertEqual(
+            self.server.ranges,
+            [(0, 32767), (32768, 65535), (65536, 98303), (98304, 102399)],
+        )
+        self.assertEqual(progress.update.call_count, 25)
+        progress.update.assert_called_with(len(VIDEO))
+
+    def test_dropped_connections(self):
+        """
+        Ensure ranges are requested again from the last byte received when connection drops mid-stream.
+        """
+        self.server.drops = 2
+        self.assertEqual(download_to_file(self.url, self.path, len(VIDEO)), len(VIDEO))
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(), VIDEO)
+        self.assertEqual(
+            self.server.ranges[:4],
+            [(0, 32767), (10000, 42767), (20000, 52767), (52768, 85535)],
+        )
+
+    def test_resume(self):
+        """
+        Ensure the partial file is kept if the download fails, and the next download resumes it.
+        """
+        self.server.drops = streaming.MAX_RETRIES + 1
+        with self.assertRaises(IncompleteDownload):
+            download_to_file(self.url, self.path, len(VIDEO))
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(os.path.getsize(get_part_path(self.path)), 40000)
+
+        self.server.ranges.clear()
+        progress = mock.Mock()
+        self.assertEqual(
+            download_to_file(self.url, self.path, len(VIDEO), progress), len(VIDEO)
+        )
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(), VIDEO)
+        self.assertFalse(os.path.exists(get_part_path(self.path)))
+        self.assertEqual(self.server.ranges[0], (40000, 72767))
+        progress.resume.assert_called_once_with(40000)
+
+    def test_resume_not_supported(self):
+        """
+        Ensure the partial file is discarded if the server doesn't support ranges, and the size is verified.
+        """
+        with open(get_part_path(self.path), "wb") as file:
+            file.write(VIDEO[:1000])
+        self.server.ignore_range = True
+        with self.assertRaises(ResumeNotSupported):
+            download_to_file(self.url, self.path, len(VIDEO))
+        self.assertEqual(os.path.getsize(get_part_path(self.path)), 0)
+
+        with self.assertRaises(IncompleteDownload):
+            download_to_file(self.url, self.path, 50 * 1024)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(get_part_path(self.path)))
+
+        self.assertEqual(download_to_file(self.url, self.path, len(VIDEO)), len(VIDEO))
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(), VIDEO)
+
+    def create_download(self) -> Download:
+        bookmark = Bookmark.objects.create(
+            user=self.user, url="https://youtu.be/mqn0D4xat58", title="Video"
+        )
+        return Download.objects.create(bookmark=bookmark)
+
+    def process_download(self, download: Download):
+        """
+        Run `process_download` task with its retries, for a video served by the local server.
+        """
+        with mock.patch("downloads.tasks.YouTube") as youtube:
+            youtube.return_value.title = "Video"
+            stream = youtube.return_value.streams.filter.return_value
+            stream = stream.get_highest_resolution.return_value
+            stream.filesize = len(VIDEO)
+            stream.itag = 22
+            stream.url = self.url
+            result = process_download.apply(kwargs={"download_id": download.pk})
+        download.refresh_from_db()
+        return result
+
+    def test_process_download_retries(self):
+        """
+        Ensure retries of the task resume the partial file, tracked by `Download.partial_file`.
+        """
+        self.server.drops = 1000
+        download = self.create_download()
+        self.assertTrue(self.process_download(download).successful())
+
+        self.assertEqual(download.status, Download.Status.COMPLETED)
+        self.assertEqual(download.partial_file, "")
+        self.assertEqual(download.file_size, len(VIDEO))
+        with download.file.open("rb") as file:
+            self.assertEqual(file.read(), VIDEO)
+        self.assertFalse(os.path.exists(get_part_path(download.file.path)))
+        starts = [start for start, _ in self.server.ranges]
+        self.assertEqual(starts, sorted(starts))
+
+    def test_partial_file_of_other_stream(self):
+        """
+        Ensure the partial file isn't resumed if it's downloaded from another stream, even of the same size.
+        """
+        download = self.create_download()
+        partial_path = os.path.join(MEDIA_ROOT, "videos", "other.mp4.part")
+        with open(partial_path, "wb") as file:
+            file.write(b"x" * 40000)
+        Download.objects.filter(pk=download.pk).update(
+            partial_file="videos/other.mp4.part",
+            partial_itag=18,
+            partial_size=len(VIDEO),
+        )
+        download.refresh_from_db()
+
+        self.assertTrue(self.process_download(download).successful())
+        with download.file.open("rb") as file:
+            self.assertEqual(file.read(), VIDEO)
+        self.assertFalse(os.path.exists(partial_path))
+        self.assertEqual(self.server.ranges[0], (0, 32767))
+        self.assertEqual(
+            (download.partial_file, download.partial_itag, download.partial_size),
+            ("", None, 0),
+        )
+
+    def test_process_download_fails(self):
+        """
+        Ensure the partial file is deleted when the last retry of the task fails.
+        """
+        self.server.drops = 1000
+        self.server.limit = 100
+        download = self.create_download()
+        self.assertTrue(self.process_download(download).failed())
+
+        self.assertEqual(download.status, Download.Status.FAILED)
+        self.assertEqual(download.partial_file, "")
+        self.assertEqual(os.listdir(os.path.join(MEDIA_ROOT, "videos")), [])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.disk_space_reserved_bytes, 0)
+
+    def test_progress(self):
+        """
+        Ensure progress of the download is published to the cache and served without DB queries.
+        """
+        bookmark = Bookmark.objects.create(
+            user=self.user, url="https://youtu.be/mqn0D4xat58", title="Video"
+        )
+        download = Download.objects.create(bookmark=bookmark)
+        with mock.patch("downloads.tasks.YouTube") as youtube:
+            youtube.return_value.title = "Video"
+            stream = youtube.return_value.streams.filter.return_value
+            stream = stream.get_highest_resolution.return_value
+            stream.filesize = len(VIDEO)
+            stream.itag = 22
+            stream.url = self.url
+            self.assertTrue(download_from_youtube(download))
+
+        progress = get_progress(download.pk)
+        self.assertEqual(progress["status"], Download.Status.COMPLETED)
+        self.assertEqual(progress["bytes_done"], len(VIDEO))
+        self.assertEqual(progress["total"], len(VIDEO))
+
+        progress = DownloadProgress(download.pk, self.user.pk, total=len(VIDEO))
+        progress.update(1024)
+        response = self.client.post(
+            "/api/v1/token/login/", {"username": "testuser", "password": "password"}
+        )
+        headers = {"HTTP_AUTHORIZATION": "Token " + response.json()["auth_token"]}
+        url = f"/api/v1/downloads/{download.pk}/progress/"
+        self.client.get(url, **headers)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **headers)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "status": "PG",
+                "bytes_done": 1024,
+                "total": len(VIDEO),
+                "bytes_per_second": mock.ANY,
+            },
+        )
+
+        other_user = CustomUser.objects.create_user("otheruser", password="password")
+        DownloadProgress(download.pk, other_user.pk).publish()
+        self.assertEqual(self.client.get(url, **headers).status_code, 404)
+        self.assertEqual(
+            self.client.get("/api/v1/downloads/0/progress/", **headers).status_code,
+            404,
+        )
@@ -0,0 +1,275 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bookmarks.models import Bookmark
+from bookmarks.sync import get_change_seq
+from downloads.models import Download
+from downloads.tasks import download_from_youtube
+from downloads.usage import DiskQuotaExceeded, reserve_disk_space, settle_disk_space
+from users.models import CustomUser
+
+MEDIA_ROOT = tempfile.mkdtemp()
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CACHES=LOCMEM_CACHES)
+class DiskUsageTest(TestCase):
+    """
+    Test `CustomUser.disk_space_used_bytes` and `disk_space_reserved_bytes` counters maintenance and reconciliation.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            "testuser", password="password", disk_quota=10
+        )
+        cls.other_user = CustomUser.objects.create_user(
+            "otheruser", password="password", disk_quota=10
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_bookmark(self, user=None) -> Bookmark:
+        return Bookmark.objects.create(
+            user=user or self.user, url="https://youtu.be/mqn0D4xat58", title="Video"
+        )
+
+    def download(self, download: Download, size: int, estimated_size=None) -> bool:
+        """
+        Run `download_from_youtube()` for a video of `size` bytes, `estimated_size` according to stream metadata.
+        """
+
+        def write_file(url, path, total, progress):
+            with open(path, "wb") as file:
+                file.write(b"x" * size)
+            return size
+
+        with mock.patch("downloads.tasks.YouTube") as youtube, mock.patch(
+            "downloads.tasks.download_to_file", side_effect=write_file
+        ):
+            youtube.return_value.title = "Video"
+            stream = youtube.return_value.streams.filter.return_value
+            stream = stream.get_highest_resolution.return_value
+            stream.filesize = size if estimated_size is None else estimated_size
+            stream.itag = 22
+            return download_from_youtube(download)
+
+    def create_download(self, size: int, user=None) -> Download:
+        """
+        Create a completed download with a file of `size` bytes, accounted in user's disk usage.
+        """
+        download = Download.objects.create(bookmark=self.create_bookmark(user))
+        self.assertTrue(self.download(download, size))
+        return download
+
+    def login(self) -> str:
+        response = self.client.post(
+            "/api/v1/token/login/", {"username": "testuser", "password": "password"}
+        )
+        return response.json()["auth_token"]
+
+    def assertDiskSpaceUsed(self, user, expected: int, reserved: int = 0):
+        user.refresh_from_db()
+        self.assertEqual(user.disk_space_used_bytes, expected)
+        self.assertEqual(user.disk_space_reserved_bytes, reserved)
+
+    def test_completed_download(self):
+        """
+        Ensure size of completed download is added to disk space used by the user.
+        """
+        download = self.create_download(1024 * 1024)
+        self.create_download(512 * 1024)
+        self.create_download(100, user=self.other_user)
+
+        self.assertEqual(download.file_size, 1024 * 1024)
+        self.assertDiskSpaceUsed(self.user, 1536 * 1024)
+        self.assertEqual(self.user.disk_space_used, 1.5)
+        self.assertDiskSpaceUsed(self.other_user, 100)
+
+    def test_failed_download(self):
+        """
+        Ensure failed downloads don't change disk space used.
+        """
+        download = Download.objects.create(bookmark=self.create_bookmark())
+        with mock.patch("downloads.tasks.YouTube") as youtube:
+            youtube.return_value.streams.filter.side_effect = Exception("Failed")
+            self.assertFalse(download_from_youtube(download))
+        self.assertDiskSpaceUsed(self.user, 0)
+
+    def test_reservation(self):
+        """
+        Ensure estimated size is reserved while downloading, and the reservation is converted to actual size.
+        """
+        download = Download.objects.create(bookmark=self.create_bookmark())
+
+        def write_file(url, path, total, progress):
+            self.assertDiskSpaceUsed(self.user, 0, reserved=2000)
+            with open(path, "wb") as file:
+                file.write(b"x" * 1500)
+            return 1500
+
+        with mock.patch("downloads.tasks.YouTube") as youtube, mock.patch(
+            "downloads.tasks.download_to_file", side_effect=write_file
+        ):
+            youtube.return_value.title = "Video"
+            stream = youtube.return_value.streams.filter.return_value
+            stream = stream.get_highest_resolution.return_value
+            stream.filesize = 2000
+            stream.itag = 22
+            self.assertTrue(download_from_youtube(download))
+
+        self.assertDiskSpaceUsed(self.user, 1500)
+        download.refresh_from_db()
+        self.assertEqual(download.reserved_size, 0)
+
+    def test_reservation_exceeding_quota(self):
+        """
+        Ensure download fails without downloading the video if its estimated size exceeds quota left.
+        """
+        self.create_download(9 * 1024 * 1024)
+        download = Download.objects.create(bookmark=self.create_bookmark())
+        self.assertFalse(self.download(download, 100, estimated_size=2 * 1024 * 1024))
+        self.assertEqual(download.status, Download.Status.FAILED)
+        self.assertFalse(download.file)
+        self.assertDiskSpaceUsed(self.user, 9 * 1024 * 1024)
+
+    def test_concurrent_reservations(self):
+        """
+        Ensure reservations of downloads in progress can't exceed quota together, and are released on deletion.
+        """
+        downloads = [
+            Download.objects.create(bookmark=self.create_bookmark()) for _ in range(3)
+        ]
+        reserve_disk_space(downloads[0], 4 * 1024 * 1024)
+        reserve_disk_space(downloads[1], 4 * 1024 * 1024)
+        with self.assertRaises(DiskQuotaExceeded):
+            reserve_disk_space(downloads[2], 4 * 1024 * 1024)
+        self.assertDiskSpaceUsed(self.user, 0, reserved=8 * 1024 * 1024)
+
+        # Retried download replaces its reservation
+        reserve_disk_space(downloads[1], 6 * 1024 * 1024)
+        self.assertDiskSpaceUsed(self.user, 0, reserved=10 * 1024 * 1024)
+
+        Download.objects.get(pk=downloads[0].pk).delete()
+        reserve_disk_space(downloads[2], 4 * 1024 * 1024)
+        self.assertDiskSpaceUsed(self.user, 0, reserved=10 * 1024 * 1024)
+
+        response = self.client.post(
+            "/api/v1/downloads/start/",
+            {"bookmark_id": self.create_bookmark().pk},
+            HTTP_AUTHORIZATION="Token " + self.login(),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(
+            "reserved by downloads in progress 10.0 Mb",
+            response.json()["bookmark_id"][0],
+        )
+
+    def test_stale_reservations(self):
+        """
+        Ensure `reconcile_disk_usage` releases reservations of downloads not in progress, and expired ones.
+        """
+        completed, pending, killed = [
+            Download.objects.create(bookmark=self.create_bookmark()) for _ in range(3)
+        ]
+        for download in (completed, pending, killed):
+            reserve_disk_space(download, 1000)
+        Download.objects.filter(pk=completed.pk).update(
+            status=Download.Status.COMPLETED
+        )
+        Download.objects.filter(pk=killed.pk).update(
+            reserved_at=timezone.now() - timedelta(hours=7)
+        )
+
+        stdout = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("reconcile_disk_usage", "--check", stdout=stdout)
+        self.assertIn(
+            f"Download #{killed.pk}: stale reservation of 1000 bytes", stdout.getvalue()
+        )
+
+        call_command("reconcile_disk_usage", stdout=StringIO())
+        self.assertDiskSpaceUsed(self.user, 0, reserved=1000)
+        call_command("reconcile_disk_usage", "--check", stdout=StringIO())
+
+        # Settling a released reservation doesn't release it again
+        killed.status = Download.Status.FAILED
+        settle_disk_space(killed, 0)
+        self.assertDiskSpaceUsed(self.user, 0, reserved=1000)
+
+    def test_deleted_downloads(self):
+        """
+        Ensure size of deleted downloads is subtracted from disk space used, however they are deleted.
+        """
+        downloads = [self.create_download(100) for _ in range(4)]
+        self.create_download(100, user=self.other_user)
+        self.assertDiskSpaceUsed(self.user, 400)
+
+        downloads[0].delete()
+        self.assertDiskSpaceUsed(self.user, 300)
+        Download.objects.filter(pk=downloads[1].pk).delete()
+        self.assertDiskSpaceUsed(self.user, 200)
+        downloads[2].bookmark.delete()
+        self.assertDiskSpaceUsed(self.user, 100)
+        Bookmark.objects.filter(pk=downloads[3].bookmark_id).delete()
+        self.assertDiskSpaceUsed(self.user, 0)
+        self.assertFalse(os.path.exists(downloads[3].file.path))
+        self.assertDiskSpaceUsed(self.other_user, 100)
+
+    def test_reconcile(self):
+        """
+        Ensure `reconcile_disk_usage` command fixes sizes of changed and missing files, and users' counters,
+        bumping collection versions of their users.
+        """
+        changed, missing, kept = [self.create_download(100) for _ in range(3)]
+        with open(changed.file.path, "ab") as file:
+            file.write(b"x" * 50)
+        os.remove(missing.file.path)
+        CustomUser.objects.filter(pk=self.other_user.pk).update(
+            disk_space_used_bytes=42
+        )
+        with open(os.path.join(MEDIA_ROOT, "videos", "orphan.mp4"), "wb") as file:
+            file.write(b"x")
+
+        stdout = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("reconcile_disk_usage", "--check", stdout=stdout)
+        self.assertIn(
+            f"Download #{changed.pk}: file_size=100, actual=150", stdout.getvalue()
+        )
+        self.assertIn(
+            f"Download #{missing.pk}: file_size=100, actual=0", stdout.getvalue()
+        )
+        self.assertIn(
+            "File videos/orphan.mp4 doesn't belong to any download", stdout.getvalue()
+        )
+
+        change_seqs = [get_change_seq(user.pk) for user in (self.user, self.other_user)]
+        stdout = StringIO()
+        call_command("reconcile_disk_usage", stdout=stdout)
+        self.assertGreater(get_change_seq(self.user.pk), change_seqs[0])
+        self.assertGreater(get_change_seq(self.other_user.pk), change_seqs[1])
+        changed.bookmark.refresh_from_db()
+        self.assertGreater(changed.bookmark.change_seq, change_seqs[0])
+        self.assertIn(
+            "Repaired 2 download size(s), released 0 reservation(s) and repaired 2 user counter(s).",
+            stdout.getvalue(),
+        )
+        self.assertDiskSpaceUsed(self.user, 250)
+        self.assertDiskSpaceUsed(self.other_user, 0)
+
+        os.remove(os.path.join(MEDIA_ROOT, "videos", "orphan.mp4"))
+        call_command("reconcile_disk_usage", "--check", stdout=StringIO())
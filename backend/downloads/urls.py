@@ -1,7 +1,8 @@
 from django.urls import path
 
-from .views import download_start_from_web
+from .views import download_progress, download_start_from_web
 
 urlpatterns = [
     path("downloads/start/", download_start_from_web),
+    path("downloads/<int:pk>/progress/", download_progress),
 ]
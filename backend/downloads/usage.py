@@ -0,0 +1,255 @@
+"""
+Denormalized `CustomUser.disk_space_used_bytes` - total `file_size` of user's downloads, shown in the profile - and
+`CustomUser.disk_space_reserved_bytes` - total `reserved_size` of downloads in progress.
+
+Before fetching a video, `tasks.download_from_youtube()` reserves its estimated size from stream metadata with
+`reserve_disk_space()`: a single conditional `UPDATE ... WHERE quota - used - reserved >= size`, so parallel workers
+can't reserve more than the quota together. On completion the reservation is converted to the actual file size, on
+failure it's released. A reservation left by a killed worker is replaced when the download is retried, or released
+by `reconcile_disk_usage` once it's older than `DOWNLOAD_RESERVATION_TTL` - run the command periodically.
+
+Counters are adjusted with relative `UPDATE ... SET disk_space_used_bytes = disk_space_used_bytes + N` in the same
+transaction as the change of the download, so concurrent downloads don't overwrite each other. It's taken care of
+when `tasks.download_from_youtube()` completes a download, and when downloads are deleted - by `pre_delete` signal,
+sent for `Download.delete()` as well as for cascade and queryset deletions. Code changing `file_size` otherwise must
+call `adjust_disk_space_used()` itself. `reconcile_disk_usage` management command fixes any drift, including sizes
+of downloads whose files in `MEDIA_ROOT/videos` were changed or removed.
+"""
+import os
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import BigIntegerField, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from bookmarks.models import Bookmark
+from bookmarks.sync import bump_change_seqs, touch_bookmarks
+
+from .models import Download
+
+VIDEOS_DIR = "videos"
+
+
+class DiskQuotaExceeded(Exception):
+    """
+    Raised when there is not enough disk quota left to reserve space for a download.
+    """
+
+
+def adjust_disk_space_used(
+    bookmark_id: Optional[int], delta: int, reserved_delta: int = 0
+) -> None:
+    """
+    Add `delta` bytes to disk space used, and `reserved_delta` bytes to disk space reserved by the owner of
+    the bookmark with `bookmark_id`. Should be called in the transaction changing the download.
+    """
+    if not bookmark_id or not (delta or reserved_delta):
+        return
+    get_user_model().objects.filter(bookmarks=bookmark_id).update(
+        disk_space_used_bytes=F("disk_space_used_bytes") + delta,
+        disk_space_reserved_bytes=F("disk_space_reserved_bytes") + reserved_delta,
+    )
+
+
+def reserve_disk_space(download: Download, size: int) -> None:
+    """
+    Reserve `size` bytes of user's disk quota for the `download` in progress, replacing its previous reservation
+    (i.e. of a failed attempt). Quota is checked and the reservation is made in a single UPDATE query, so concurrent
+    reservations can't exceed the quota.
+    Raise `DiskQuotaExceeded` if there is not enough quota left.
+    """
+    with transaction.atomic():
+        delta = size - lock_reserved_size(download)
+        users = get_user_model().objects.filter(pk=download.bookmark.user_id)
+        if delta > 0:
+            available = (
+                F("disk_quota") * 1024 * 1024
+                - F("disk_space_used_bytes")
+                - F("disk_space_reserved_bytes")
+            )
+            users = users.filter(GreaterThanOrEqual(available, delta))
+
+        if not users.update(
+            disk_space_reserved_bytes=F("disk_space_reserved_bytes") + delta
+        ):
+            raise DiskQuotaExceeded(
+                f"Not enough disk quota to reserve {size} bytes for download #{download.pk}"
+            )
+        # Not a part of bookmark representation, so not saved with `save()` stamping the bookmark for sync
+        Download.objects.filter(pk=download.pk).update(
+            reserved_size=size, reserved_at=timezone.now()
+        )
+    download.reserved_size = size
+
+
+def settle_disk_space(download: Download, counted_file_size: int) -> None:
+    """
+    Save the `download` that has been completed or has failed, and convert its reservation to disk space used by
+    the change of `file_size` since `counted_file_size`, in one transaction.
+    """
+    with transaction.atomic():
+        reserved_size = lock_reserved_size(download)
+        download.reserved_size, download.reserved_at = 0, None
+        download.save()
+        adjust_disk_space_used(
+            download.bookmark_id,
+            download.file_size - counted_file_size,
+            -reserved_size,
+        )
+
+
+def lock_reserved_size(download: Download) -> int:
+    """
+    Return `reserved_size` of the `download` in DB, locking its row until the end of the transaction - it may have
+    been released by `release_stale_reservations()` since the download has started.
+    """
+    return (
+        Download.objects.select_for_update()
+        .filter(pk=download.pk)
+        .values_list("reserved_size", flat=True)
+        .first()
+        or 0
+    )
+
+
+def find_stale_reservations(downloads=None):
+    """
+    Return `downloads` (all by default) with reservations that are not in progress anymore: of completed or failed
+    downloads, or older than `DOWNLOAD_RESERVATION_TTL` - i.e. left by a killed worker, whose task is never retried.
+    """
+    downloads = Download.objects.all() if downloads is None else downloads
+    expired = timezone.now() - timedelta(seconds=settings.DOWNLOAD_RESERVATION_TTL)
+    return downloads.filter(reserved_size__gt=0).filter(
+        ~Q(status=Download.Status.PENDING)
+        | Q(reserved_at__lt=expired)
+        | Q(reserved_at__isnull=True)
+    )
+
+
+def release_stale_reservations(downloads=None) -> int:
+    """
+    Release reservations returned by `find_stale_reservations()`. Return number of released reservations.
+    Counters of their users must be repaired afterwards.
+    """
+    return find_stale_reservations(downloads).update(reserved_size=0, reserved_at=None)
+
+
+def get_actual_disk_space(field: str = "file_size") -> Coalesce:
+    """
+    Return expression computing actual total `field` of the user's downloads - source of truth for the counters:
+    `file_size` for `disk_space_used_bytes`, `reserved_size` for `disk_space_reserved_bytes`.
+    """
+    disk_space = (
+        Download.objects.filter(bookmark__user_id=OuterRef("pk"))
+        .order_by()
+        .values("bookmark__user_id")
+        .annotate(total=Sum(field))
+        .values("total")
+    )
+    return Coalesce(Subquery(disk_space, output_field=BigIntegerField()), 0)
+
+
+def find_stale_users(users=None):
+    """
+    Return `users` (all users by default) whose counters differ from the actual total sizes of their downloads,
+    annotated with `actual_disk_space_used_bytes` and `actual_disk_space_reserved_bytes`.
+    """
+    users = get_user_model().objects.all() if users is None else users
+    return users.annotate(
+        actual_disk_space_used_bytes=get_actual_disk_space("file_size"),
+        actual_disk_space_reserved_bytes=get_actual_disk_space("reserved_size"),
+    ).filter(
+        ~Q(disk_space_used_bytes=F("actual_disk_space_used_bytes"))
+        | ~Q(disk_space_reserved_bytes=F("actual_disk_space_reserved_bytes"))
+    )
+
+
+def repair_disk_space_used(users=None) -> int:
+    """
+    Recompute counters of `users` (all users by default) that have drifted, with a single UPDATE query,
+    and bump their collection versions. Return number of repaired users.
+    """
+    stale_ids = list(find_stale_users(users).values_list("pk", flat=True))
+    if not stale_ids:
+        return 0
+    with transaction.atomic():
+        bump_change_seqs(stale_ids)
+        return (
+            get_user_model()
+            .objects.filter(pk__in=stale_ids)
+            .update(
+                disk_space_used_bytes=get_actual_disk_space("file_size"),
+                disk_space_reserved_bytes=get_actual_disk_space("reserved_size"),
+            )
+        )
+
+
+def scan_files(directory: str = VIDEOS_DIR) -> Dict[str, int]:
+    """
+    Return sizes of files in `MEDIA_ROOT/directory`, by name relative to `MEDIA_ROOT` - as stored in `Download.file`.
+    """
+    path = os.path.join(settings.MEDIA_ROOT, directory)
+    if not os.path.isdir(path):
+        return {}
+    return {
+        f"{directory}/{entry.name}": entry.stat().st_size
+        for entry in os.scandir(path)
+        if entry.is_file()
+    }
+
+
+def find_file_size_drift(
+    file_sizes: Dict[str, int], directory: str = VIDEOS_DIR
+) -> List[Tuple[int, int, int]]:
+    """
+    Return `(download id, file_size, actual size)` of downloads with files in `directory`, whose `file_size`
+    differs from the size of the file in `file_sizes` (from `scan_files()`) - or isn't 0 if the file is missing.
+    """
+    downloads = Download.objects.filter(file__startswith=f"{directory}/").values_list(
+        "pk", "file", "file_size"
+    )
+    return [
+        (pk, file_size, file_sizes.get(file, 0))
+        for pk, file, file_size in downloads
+        if file_size != file_sizes.get(file, 0)
+    ]
+
+
+def find_orphan_files(
+    file_sizes: Dict[str, int], directory: str = VIDEOS_DIR
+) -> List[str]:
+    """
+    Return names of files in `file_sizes` (from `scan_files()`) which no download refers to, as a complete or
+    a partial file.
+    """
+    downloads = Download.objects.filter(
+        Q(file__startswith=f"{directory}/")
+        | Q(partial_file__startswith=f"{directory}/")
+    )
+    referenced = set()
+    for file, partial_file in downloads.values_list("file", "partial_file"):
+        referenced.update((file, partial_file))
+    return sorted(set(file_sizes) - referenced)
+
+
+def repair_file_sizes(drift: List[Tuple[int, int, int]]) -> int:
+    """
+    Set `file_size` of downloads to actual sizes of their files from `find_file_size_drift()`, unless it has changed
+    since. Bookmarks of repaired downloads are stamped for sync. Return number of repaired downloads.
+    Counters of their users must be repaired afterwards.
+    """
+    repaired_ids = [
+        pk
+        for pk, file_size, actual_size in drift
+        if Download.objects.filter(pk=pk, file_size=file_size).update(
+            file_size=actual_size
+        )
+    ]
+    if repaired_ids:
+        touch_bookmarks(Bookmark.objects.filter(download__in=repaired_ids))
+    return len(repaired_ids)
@@ -1,4 +1,4 @@
-from rest_framework import authentication, permissions, status
+from rest_framework import permissions, status
 from rest_framework.decorators import (
     api_view,
     authentication_classes,
@@ -9,13 +9,15 @@ from rest_framework.response import Response
 
 from bookmarks.models import Bookmark
 from downloads.models import Download
+from downloads.progress import DownloadProgress, get_progress
 from downloads.tasks import process_download
+from users.authentication import CachedTokenAuthentication
 
 from .serializers import DownloadCreateSerializer, DownloadSerializer
 
 
 @api_view(["POST"])
-@authentication_classes([authentication.TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([permissions.IsAuthenticated])
 def download_start_from_web(request: Request) -> Response:  # noqa: max-complexity: 4
     """
@@ -23,7 +25,7 @@ def download_start_from_web(request: Request) -> Response:  # noqa: max-complexi
     Then either:
     - create new Download instance with `pending` status, add it to the bookmark;
     - pass existing Download to Celery task.
-    Run Celery `process_download` task, with `id` of the Download instance.
+    Run Celery `process_download` task, with `id` of the Download instance, and reset download's progress.
     Return the detailed Download instance, serialized to JSON.
 
     Post data example:
@@ -49,6 +51,7 @@ def download_start_from_web(request: Request) -> Response:  # noqa: max-complexi
             download.bookmark = bookmark
             download.save()
 
+        DownloadProgress(download.pk, bookmark.user_id).publish()
         process_download.delay(download_id=download.pk)
 
         return Response(
@@ -57,3 +60,25 @@ def download_start_from_web(request: Request) -> Response:  # noqa: max-complexi
         )
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(["GET"])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def download_progress(request: Request, pk: int) -> Response:
+    """
+    Return progress of the user's download with `pk` from Redis, without DB queries.
+    Return 404 if the download is not started, belongs to another user, or its progress has expired.
+
+    Response data example:
+    {
+        "status": "PG",
+        "bytes_done": 1048576,
+        "total": 4194304,
+        "bytes_per_second": 524288
+    }
+    """
+    progress = get_progress(pk)
+    if progress is None or progress.pop("user_id") != request.user.pk:
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(progress)
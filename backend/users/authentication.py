@@ -0,0 +1,239 @@
+"""
+Token authentication with cached token -> user lookups, so most API requests don't query `Token` joined with the user.
+
+Users are cached in two tiers:
+- in-process LRU of `AUTH_TOKEN_LOCAL_CACHE_SIZE` entries, kept for `AUTH_TOKEN_LOCAL_CACHE_TTL` seconds;
+- Redis via Django's cache framework, shared by all processes, kept for `AUTH_TOKEN_CACHE_TTL` seconds.
+
+Cache keys contain SHA-256 of the token, so keys read from Redis can't be used to authenticate. Only the user's
+`CACHED_USER_FIELDS` are cached - not the password hash or personal data; other fields of the cached user are
+loaded from DB on access, like deferred fields - all of them with one query, see `CustomUser.refresh_from_db()`.
+
+A token's entries are invalidated when the token is deleted (i.e. Djoser logout), and when its user is saved
+(i.e. deactivated) or deleted, see `signals` module. Invalidation replaces the Redis entry with a short-living
+`REVOKED` marker instead of deleting it, and users are only cached if there is no entry, so a request which has read
+the user from DB before invalidation can't cache it back. Other processes may still use their local copies for up to
+`AUTH_TOKEN_LOCAL_CACHE_TTL` seconds - keep it short.
+
+Lookups served by each tier and misses are counted in-process and added to Redis counters every
+`STATS_FLUSH_INTERVAL` seconds, see `get_stats()`. Cache is best-effort: if Redis is unavailable, tokens are looked
+up in DB.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from redis.exceptions import RedisError
+from rest_framework.authentication import TokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+REVOKED = "revoked"
+STATS = ("local_hits", "redis_hits", "misses")
+STATS_FLUSH_INTERVAL = 10
+# Fields needed to authenticate and authorize requests
+CACHED_USER_FIELDS = ("id", "is_active", "is_staff", "is_superuser")
+
+
+class LocalCache:
+    """
+    Thread-safe in-process LRU cache, entries expire `ttl` seconds after being set.
+    """
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Return value stored under `key`, or None if there is none or it has expired.
+        """
+        with self.lock:
+            expires, value = self.entries.get(key, (0, None))
+            if expires < time.monotonic():
+                self.entries.pop(key, None)
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store `value` under `key`, evicting the least recently used entries over `size`.
+        """
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Delete entry stored under `key`, if any.
+        """
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Delete all entries.
+        """
+        with self.lock:
+            self.entries.clear()
+
+
+class StatsBuffer:
+    """
+    In-process counters of lookups, added to shared Redis counters at most every `STATS_FLUSH_INTERVAL` seconds,
+    so counting doesn't cost a Redis round trip per request.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def increment(self, stat: str) -> None:
+        """
+        Increment `stat` counter, flushing counters if it's time to.
+        """
+        with self.lock:
+            self.counts[stat] += 1
+            due = time.monotonic() - self.flushed_at >= STATS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self) -> None:  # noqa: max-complexity: 4
+        """
+        Add counters to the shared ones in Redis and reset them.
+        """
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.flushed_at = time.monotonic()
+        for stat, value in counts.items():
+            key = get_stat_key(stat)
+            try:
+                cache.add(key, 0, timeout=None)
+                cache.incr(key, value)
+            except (RedisError, ValueError):
+                # Counters are best-effort; ValueError if the key was evicted right after `add()`
+                pass
+
+
+local_cache = LocalCache(
+    settings.AUTH_TOKEN_LOCAL_CACHE_SIZE, settings.AUTH_TOKEN_LOCAL_CACHE_TTL
+)
+stats = StatsBuffer()
+
+
+def get_cache_key(token_key: str) -> str:
+    """
+    Return cache key of the user authenticated with `token_key`.
+    """
+    return f"auth_token:{hashlib.sha256(token_key.encode('utf-8')).hexdigest()}"
+
+
+def get_stat_key(stat: str) -> str:
+    """
+    Return cache key of `stat` counter.
+    """
+    return f"auth_token_stats:{stat}"
+
+
+def get_cached_user(token_key: str):  # noqa: max-complexity: 5
+    """
+    Return the user authenticated with `token_key` from the local cache or Redis, or None. The user instance only
+    has `CACHED_USER_FIELDS` loaded. Users found in Redis are cached locally.
+    """
+    key = get_cache_key(token_key)
+    values = local_cache.get(key)
+    if values is not None:
+        stats.increment("local_hits")
+        return get_user_model().from_db(DEFAULT_DB_ALIAS, CACHED_USER_FIELDS, values)
+
+    try:
+        values = cache.get(key)
+    except RedisError as e:
+        logger.warning(f"Token cache is unavailable: {e}")
+        values = None
+    if values is None or values == REVOKED:
+        stats.increment("misses")
+        return None
+
+    stats.increment("redis_hits")
+    local_cache.set(key, values)
+    return get_user_model().from_db(DEFAULT_DB_ALIAS, CACHED_USER_FIELDS, values)
+
+
+def cache_user(token_key: str, user) -> None:  # noqa: max-complexity: 4
+    """
+    Cache `CACHED_USER_FIELDS` of the `user` authenticated with `token_key`, unless the token has just been
+    invalidated.
+    """
+    key = get_cache_key(token_key)
+    values = tuple(getattr(user, field) for field in CACHED_USER_FIELDS)
+    try:
+        cached = cache.add(key, values, timeout=settings.AUTH_TOKEN_CACHE_TTL)
+    except RedisError as e:
+        logger.warning(f"Token cache is unavailable: {e}")
+        cached = True
+    if cached:
+        local_cache.set(key, values)
+
+
+def invalidate_token(token_key: str) -> None:
+    """
+    Make lookups of `token_key` go to DB, in all processes - after `AUTH_TOKEN_LOCAL_CACHE_TTL` in other ones.
+    """
+    key = get_cache_key(token_key)
+    local_cache.delete(key)
+    try:
+        cache.set(key, REVOKED, timeout=settings.AUTH_TOKEN_LOCAL_CACHE_TTL)
+    except RedisError as e:
+        logger.warning(f"Token cache is unavailable, {key} is not invalidated: {e}")
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Return counters of lookups served by the local cache, Redis and DB (misses), and the overall hit ratio.
+    Counters of this process are flushed first, other processes' ones may lag by `STATS_FLUSH_INTERVAL`.
+    """
+    stats.flush()
+    try:
+        values = cache.get_many([get_stat_key(stat) for stat in STATS])
+    except RedisError as e:
+        logger.warning(f"Token cache is unavailable: {e}")
+        values = {}
+
+    counts = {stat: values.get(get_stat_key(stat), 0) for stat in STATS}
+    total = sum(counts.values())
+    hits = counts["local_hits"] + counts["redis_hits"]
+    return {**counts, "hit_ratio": round(hits / total, 4) if total else 0.0}
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement of DRF's `TokenAuthentication`, caching token -> user lookups in-process and in Redis.
+    """
+
+    def authenticate_credentials(self, key: str) -> Tuple[Any, Optional[Any]]:
+        """
+        Return the user authenticated with token `key` and the token. Cached users are returned with an unsaved
+        token instance, which has the same `key` and `user`.
+        Raise `AuthenticationFailed` if there is no such token or its user is inactive.
+        """
+        user = get_cached_user(key)
+        if user is not None:
+            return user, self.get_model()(key=key, user=user)
+
+        user, token = super().authenticate_credentials(key)
+        cache_user(key, user)
+        return user, token
@@ -0,0 +1,16 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_customuser_disk_quota"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(fields=["telegram_id"], name="user_telegram_id_idx"),
+        ),
+    ]
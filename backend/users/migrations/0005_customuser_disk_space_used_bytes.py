@@ -0,0 +1,44 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:14
+
+from django.db import migrations, models
+from django.db.models import BigIntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def count_disk_space_used(apps, schema_editor):
+    """
+    Fill `disk_space_used_bytes` of existing users with total size of their downloads.
+    """
+    CustomUser = apps.get_model("users", "CustomUser")
+    Download = apps.get_model("downloads", "Download")
+
+    disk_space_used = (
+        Download.objects.filter(bookmark__user_id=OuterRef("pk"))
+        .order_by()
+        .values("bookmark__user_id")
+        .annotate(total=Sum("file_size"))
+        .values("total")
+    )
+    CustomUser.objects.update(
+        disk_space_used_bytes=Coalesce(
+            Subquery(disk_space_used, output_field=BigIntegerField()), 0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_customuser_telegram_id_index"),
+        ("downloads", "0004_download_status_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="disk_space_used_bytes",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="disk space used, bytes"
+            ),
+        ),
+        migrations.RunPython(count_disk_space_used, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0005_customuser_disk_space_used_bytes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="disk_space_reserved_bytes",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="disk space reserved, bytes"
+            ),
+        ),
+    ]
@@ -1,6 +1,5 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from django.db.models import Sum
 from django.utils.translation import gettext_lazy as _
 
 
@@ -19,19 +18,63 @@ class CustomUser(AbstractUser):
         verbose_name=_("disk quota, Mb"),
         default=0,
     )
+    # Total `file_size` of user's downloads, maintained by `downloads.usage` module
+    disk_space_used_bytes = models.BigIntegerField(
+        verbose_name=_("disk space used, bytes"),
+        default=0,
+        editable=False,
+    )
+    # Estimated sizes of downloads in progress, reserved against the quota by `downloads.usage` module
+    disk_space_reserved_bytes = models.BigIntegerField(
+        verbose_name=_("disk space reserved, bytes"),
+        default=0,
+        editable=False,
+    )
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Users are looked up by Telegram id when bookmarks are created from Telegram:
+            models.Index(fields=["telegram_id"], name="user_telegram_id_idx"),
+        ]
 
     def __str__(self):
         return self.username
 
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        Load all deferred fields at once when any of them is accessed. Users authenticated from the token cache only
+        have auth fields loaded (see `users.authentication`), so views reading other fields re-fetch the row with
+        one query, instead of one query per field.
+        Reference: https://docs.djangoproject.com/en/4.1/ref/models/instances/#django.db.models.Model.refresh_from_db
+        """
+        if fields is not None:
+            fields = set(fields)
+            deferred_fields = self.get_deferred_fields()
+            if fields & deferred_fields:
+                fields |= deferred_fields
+        super().refresh_from_db(using=using, fields=fields)
+
     @property
     def disk_space_used(self):
         """
         Return disk space (in Mb) used by user's downloads.
         """
-        from downloads.models import Download
+        return round(self.disk_space_used_bytes / (1024 * 1024), 1)
 
-        downloads = Download.objects.filter(bookmark__user_id=self.id)
-        disk_space_used = downloads.aggregate(disk_space_used=Sum("file_size")).get(
-            "disk_space_used"
+    @property
+    def disk_space_reserved(self):
+        """
+        Return disk space (in Mb) reserved by user's downloads in progress.
+        """
+        return round(self.disk_space_reserved_bytes / (1024 * 1024), 1)
+
+    @property
+    def disk_space_available_bytes(self):
+        """
+        Return disk space (in bytes) left for new downloads: quota minus used and reserved space.
+        """
+        return (
+            self.disk_quota * 1024 * 1024
+            - self.disk_space_used_bytes
+            - self.disk_space_reserved_bytes
         )
-        return round(disk_space_used / (1024 * 1024), 1) if disk_space_used else 0
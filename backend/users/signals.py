@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """
+    Stop authenticating with the deleted token from cache - on Djoser logout, and when the user is deleted.
+    """
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(
+    sender, instance, created=False, update_fields=None, **kwargs
+):
+    """
+    Drop cached copies of the saved user, so deactivation and other changes take effect on the next request.
+    Updates of `last_login` alone, which happen on every login, don't matter for authentication.
+    """
+    if created or update_fields == frozenset(["last_login"]):
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list("key", flat=True):
+        invalidate_token(key)
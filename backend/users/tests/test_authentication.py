@@ -0,0 +1,161 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from users.authentication import (
+    cache_user,
+    get_cache_key,
+    get_cached_user,
+    get_stats,
+    invalidate_token,
+    local_cache,
+    stats,
+)
+from users.models import CustomUser
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachedTokenAuthenticationTest(APITestCase):
+    """
+    Test `CachedTokenAuthentication` and invalidation of cached lookups.
+    """
+
+    username = "testuser"
+    password = "password"
+    auth_token = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(cls.username, password=cls.password)
+        cls.admin = CustomUser.objects.create_user(
+            "admin", password=cls.password, is_staff=True
+        )
+
+    def setUp(self):
+        stats.flush()
+        cache.clear()
+        local_cache.clear()
+        self.auth_token = self.login(self.username)
+
+    def login(self, username):
+        response = self.client.post(
+            "/api/v1/token/login/",
+            {"username": username, "password": self.password},
+        )
+        return json.loads(response.content).get("auth_token")
+
+    def get(self, url="/api/v1/user/details/", auth_token=None):
+        return self.client.get(
+            url, HTTP_AUTHORIZATION="Token " + (auth_token or self.auth_token)
+        )
+
+    def count_token_queries(self, url="/api/v1/user/details/"):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sum('"authtoken_token"' in query["sql"] for query in queries)
+
+    def test_lookups_are_cached(self):
+        """
+        Ensure the token is looked up in DB once, then served from the local cache or Redis.
+        """
+        self.assertEqual(self.count_token_queries(), 1)
+        self.assertEqual(self.count_token_queries(), 0)
+        self.assertEqual(self.count_token_queries("/api/v1/bookmarks/"), 0)
+
+        local_cache.clear()
+        self.assertEqual(self.count_token_queries(), 0)
+        self.assertEqual(self.get().json()["username"], self.username)
+
+        self.assertEqual(
+            get_stats(),
+            {"local_hits": 3, "redis_hits": 1, "misses": 1, "hit_ratio": 0.8},
+        )
+
+    def test_cached_user_fields(self):
+        """
+        Ensure only auth-relevant fields of the user are stored in the cache, and others are loaded on access.
+        """
+        self.get()
+        self.assertEqual(
+            cache.get(get_cache_key(self.auth_token)),
+            (self.user.pk, True, False, False),
+        )
+
+        user = get_cached_user(self.auth_token)
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.get_deferred_fields() & {"id", "is_active"}, set())
+        self.assertIn("password", user.get_deferred_fields())
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, self.username)
+            self.assertEqual(user.disk_space_available_bytes, 0)
+            self.assertEqual(user.password, self.user.password)
+
+    def test_full_user_views(self):
+        """
+        Ensure views reading fields which are not cached, with the warm cache, load the user with one query,
+        like with the cold one.
+        """
+        for url in ("/api/v1/users/me/", "/api/v1/user/details/"):
+            self.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["username"], self.username)
+            user_queries = [q for q in queries if '"users_customuser"' in q["sql"]]
+            self.assertEqual(len(user_queries), 1, url)
+            self.assertEqual(len(queries), 1 if url == "/api/v1/users/me/" else 2)
+
+    def test_logout(self):
+        """
+        Ensure the token stops working right after Djoser logout.
+        """
+        self.get()
+        response = self.client.post(
+            "/api/v1/token/logout/", HTTP_AUTHORIZATION="Token " + self.auth_token
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_deactivation(self):
+        """
+        Ensure tokens of deactivated user stop working, and changes of the user are seen on the next request.
+        """
+        self.get()
+        user = CustomUser.objects.get(pk=self.user.pk)
+        user.first_name = "Ivan"
+        user.save()
+        self.assertEqual(get_cached_user(self.auth_token), None)
+        self.assertEqual(self.get().json()["first_name"], "Ivan")
+
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_invalidation_race(self):
+        """
+        Ensure the user read from DB before invalidation can't be cached after it.
+        """
+        invalidate_token(self.auth_token)
+        cache_user(self.auth_token, self.user)
+        self.assertEqual(get_cached_user(self.auth_token), None)
+
+    def test_stats_api(self):
+        """
+        Ensure cache stats are available to staff only.
+        """
+        url = "/api/v1/auth/cache/stats/"
+        self.assertEqual(self.get(url).status_code, 403)
+        response = self.get(url, auth_token=self.login("admin"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.json()), {"local_hits", "redis_hits", "misses", "hit_ratio"}
+        )
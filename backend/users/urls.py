@@ -1,8 +1,9 @@
 from django.urls import path
 
-from .views import LoggedInUserDetailView, UserUpdateView
+from .views import AuthCacheStatsView, LoggedInUserDetailView, UserUpdateView
 
 urlpatterns = [
     path("user/details/", LoggedInUserDetailView.as_view()),
     path("user/<int:pk>/", UserUpdateView.as_view()),
+    path("auth/cache/stats/", AuthCacheStatsView.as_view()),
 ]
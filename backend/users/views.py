@@ -1,9 +1,12 @@
-from rest_framework import authentication, permissions
+from rest_framework import permissions
 from rest_framework.generics import UpdateAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from bookmarks.conditional import conditional_on_collection_version
+
+from .authentication import CachedTokenAuthentication, get_stats
 from .models import CustomUser
 from .serializers import CustomUserSerializer
 
@@ -15,10 +18,11 @@ class LoggedInUserDetailView(APIView):
     view for user details.
     """
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @staticmethod
+    @conditional_on_collection_version
     def get(request: Request) -> Response:
         """
         Return logged in user's detailed info.
@@ -34,8 +38,24 @@ class UserUpdateView(UpdateAPIView):
     "PATCH" method must be used to partially update the data.
     """
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
+
+
+class AuthCacheStatsView(APIView):
+    """
+    Return token authentication cache counters, for monitoring. Available to staff users only.
+    """
+
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    @staticmethod
+    def get(request: Request) -> Response:
+        """
+        Return lookups served by the local cache, Redis and DB, and the hit ratio. See `authentication.get_stats()`.
+        """
+        return Response(get_stats())
@@ -58,6 +58,7 @@ export interface Bookmark {
   is_favorite: boolean;
   is_read: boolean;
   is_archived: boolean;
+  metadata_status: string;
   created: Date;
   updated: Date;
 }